@@ -0,0 +1,60 @@
+/**
+ * Lookup latency of the hosts called by the API
+ *
+ * Resolves the MongoDB SRV record and the hosts of the upstreams the way the
+ * clients do (`dns.lookup` for the HTTP clients, `resolveSrv` for the
+ * `mongodb+srv` driver), so the search domains and `ndots` of the pod's
+ * resolv.conf apply. Run it in a pod before and after a DNS change:
+ *
+ * kubectl exec deploy/depo-backend-deployment -- npm run bench:dns [-- <iterations>]
+ */
+import { promises as dns } from "dns";
+import { URL } from "url";
+import { config } from "../config/config";
+
+const iterations = +process.argv[2] || 200;
+
+const hostOf = (url: string) => (url ? new URL(url).hostname : null);
+
+const cases = [
+  { name: "mongodb srv", host: config.mongodb.host, resolve: (host: string) => dns.resolveSrv(`_mongodb._tcp.${host}`) },
+  ...[
+    hostOf(config.moralis.server_url),
+    hostOf(config.opensea.api_addr),
+    "api.thegraph.com",
+    "api.gateio.ws",
+    `s3.${config.moderation.bucketRegion}.amazonaws.com`,
+    `rekognition.${config.moderation.region}.amazonaws.com`,
+  ].map((host) => ({ name: host, host, resolve: (host: string) => dns.lookup(host) })),
+].filter(({ host }) => host);
+
+const percentile = (sorted: Array<number>, p: number) => sorted[Math.min(sorted.length - 1, Math.floor(sorted.length * p))];
+
+const measure = async (resolve: (host: string) => Promise<any>, host: string) => {
+  const durations = [];
+  let failures = 0;
+  for (let i = 0; i < iterations; i++) {
+    const start = process.hrtime.bigint();
+    try {
+      await resolve(host);
+    } catch (error) {
+      failures++;
+    }
+    durations.push(Number(process.hrtime.bigint() - start) / 1e6);
+  }
+  durations.sort((a, b) => a - b);
+  return {
+    "p50 ms": +percentile(durations, 0.5).toFixed(2),
+    "p95 ms": +percentile(durations, 0.95).toFixed(2),
+    "p99 ms": +percentile(durations, 0.99).toFixed(2),
+    failures,
+  };
+};
+
+(async () => {
+  const rows = [];
+  for (const { name, host, resolve } of cases) {
+    rows.push({ host: name, ...(await measure(resolve, host)) });
+  }
+  console.table(rows);
+})();
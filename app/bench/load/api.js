@@ -0,0 +1,172 @@
+/**
+ * Load test of the hot routes, run by k6 (https://k6.io)
+ *
+ * Two scenarios run side by side:
+ * - `browse`: collection listings, collection items, item detail, activity and tokenUri
+ * - `buyNow`: the owner of a seeded item lists it for sale, the other wallet opens it and buys it (`/activity/transfer`)
+ *
+ * The items of the `buyNow` scenario are seeded by `npm run bench:seed`, each VU trades its own item between the two
+ * load-test wallets; when they aren't seeded, its VUs run `browse`. The thresholds come from `budgets.json`: the run fails (exit code 99) when the p95 latency of a
+ * route is above its budget or the throughput below `minRps`.
+ *
+ * BASE_URL=http://localhost:3001 JWT_SECRET=... k6 run app/bench/load/api.js
+ *
+ * Environment:
+ * - BASE_URL: server under test
+ * - JWT_SECRET: secret of the server, signs the sessions of the load-test wallets
+ * - LOAD_TEST_TOKEN: sent as `x-load-test`, exempts the requests from the rate limit of the server
+ * - VUS, BUY_VUS, DURATION: load shape
+ * - BUDGET_TOLERANCE: share added to the p95 budgets and removed from `minRps` (0.1 by default)
+ * - SUMMARY_FILE: where the p95 per route and the throughput of the run are written, in the format of `budgets.json`
+ */
+import http from "k6/http";
+import crypto from "k6/crypto";
+import encoding from "k6/encoding";
+import { check, fail, group, sleep } from "k6";
+import { textSummary } from "https://jslib.k6.io/k6-summary/0.0.2/index.js";
+
+const BASE_URL = (__ENV.BASE_URL || "http://localhost:3001").replace(/\/$/, "");
+const NFT_API = `${BASE_URL}/ws/v2/nft`;
+const COLLECTION_URL = __ENV.LOAD_TEST_COLLECTION || "load-test";
+const WALLETS = (__ENV.LOAD_TEST_WALLETS || "0x00000000000000000000000000000000000a11ce,0x0000000000000000000000000000000000000b0b")
+  .toLowerCase()
+  .split(",");
+const VUS = +__ENV.VUS || 20;
+const BUY_VUS = +__ENV.BUY_VUS || 5;
+const DURATION = __ENV.DURATION || "2m";
+const TOLERANCE = __ENV.BUDGET_TOLERANCE === undefined ? 0.1 : +__ENV.BUDGET_TOLERANCE;
+const SUMMARY_FILE = __ENV.SUMMARY_FILE || "load-test-summary.json";
+
+const budgets = JSON.parse(open("./budgets.json"));
+
+const thresholds = {
+  http_req_failed: ["rate<0.01"],
+  checks: ["rate>0.99"],
+  http_reqs: [`rate>=${budgets.minRps * (1 - TOLERANCE)}`],
+};
+for (const [route, p95] of Object.entries(budgets.p95)) {
+  thresholds[`http_req_duration{route:${route}}`] = [`p(95)<${Math.round(p95 * (1 + TOLERANCE))}`];
+}
+
+export const options = {
+  scenarios: {
+    browse: { executor: "constant-vus", exec: "browse", vus: VUS, duration: DURATION },
+    buyNow: { executor: "constant-vus", exec: "buyNow", vus: BUY_VUS, duration: DURATION },
+  },
+  thresholds,
+  summaryTrendStats: ["avg", "p(50)", "p(95)", "p(99)", "max"],
+};
+
+/**
+ * Session of a wallet, signed like the sessions of the server (HS256, wallet in `uid`)
+ */
+function session(wallet) {
+  if (!__ENV.JWT_SECRET) fail("JWT_SECRET is required to sign the sessions of the load-test wallets");
+  const header = encoding.b64encode(JSON.stringify({ alg: "HS256", typ: "JWT" }), "rawurl");
+  const payload = encoding.b64encode(JSON.stringify({ uid: wallet, iat: Math.floor(Date.now() / 1000) }), "rawurl");
+  const signature = crypto.hmac("sha256", __ENV.JWT_SECRET, `${header}.${payload}`, "base64rawurl");
+  return `${header}.${payload}.${signature}`;
+}
+
+function params(route, wallet) {
+  const headers = { "content-type": "application/json" };
+  if (__ENV.LOAD_TEST_TOKEN) headers["x-load-test"] = __ENV.LOAD_TEST_TOKEN;
+  if (wallet) headers.authorization = `Bearer ${session(wallet)}`;
+  // grouped by route, not by url
+  return { headers, tags: { route, name: route } };
+}
+
+function ok(res, route) {
+  return check(res, {
+    [`${route} 200`]: (r) => r.status === 200,
+    [`${route} success`]: (r) => r.json("success") !== false,
+  });
+}
+
+/**
+ * Looks up the seeded collection and its items, the browse scenario also walks the first page of listed collections.
+ * Without the seeded collection the test browses the first listed one and the buyNow VUs browse too.
+ */
+export function setup() {
+  const collections = http.get(`${NFT_API}/collection?cursor=0&amount=20`, params("collections"));
+  ok(collections, "collections") || fail(`${BASE_URL} doesn't serve the collection listing: ${collections.status}`);
+  const listed = (collections.json("data") || []).map((c) => c._id).filter(Boolean);
+  const seeded = http.get(`${NFT_API}/collection/url/${COLLECTION_URL}`, params("collectionByUrl")).json("data._id");
+  if (!seeded) console.warn(`collection "${COLLECTION_URL}" not found, BUY_NOW isn't tested; seed it with npm run bench:seed`);
+  const collectionId = seeded || listed[0];
+  if (!collectionId) fail(`${BASE_URL} lists no collection`);
+  const items = http.get(`${NFT_API}/collection/${collectionId}/items?cursor=0&amount=1000`, params("collectionItems"));
+  const indexes = (items.json("data.nfts") || []).map((item) => item.index).sort((a, b) => a - b);
+  if (!indexes.length) fail(`collection ${collectionId} has no item`);
+  // the VU number picks the item of a buyNow VU, it runs from 1 to VUS + BUY_VUS across the scenarios
+  if (seeded && indexes.length < VUS + BUY_VUS) fail(`${indexes.length} seeded items for ${VUS + BUY_VUS} VUs, seed more of them`);
+  return { collectionId, indexes, seeded: Boolean(seeded), collectionIds: listed.length ? listed : [collectionId] };
+}
+
+const pick = (values) => values[Math.floor(Math.random() * values.length)];
+
+export function browse(data) {
+  const wallet = pick(WALLETS);
+  const index = pick(data.indexes);
+  group("collections", () => {
+    ok(http.get(`${NFT_API}/collection?cursor=0&amount=20`, params("collections")), "collections");
+    ok(http.get(`${NFT_API}/collection/top`, params("collectionsTop")), "collectionsTop");
+    const collectionId = pick(data.collectionIds);
+    ok(http.get(`${NFT_API}/collection/${collectionId}`, params("collectionDetail")), "collectionDetail");
+    ok(http.get(`${NFT_API}/collection/${collectionId}/items?cursor=0&amount=20`, params("collectionItems")), "collectionItems");
+  });
+  group("items", () => {
+    ok(http.get(`${NFT_API}/items/${data.collectionId}/${index}`, params("itemDetail", wallet)), "itemDetail");
+    ok(http.get(`${NFT_API}/items?cursor=0&amount=20`, params("items", wallet)), "items");
+  });
+  group("activity", () => {
+    ok(http.get(`${NFT_API}/activity?cursor=0&amount=20`, params("activity", wallet)), "activity");
+    ok(http.get(`${NFT_API}/collection/${data.collectionId}/activity?cursor=0&amount=20`, params("collectionActivity", wallet)), "collectionActivity");
+  });
+  group("tokenUri", () => {
+    // redirected to the cdn with TOKEN_METADATA_REDIRECT, the cdn isn't part of the test
+    const res = http.get(`${BASE_URL}/nft/721/${index}`, { ...params("tokenUri"), redirects: 0 });
+    check(res, { "tokenUri 200": (r) => r.status === 200 || r.status === 302 });
+  });
+}
+
+/**
+ * BUY_NOW flow of the VU's item: listed by its owner, bought by the other wallet, so the roles swap every iteration
+ */
+export function buyNow(data) {
+  // keeps the load of the run, the throughput budget counts these VUs
+  if (!data.seeded) return browse(data);
+  const index = data.indexes[(__VU - 1) % data.indexes.length];
+  const detail = http.get(`${NFT_API}/items/${data.collectionId}/${index}`, params("itemDetail", WALLETS[0]));
+  if (!ok(detail, "itemDetail")) return;
+  const seller = `${detail.json("data.owner")}`.toLowerCase();
+  if (!WALLETS.includes(seller)) fail(`item ${index} isn't owned by a load-test wallet, re-run the seed`);
+  const buyer = WALLETS.find((wallet) => wallet !== seller);
+
+  if (detail.json("data.saleStatus") !== "For Sale") {
+    const now = Date.now();
+    const listing = { collectionId: data.collectionId, nftId: index, seller, price: 0.01, startDate: now, endDate: now + 86400000 };
+    ok(http.post(`${NFT_API}/activity/listForSale`, JSON.stringify(listing), params("listForSale", seller)), "listForSale");
+  }
+  ok(http.get(`${NFT_API}/items/${data.collectionId}/${index}/offers?cursor=0&amount=20`, params("itemOffers", buyer)), "itemOffers");
+  const purchase = { collectionId: data.collectionId, nftId: index, seller, buyer, price: 0.01 };
+  ok(http.post(`${NFT_API}/activity/transfer`, JSON.stringify(purchase), params("buyNow", buyer)), "buyNow");
+  sleep(1);
+}
+
+/**
+ * Prints the summary and writes the p95 per route and the throughput of the run, to update `budgets.json`
+ */
+export function handleSummary(data) {
+  const p95 = {};
+  for (const [name, metric] of Object.entries(data.metrics)) {
+    const route = name.match(/^http_req_duration\{route:(.+)\}$/);
+    if (route) p95[route[1]] = Math.round(metric.values["p(95)"]);
+  }
+  const result = { minRps: Math.floor(data.metrics.http_reqs.values.rate), p95 };
+  console.log(`load-test::${JSON.stringify(result)}`);
+  return {
+    stdout: textSummary(data, { indent: " ", enableColors: false }),
+    [SUMMARY_FILE]: JSON.stringify(result, null, 2),
+  };
+}
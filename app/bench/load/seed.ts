@@ -0,0 +1,102 @@
+/**
+ * Seeds the data of the load test (`app/bench/load/api.js`)
+ *
+ * Upserts the two load-test wallets, the `load-test` collection and its
+ * items, owned by the first wallet and not for sale. The items keep their
+ * current owner when the seed is run again, the `buyNow` scenario trades
+ * them between the two wallets.
+ *
+ * npm run bench:seed [-- <items>]
+ */
+import { ObjectId } from "mongodb";
+import { config } from "../../config/config";
+import { ModerationStatus } from "../../modules/interfaces/IModeration";
+import { ContentType, MintStatus, SaleStatus, TokenType } from "../../modules/interfaces/INFT";
+
+const COLLECTION_URL = process.env["LOAD_TEST_COLLECTION"] || "load-test";
+const WALLETS = (process.env["LOAD_TEST_WALLETS"] || "0x00000000000000000000000000000000000a11ce,0x0000000000000000000000000000000000000b0b")
+  .toLowerCase()
+  .split(",");
+// token ids of the seeded items, far above the ids of the marketplace contract
+const FIRST_INDEX = 900000000;
+const count = +process.argv[2] || 200;
+
+async function seed() {
+  const db = config.mongodb.instance;
+  for (const wallet of WALLETS) {
+    await db
+      .collection("Person")
+      .updateOne({ wallet }, { $setOnInsert: { wallet, photoUrl: "", username: `load-test-${wallet.slice(-4)}`, nonce: 0 } }, { upsert: true });
+  }
+  await db.collection("NFTCollection").updateOne(
+    { url: COLLECTION_URL },
+    {
+      $setOnInsert: {
+        _id: new ObjectId(),
+        url: COLLECTION_URL,
+        name: "Load test",
+        creator: WALLETS[0],
+        contract: "0x00000000000000000000000000000000000010ad",
+        description: "Items traded by the load test",
+        links: [],
+        creatorEarning: 0,
+        blockchain: "ETH",
+        isVerified: false,
+        isExplicit: false,
+        moderationStatus: ModerationStatus.APPROVED,
+        platform: "ARC",
+        properties: {},
+        offerStatus: "NONE",
+        volume: 0,
+      },
+    },
+    { upsert: true }
+  );
+  const collection = await db.collection("NFTCollection").findOne({ url: COLLECTION_URL });
+  const operations = Array.from({ length: count }, (_, i) => {
+    const index = FIRST_INDEX + i;
+    return {
+      updateOne: {
+        filter: { collection: `${collection._id}`, index },
+        update: {
+          $setOnInsert: {
+            collection: `${collection._id}`,
+            index,
+            owner: WALLETS[0],
+            owners: [WALLETS[0]],
+            creator: WALLETS[0],
+            artURI: `${config.aws.cdn_url}/item/load-test.png`,
+            name: `Load test #${i}`,
+            price: 0,
+            description: "Item traded by the load test",
+            properties: [],
+            isExplicit: false,
+            moderationStatus: ModerationStatus.APPROVED,
+            royalties: 0,
+            saleStatus: SaleStatus.NOTFORSALE,
+            mintStatus: MintStatus.MINTED,
+            status_date: Date.now(),
+            tokenType: TokenType.ERC721,
+            contentType: ContentType.IMAGE,
+            fee: 0,
+          },
+        },
+        upsert: true,
+      },
+    };
+  });
+  await db.collection("NFT").bulkWrite(operations, { ordered: false });
+  return collection._id;
+}
+
+config.mongodb
+  .createInstance()
+  .then(() => seed())
+  .then((collectionId) => {
+    console.log(`load-test-seed::${count} items in collection ${collectionId} (${COLLECTION_URL})`);
+    process.exit(0);
+  })
+  .catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
@@ -0,0 +1,124 @@
+/**
+ * Serialization throughput of the listing payloads
+ *
+ * Compares the generic `JSON.stringify` with the serializer Fastify compiles
+ * from the response schemas of `app/modules/schemas`, on pages of 100 items,
+ * collections and activities shaped like the listings.
+ *
+ * npm run bench:serialization [-- <iterations>]
+ */
+import fastJson from "fast-json-stringify";
+import { ObjectId } from "mongodb";
+import { activityListResponse, collectionListResponse, nftListResponse } from "../modules/schemas";
+
+const PAGE = 100;
+const iterations = +process.argv[2] || 2000;
+
+const nft = (index: number) => ({
+  _id: new ObjectId(),
+  collection: `${new ObjectId()}`,
+  index,
+  owner: "0x9451b75ad222d6d808c925598cb9decee4f26224",
+  owners: ["0x9451b75ad222d6d808c925598cb9decee4f26224"],
+  creator: "0x9451b75ad222d6d808c925598cb9decee4f26224",
+  artURI: `https://d1ymw6k8ugpy6v.cloudfront.net/item/${1650000000000 + index}.png`,
+  name: `Depo Genesis #${index}`,
+  price: 0.25 + index / 100,
+  externalLink: "",
+  description: "One of the first items minted on the ARC marketplace, with a fairly long description.",
+  properties: [{ title: "Background", name: "Blue" }, { title: "Eyes", name: "Laser" }],
+  lockContent: "locked content",
+  isExplicit: false,
+  saleStatus: "For Sale",
+  mintStatus: "Lazy Minted",
+  status_date: 1650000000000 + index,
+  tokenType: "ERC721",
+  contentType: "Image",
+  timeLeft: "2d",
+  fee: 2.5,
+  collection_details: { _id: new ObjectId(), contract: "0xbb6a549b1cf4b2d033df831f72df8d7af4412a82", name: "Depo Genesis" },
+  offer_lists: [],
+});
+
+const collection = (index: number) => ({
+  _id: new ObjectId(),
+  logoUrl: `https://d1ymw6k8ugpy6v.cloudfront.net/collection/${index}-logo.png`,
+  featuredUrl: `https://d1ymw6k8ugpy6v.cloudfront.net/collection/${index}-featured.png`,
+  bannerUrl: `https://d1ymw6k8ugpy6v.cloudfront.net/collection/${index}-banner.png`,
+  contract: "0xbb6a549b1cf4b2d033df831f72df8d7af4412a82",
+  creator: "0x9451b75ad222d6d808c925598cb9decee4f26224",
+  creatorDetail: { wallet: "0x9451b75ad222d6d808c925598cb9decee4f26224", username: "depo" },
+  url: `depo-genesis-${index}`,
+  description: "Collection of the genesis items of the ARC marketplace.",
+  category: "Art",
+  links: ["https://depo.io", "", "", "", "", ""],
+  name: `Depo Genesis ${index}`,
+  blockchain: "ERC721",
+  volume: 1000 - index,
+  _24h: 12.5,
+  _24hPercent: 3.2,
+  floorPrice: 0.25,
+  owners: 120,
+  items: 1000,
+  isVerified: true,
+  isExplicit: false,
+  properties: { Background: ["Blue", "Red"], Eyes: ["Laser"] },
+  platform: "ARC",
+  offerStatus: "NONE",
+});
+
+const activity = (index: number) => ({
+  _id: new ObjectId(),
+  collection: `${new ObjectId()}`,
+  nftId: index,
+  type: "Sale",
+  price: 0.5,
+  from: "0x9451b75ad222d6d808c925598cb9decee4f26224",
+  to: "0x4a5142af545693dc7ab66bcdc07c8e02cd58841f",
+  date: 1650000000000 + index,
+  startDate: 1650000000000 + index,
+  endDate: 1650086400000 + index,
+  fee: 2.5,
+  netPrice: 0.4875,
+  active: false,
+  nft: { artURI: `https://d1ymw6k8ugpy6v.cloudfront.net/item/${index}.png`, name: `Depo Genesis #${index}` },
+});
+
+const page = (build: (index: number) => Object) => ({
+  success: true,
+  status: "ok",
+  code: 200,
+  count: 10000,
+  currentPage: 1,
+  data: Array.from({ length: PAGE }, (_, index) => build(index)),
+});
+
+const measure = (serialize: (payload: any) => string, payload: any) => {
+  for (let i = 0; i < iterations / 10; i++) serialize(payload); // warm up
+  const start = process.hrtime.bigint();
+  let bytes = 0;
+  for (let i = 0; i < iterations; i++) bytes += serialize(payload).length;
+  const seconds = Number(process.hrtime.bigint() - start) / 1e9;
+  return { opsPerSecond: Math.round(iterations / seconds), mbPerSecond: +(bytes / seconds / 1e6).toFixed(1) };
+};
+
+const cases = [
+  { name: "items", schema: nftListResponse, payload: page(nft) },
+  { name: "collections", schema: collectionListResponse, payload: page(collection) },
+  { name: "activities", schema: activityListResponse, payload: page(activity) },
+];
+
+const rows = cases.map(({ name, schema, payload }) => {
+  const compiled = fastJson(schema[200]);
+  const generic = measure(JSON.stringify, payload);
+  const schemaBased = measure(compiled, payload);
+  return {
+    listing: `${name} (${PAGE})`,
+    "JSON.stringify ops/s": generic.opsPerSecond,
+    "schema ops/s": schemaBased.opsPerSecond,
+    "schema MB/s": schemaBased.mbPerSecond,
+    speedup: +(schemaBased.opsPerSecond / generic.opsPerSecond).toFixed(2),
+  };
+});
+
+console.table(rows);
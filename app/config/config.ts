@@ -14,6 +14,48 @@ const config = {
   env_db: process.env.ENV_DB || "localdb",
   logging: true,
   logLevel: process.env.LOG_LEVEL || ("error-only" as "error-only" | "action-only" | "any"),
+  logShipping: {
+    interval: +process.env["LOG_FLUSH_INTERVAL"] || 2000,
+    batchSize: +process.env["LOG_BATCH_SIZE"] || 200,
+  },
+  collectionStats: {
+    // full rebuild of the precomputed collection stats
+    rebuildCron: process.env["COLLECTION_STATS_CRON"] || "*/15 * * * *",
+    // run by one process of all the pods, the lease expires before the next tick
+    leaseSeconds: +process.env["COLLECTION_STATS_LEASE"] || 600,
+  },
+  searchIndex: {
+    // catches the tags and documents changed outside of the API
+    reindexCron: process.env["SEARCH_INDEX_CRON"] || "0 * * * *",
+    leaseSeconds: +process.env["SEARCH_INDEX_LEASE"] || 3000,
+  },
+  outbound: {
+    // keep-alive sockets per host, shared by the upstreams
+    maxSockets: +process.env["OUTBOUND_MAX_SOCKETS"] || 50,
+    maxFreeSockets: +process.env["OUTBOUND_MAX_FREE_SOCKETS"] || 10,
+    defaults: {
+      timeout: +process.env["OUTBOUND_TIMEOUT"] || 10000,
+      maxConcurrent: +process.env["OUTBOUND_MAX_CONCURRENT"] || 20,
+      maxQueued: +process.env["OUTBOUND_MAX_QUEUED"] || 100,
+      failureThreshold: +process.env["OUTBOUND_FAILURE_THRESHOLD"] || 5,
+      resetTimeout: +process.env["OUTBOUND_RESET_TIMEOUT"] || 30000,
+    },
+    // per upstream overrides, `ccxt` applying to every `ccxt.<exchange>`
+    upstreams: {
+      recaptcha: { timeout: 5000 },
+      opensea: { maxConcurrent: 4 },
+      uniswap: { maxConcurrent: 10 },
+      moralis: { timeout: 30000, maxConcurrent: 10 },
+      ccxt: { maxConcurrent: 10 },
+    } as { [upstream: string]: Partial<{ timeout: number; maxConcurrent: number; maxQueued: number; failureThreshold: number; resetTimeout: number }> },
+  },
+  queryCache: {
+    enabled: process.env["QUERY_CACHE"] !== "off",
+    // entries kept per table
+    maxEntries: +process.env["QUERY_CACHE_MAX_ENTRIES"] || 500,
+    // seconds, bounds the staleness of the reads of the other pods
+    ttl: +process.env["QUERY_CACHE_TTL"] || 10,
+  },
   mongodb: {
     host: process.env["MONGODB_HOST"],
     database: process.env["MONGODB_SCHEMA"],
@@ -41,6 +83,23 @@ const config = {
   },
   server: {
     port: process.env["SERVER_PORT"],
+    // node processes serving the port, the primary forks them when above 1
+    workers: Math.max(+process.env["WEB_CONCURRENCY"] || 1, 1),
+    // port of the metrics of all the workers, served by the primary
+    metricsPort: +process.env["METRICS_PORT"] || 9091,
+  },
+  realtime: {
+    // Socket.io server of the websocket pods, apart from the REST server
+    port: +process.env["WEBSOCKET_PORT"] || 3002,
+    path: "/socket.io",
+    // pub/sub sharing the rooms of the websocket pods, the REST processes publish to it
+    redisUrl: process.env["REDIS_URL"],
+  },
+  rateLimit: {
+    // requests per minute of a client, shared by the workers of the pod
+    max: +process.env["RATE_LIMIT_MAX"] || 200,
+    // sent as `x-load-test` by the load tests (app/bench/load), exempts them from the limit
+    bypassToken: process.env["LOAD_TEST_TOKEN"],
   },
   jwt: {
     secret: process.env["JWT_SECRET"],
@@ -128,6 +187,34 @@ const config = {
     s3_user_bucket: process.env["AWS_S3_USER_BUCKET"],
     s3_key: process.env["AWS_S3_KEY"],
     s3_secret: process.env["AWS_S3_SECRET"],
+    // public url of the user bucket
+    cdn_url: process.env["AWS_CDN_URL"] || "https://d1ymw6k8ugpy6v.cloudfront.net",
+  },
+  tokenMetadata: {
+    // static token metadata, `<baseUrl>/<721|1155>/<token id>.json`
+    baseUrl: process.env["TOKEN_METADATA_BASE_URL"] || `${process.env["AWS_CDN_URL"] || "https://d1ymw6k8ugpy6v.cloudfront.net"}/metadata`,
+    // the tokenURI route redirects to the static metadata once backfilled
+    redirect: process.env["TOKEN_METADATA_REDIRECT"] === "true",
+    cacheControl: process.env["TOKEN_METADATA_CACHE_CONTROL"] || "public, max-age=300",
+  },
+  profiling: {
+    bucket: process.env["PROFILE_BUCKET"],
+    region: process.env["PROFILE_BUCKET_REGION"],
+    maxSeconds: +process.env["PROFILE_MAX_SECONDS"] || 60,
+    // wallets allowed to trigger a capture, comma separated
+    adminWallets: (process.env["ADMIN_WALLETS"] || "")
+      .split(",")
+      .map((wallet) => wallet.trim().toLowerCase())
+      .filter(Boolean),
+  },
+  moderation: {
+    // upload event queue, moderated in process from memory when unset
+    queueUrl: process.env["MODERATION_QUEUE_URL"],
+    // region of the queue and of the Rekognition client, the one of the pod
+    region: process.env["AWS_REGION"] || "us-east-1",
+    bucketRegion: process.env["AWS_S3_USER_BUCKET_REGION"] || "us-east-1",
+    batchSize: +process.env["MODERATION_BATCH_SIZE"] || 10,
+    minConfidence: +process.env["MODERATION_MIN_CONFIDENCE"] || 10,
   },
   moralis:{
     server_url:process.env["MORALIS_URL"],
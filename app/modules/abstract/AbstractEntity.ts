@@ -6,11 +6,13 @@ import {
     FilterQuery,
     FindOneOptions,
     MongoCallback,
+    ObjectId,
   } from "mongodb";
   import { respond } from "../util/respond";
   import { IResponse } from "../interfaces/IResponse";
   import { IQueryFilters } from "../interfaces/Query";
   import { config } from "../../config/config";
+  import queryCache, { cacheKey } from "../services/QueryCache";
   
   /**
    * This is the AbstractEntity class.
@@ -21,7 +23,11 @@ import {
    * @method create
    * @method findAll
    * @method findOne
+   * @method cached
+   * @method invalidate
    * @method parseFilters
+   * @method paginate
+   * @method nextCursor
    * @method convertDate
    * @method disconnect
    * @method getData
@@ -52,6 +58,8 @@ import {
    *
    * ```
    *
+   * Reads are cached in memory when `cacheTtl` is set (seconds), see `cached`.
+   *
    * @author Pollum <pollum.io>
    * @since v0.1.0
    */
@@ -59,6 +67,8 @@ import {
     protected data: any;
     protected table: string;
     protected mongodb = null as Db;
+    // seconds the reads of `findOne` and `cached` are kept, 0 disables the cache
+    protected cacheTtl: number = 0;
   
     constructor() {
       if (config.mongodb.instance) this.mongodb = config.mongodb.instance;
@@ -93,6 +103,7 @@ import {
               // If it isn't, convert this.data to array
               result = await this.createMany(collection, [this.data]);
             }
+            this.invalidate();
             return result;
           } else {
             throw new Error("Could not connect to the database.");
@@ -143,7 +154,9 @@ import {
             ...opts,
           };
   
-          const hasUser = await collection.findOne(query, options);
+          const hasUser = await this.cached(cacheKey("findOne", query, options), () =>
+            collection.findOne(query, options)
+          );
           if (hasUser) {
             return hasUser;
           } else {
@@ -158,6 +171,28 @@ import {
       }
     }
   
+    /**
+     * Returns the cached result of a read, or runs and caches it when `cacheTtl` is set.
+     * The cache is per pod, the writes made through the entities invalidate it
+     * and `cacheTtl` bounds the staleness of the other pods.
+     * @param key key of the read, see `cacheKey`
+     * @param load the read
+     * @param table table read, the key is scoped to it
+     * @returns a copy of the result
+     */
+    protected cached<T>(key: string, load: () => Promise<T>, table: string = this.table): Promise<T> {
+      if (!this.cacheTtl || !config.queryCache.enabled) return load();
+      return queryCache.wrap(table, key, this.cacheTtl, load);
+    }
+
+    /**
+     * Drops the cached reads of the tables, the entity table by default
+     * @param tables
+     */
+    protected invalidate(...tables: Array<string>) {
+      queryCache.invalidate(...(tables.length ? tables : [this.table]));
+    }
+
     /**
      * Get all documents in the database
      * @param {IQueryFilters} filters query filters
@@ -462,6 +497,83 @@ import {
 
 
   
+    /**
+     * Restricts the query to the documents following the `after` cursor (keyset pagination).
+     *
+     * The sort always ends with `_id` so the position of a document is unique,
+     * and a page is read from the sort index instead of skipping the previous ones.
+     * Without a valid cursor for this sort, the query is left as is and the
+     * offset (`skip`) paging applies.
+     * @param query the listing query
+     * @param aggregation the parsed filters, its sort is completed
+     * @param after cursor returned as `nextCursor` by the previous page
+     * @returns the query of the page
+     */
+    protected paginate(query: Object, aggregation: any, after?: string): Object {
+      if (!aggregation.sort || !Object.keys(aggregation.sort).length) aggregation.sort = { _id: 1 };
+      if (!("_id" in aggregation.sort)) {
+        const directions = Object.values(aggregation.sort);
+        aggregation.sort._id = directions[directions.length - 1];
+      }
+      const values = after ? this.decodeCursor(`${after}`, aggregation.sort) : null;
+      if (!values) return query;
+      aggregation.skip = 0;
+
+      const keys = Object.keys(aggregation.sort);
+      const branches = [];
+      keys.forEach((key, index) => {
+        const equals = {};
+        keys.slice(0, index).forEach((previous, i) => (equals[previous] = values[i]));
+        const value = values[index];
+        if (value === null) {
+          // nulls sort first: only non null values follow them ascending, none descending
+          if (aggregation.sort[key] === 1) branches.push({ ...equals, [key]: { $ne: null } });
+        } else {
+          branches.push({ ...equals, [key]: { [aggregation.sort[key] === 1 ? "$gt" : "$lt"]: value } });
+        }
+      });
+      return { $and: [query, { $or: branches }] };
+    }
+
+    /**
+     * Continuation token of a full page, built from the sort keys of its last document
+     * @param rows documents of the page, before any transformation
+     * @param aggregation the parsed filters completed by `paginate`
+     * @returns the token or null on the last page
+     */
+    protected nextCursor(rows: Array<any>, aggregation: any): string {
+      if (!rows || !rows.length || rows.length < aggregation.limit || !aggregation.sort) return null;
+      const last = rows[rows.length - 1];
+      const values = Object.keys(aggregation.sort).map((key) => {
+        const value = key.split(".").reduce((doc, field) => (doc == null ? doc : doc[field]), last);
+        if (value instanceof ObjectId) return { $oid: value.toHexString() };
+        if (value instanceof Date) return { $date: value.toISOString() };
+        return value === undefined ? null : value;
+      });
+      const token = { s: this.sortSignature(aggregation.sort), v: values };
+      return Buffer.from(JSON.stringify(token)).toString("base64url");
+    }
+
+    private decodeCursor(after: string, sort: Object): Array<any> {
+      try {
+        const token = JSON.parse(Buffer.from(after, "base64url").toString());
+        if (token.s !== this.sortSignature(sort) || !Array.isArray(token.v)) return null;
+        return token.v.map((value) => {
+          if (value && value.$oid) return new ObjectId(value.$oid);
+          if (value && value.$date) return new Date(value.$date);
+          return value;
+        });
+      } catch (error) {
+        return null;
+      }
+    }
+
+    private sortSignature(sort: Object): string {
+      return Object.keys(sort)
+        .map((key) => `${key}:${sort[key]}`)
+        .join(",");
+    }
+
     /**
      * Returns the contents of `{CurrentController}::data`
      * @returns 
@@ -1,5 +1,6 @@
 import { ObjectId } from "mongodb";
 import { AbstractEntity } from "../abstract/AbstractEntity";
+import { CollectionStatsController } from "./CollectionStatsController";
 import { ActivityType, IActivity } from "../interfaces/IActivity";
 import { INFT, MintStatus, SaleStatus } from "../interfaces/INFT";
 import { INFTBatch } from "../interfaces/INFTBatch";
@@ -8,6 +9,7 @@ import { IPerson } from "../interfaces/IPerson";
 import { IResponse } from "../interfaces/IResponse";
 import { IQueryFilters } from "../interfaces/Query";
 import { mailHelper } from "../util/email-helper";
+import { emit } from "../services/Socket.io";
 import { respond } from "../util/respond";
 export class ActivityController extends AbstractEntity {
   protected data: IActivity;
@@ -29,30 +31,25 @@ export class ActivityController extends AbstractEntity {
         aggregation = this.parseFiltersFind(filters);
         let result = [] as any;
         let count;
+        let query;
         // const result = await table.aggregate(aggregation).toArray();
         if (aggregation && aggregation.filter) {
           aggregation.filter.push({from:loginUser})
           aggregation.filter.push({to:loginUser})
-          count = await table.find({ $or: aggregation.filter }).count();
-          result = aggregation.sort
-            ? ((await table
-                .find({ $or: aggregation.filter })
-                .sort(aggregation.sort)
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>)
-            : ((await table
-                .find({ $or: aggregation.filter })
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
+          query = { $or: aggregation.filter };
+          count = await table.find(query).count();
         } else {
+          query = {};
           count = await table.find({$or:[{from:loginUser},{to:loginUser}]}).count();
-          result = aggregation.sort
-            ? await table.find({}).sort(aggregation.sort).skip(aggregation.skip).limit(aggregation.limit).toArray()
-            : ((await table.find({}).skip(aggregation.skip).limit(aggregation.limit).toArray()) as Array<INFT>);
         }
+        result = (await table
+          .find(this.paginate(query, aggregation, filters?.after))
+          .sort(aggregation.sort)
+          .skip(aggregation.skip)
+          .limit(aggregation.limit)
+          .toArray()) as Array<INFT>;
         if (result) {
+          const nextCursor = this.nextCursor(result, aggregation);
           const activities = await Promise.all(
             result.map(async (activity) => {
               const nft = (await nftTable.findOne({
@@ -64,7 +61,9 @@ export class ActivityController extends AbstractEntity {
               return activity;
             })
           );
-          return respond(activities);
+          const response = respond(activities);
+          response.nextCursor = nextCursor;
+          return response;
         }
         return respond("activity not found.", true, 422);
       } else {
@@ -159,6 +158,7 @@ export class ActivityController extends AbstractEntity {
           const result = await activityTable.insertOne(transfer);
           /** SEND EMAIL */
           await this.get24HValues(collectionId);
+          await new CollectionStatsController().refresh(collectionId);
           const ownerData = (await personTable.findOne({ wallet: seller.toLowerCase() })) as IPerson;
           if (ownerData && ownerData.email) {
             const email = new mailHelper();
@@ -314,6 +314,7 @@ export class ActivityController extends AbstractEntity {
               { $set: { active: false } }
             );
             const result =saleActivity;
+            await new CollectionStatsController().refresh(collectionId);
             const email = new mailHelper();
             email.AcceptOfferEmail(saleActivity);
             return result
@@ -371,6 +372,7 @@ export class ActivityController extends AbstractEntity {
             });
 
             await this.get24HValues(offer.collection);
+            await new CollectionStatsController().refresh(offer.collection);
             return result
               ? respond(`Successfully created a new sold with id ${activityId}`)
               : respond("Failed to create a new activity.", true, 501);
@@ -700,6 +702,7 @@ export class ActivityController extends AbstractEntity {
             batchId:batchId
           };
           const result = await activityTable.insertOne(offer);
+          await new CollectionStatsController().refresh(collectionId);
           if (result) {
             const findData = await activityTable.findOne({
               _id: new ObjectId(`${result.insertedId}`),
@@ -766,6 +769,7 @@ export class ActivityController extends AbstractEntity {
             from: activity.from?.toLowerCase(),
             fee: activity.fee,
           });
+          await new CollectionStatsController().refresh(collectionId);
           return result ? respond("List for sale canceled") : respond("Failed to create a new activity.", true, 501);
         }
         return respond("nft not found.", true, 422);
@@ -1012,7 +1016,8 @@ export class ActivityController extends AbstractEntity {
           })
           if (!actData){
             
-            await this.transfer(nftData.collection,nftData.index,from.toLowerCase(),to.toLowerCase(),price,null,true)
+            const result = await this.transfer(nftData.collection,nftData.index,from.toLowerCase(),to.toLowerCase(),price,null,true)
+            if (result?.success) this.emitSale(type, nftData, from, to, price);
           } 
         }
         if ( nftData &&  type=='APPROVE_OFFER'){
@@ -1032,7 +1037,8 @@ export class ActivityController extends AbstractEntity {
             })
 
             if (actDataCheck){
-              await this.approveOffer(nftData.collection,nftData.index,to.toLowerCase(),from.toLowerCase(),actDataCheck._id.toString(), null,true)
+              const result = await this.approveOffer(nftData.collection,nftData.index,to.toLowerCase(),from.toLowerCase(),actDataCheck._id.toString(), null,true)
+              if (result?.success) this.emitSale(type, nftData, from, to, price);
             }
           }
         }
@@ -1041,6 +1047,12 @@ export class ActivityController extends AbstractEntity {
       return respond(error.message, true, 500);
     }
   }
+  /**
+   * Pushes a sale recorded from the contract events to the websocket clients subscribed to the activities
+   */
+  private emitSale(type: string, nft: INFT, from: string, to: string, price: number) {
+    emit("activity", { type, collection: nft.collection, nftId: nft.index, from: from.toLowerCase(), to: to.toLowerCase(), price }, "activity");
+  }
   private findActivtyWithId(activtyId: string): Object {
     return {
       _id: new ObjectId(activtyId),
@@ -0,0 +1,149 @@
+import { ObjectId } from "mongodb";
+import { AbstractEntity } from "../abstract/AbstractEntity";
+import { ActivityType } from "../interfaces/IActivity";
+import { ICollectionStats } from "../interfaces/ICollectionStats";
+
+/**
+ * This is the CollectionStats controller class.
+ * Keeps the precomputed item count, owner count and floor price
+ * of every collection, so the collection listings read them with
+ * a single lookup instead of three queries per collection.
+ *
+ * The stats of a collection are refreshed whenever an activity changes
+ * them (transfer, sale, list, cancel list, mint) and rebuilt for every
+ * collection by a periodic job, which fixes any missed update; the job
+ * runs in a single process of all the pods (see `JobLeaseController`).
+ * A refresh follows every write of the items and activities, so it also
+ * drops the cached reads of those tables.
+ *
+ * @property {table}
+ * @property {nftTable}
+ * @property {activityTable}
+ * @property {collectionTable}
+ *
+ * @method refresh
+ * @method ensureBuilt
+ * @method rebuildAll
+ *
+ * ----
+ * Example Usage
+ *
+ * const stats = new CollectionStatsController();
+ *
+ * await stats.refresh('62a0f6f3c2d6e4a3b8f1c0de')
+ *
+ */
+export class CollectionStatsController extends AbstractEntity {
+  protected table: string = "NFTCollectionStats";
+  protected nftTable: string = "NFT";
+  protected activityTable: string = "Activity";
+  protected collectionTable: string = "NFTCollection";
+
+  constructor() {
+    super();
+  }
+
+  /**
+   * Recomputes the stats of one collection.
+   * Never throws, a failed refresh is fixed by the next rebuild.
+   * @param collectionId collection id
+   * @returns the new stats, null when the refresh failed
+   */
+  async refresh(collectionId: string): Promise<ICollectionStats> {
+    try {
+      if (!ObjectId.isValid(collectionId)) return null;
+      this.invalidate(this.nftTable, this.activityTable, this.collectionTable);
+      const nftTable = this.mongodb.collection(this.nftTable);
+      const activityTable = this.mongodb.collection(this.activityTable);
+
+      const [items, owners, floor] = await Promise.all([
+        nftTable.find({ collection: `${collectionId}` }, { projection: { _id: 1 } }).count(),
+        nftTable
+          .aggregate([{ $match: { collection: `${collectionId}` } }, { $group: { _id: "$owner" } }, { $count: "count" }])
+          .toArray(),
+        activityTable
+          .find(
+            { collection: `${collectionId}`, price: { $ne: null }, active: true, type: ActivityType.LIST },
+            { projection: { price: 1 } }
+          )
+          .sort({ price: 1 })
+          .limit(1)
+          .toArray(),
+      ]);
+
+      const stats: ICollectionStats = {
+        _id: new ObjectId(collectionId),
+        collection: `${collectionId}`,
+        items,
+        owners: owners.length > 0 ? owners[0].count : 0,
+        floorPrice: floor.length > 0 ? floor[0].price : 0,
+        updatedAt: new Date().getTime(),
+      };
+      await this.mongodb.collection(this.table).replaceOne({ _id: stats._id }, stats, { upsert: true });
+      return stats;
+    } catch (error) {
+      console.log(`CollectionStatsController::refresh::${collectionId}`, error);
+      return null;
+    }
+  }
+
+  /**
+   * Builds the stats when the store is still empty (first deployment)
+   * @returns number of collections written
+   */
+  async ensureBuilt(): Promise<number> {
+    const stored = await this.mongodb.collection(this.table).estimatedDocumentCount();
+    return stored > 0 ? 0 : this.rebuildAll();
+  }
+
+  /**
+   * Recomputes the stats of every collection with one aggregation
+   * per source table and writes them in a single bulk.
+   * @returns number of collections written
+   */
+  async rebuildAll(): Promise<number> {
+    const nftTable = this.mongodb.collection(this.nftTable);
+    const activityTable = this.mongodb.collection(this.activityTable);
+    const collectionTable = this.mongodb.collection(this.collectionTable);
+
+    const [collections, counts, floors] = await Promise.all([
+      collectionTable.find({}, { projection: { _id: 1 } }).toArray(),
+      // counted per owner first, so no group holds the owners of a whole collection
+      nftTable
+        .aggregate(
+          [
+            { $group: { _id: { collection: "$collection", owner: "$owner" }, items: { $sum: 1 } } },
+            { $group: { _id: "$_id.collection", items: { $sum: "$items" }, owners: { $sum: 1 } } },
+          ],
+          { allowDiskUse: true }
+        )
+        .toArray(),
+      activityTable
+        .aggregate([
+          { $match: { price: { $ne: null }, active: true, type: ActivityType.LIST } },
+          { $group: { _id: "$collection", floorPrice: { $min: "$price" } } },
+        ])
+        .toArray(),
+    ]);
+
+    const countMap = new Map(counts.map((count) => [`${count._id}`, count]));
+    const floorMap = new Map(floors.map((floor) => [`${floor._id}`, floor.floorPrice]));
+    const updatedAt = new Date().getTime();
+    const operations = collections.map((collection) => {
+      const id = `${collection._id}`;
+      const stats: ICollectionStats = {
+        _id: collection._id,
+        collection: id,
+        items: countMap.get(id)?.items ?? 0,
+        owners: countMap.get(id)?.owners ?? 0,
+        floorPrice: floorMap.get(id) ?? 0,
+        updatedAt,
+      };
+      return { replaceOne: { filter: { _id: collection._id }, replacement: stats, upsert: true } };
+    });
+    if (operations.length) {
+      await this.mongodb.collection(this.table).bulkWrite(operations, { ordered: false });
+    }
+    return operations.length;
+  }
+}
@@ -0,0 +1,56 @@
+import { hostname } from "os";
+import { AbstractEntity } from "../abstract/AbstractEntity";
+
+// error of the insert of an upsert whose filter matched nothing while the document exists
+const DUPLICATE_KEY = 11000;
+
+/**
+ * This is the JobLease controller class.
+ * Runs the periodic jobs of the API once for all the pods: every process
+ * ticks at the same minute, the first one taking the lease of the job runs
+ * it and the others skip their tick.
+ *
+ * A lease is a document per job holding its expiry, it isn't released when
+ * the job ends so the processes ticking a few seconds later skip too; it
+ * must expire before the next tick of the job.
+ *
+ * @property {table}
+ *
+ * @method acquire
+ *
+ * ----
+ * Example Usage
+ *
+ * const leases = new JobLeaseController();
+ *
+ * if (await leases.acquire("collection-stats", 600)) await rebuild();
+ *
+ */
+export class JobLeaseController extends AbstractEntity {
+  protected table: string = "JobLease";
+
+  constructor() {
+    super();
+  }
+
+  /**
+   * Takes the lease of a job when it is free or expired
+   * @param job name of the job
+   * @param seconds duration of the lease
+   * @returns true when the lease was taken by this process
+   */
+  async acquire(job: string, seconds: number): Promise<boolean> {
+    const now = new Date().getTime();
+    try {
+      await this.mongodb.collection(this.table).findOneAndUpdate(
+        { _id: job, expiresAt: { $lte: now } },
+        { $set: { holder: `${hostname()}:${process.pid}`, acquiredAt: now, expiresAt: now + seconds * 1000 } },
+        { upsert: true }
+      );
+      return true;
+    } catch (error) {
+      if (error.code === DUPLICATE_KEY) return false;
+      throw error;
+    }
+  }
+}
@@ -0,0 +1,63 @@
+import { ObjectId } from "mongodb";
+import { AbstractEntity } from "../abstract/AbstractEntity";
+import { IModerationJob, ModerationStatus, ModerationTarget } from "../interfaces/IModeration";
+import moderationQueue from "../services/ModerationQueue";
+
+/**
+ * This is the Moderation controller class.
+ * Uploads are accepted in the `PENDING` moderation state and queued,
+ * the moderation worker stores the outcome on the nft or collection.
+ *
+ * @method submit
+ * @method applyResult
+ *
+ * ----
+ * Example Usage
+ *
+ * const moderation = new ModerationController();
+ *
+ * await moderation.submit(ModerationTarget.NFT, nft._id, [artIpfs.key])
+ *
+ */
+export class ModerationController extends AbstractEntity {
+  constructor() {
+    super();
+  }
+
+  /**
+   * Queues the uploaded media of a document for moderation.
+   * Never throws, the document stays `PENDING` when the queue is unreachable.
+   * @param target table of the document
+   * @param id document id
+   * @param keys keys of the uploaded media, empty keys are ignored
+   */
+  async submit(target: ModerationTarget, id: string, keys: Array<string>): Promise<void> {
+    const job: IModerationJob = { target, id: `${id}`, keys: keys.filter(Boolean) };
+    if (!job.keys.length) return;
+    try {
+      await moderationQueue.publish(job);
+    } catch (error) {
+      console.log(`ModerationController::submit::${target}::${id}`, error);
+    }
+  }
+
+  /**
+   * Stores the moderation outcome of a job, a flagged media marks the document explicit
+   * @param job moderated job
+   * @param labels per key, true when moderation labels were found, null when the media was skipped
+   * @returns the new moderation status
+   */
+  async applyResult(job: IModerationJob, labels: Array<boolean | null>): Promise<ModerationStatus> {
+    const status = labels.includes(true)
+      ? ModerationStatus.FLAGGED
+      : labels.includes(false)
+      ? ModerationStatus.APPROVED
+      : ModerationStatus.SKIPPED;
+    if (!ObjectId.isValid(job.id)) return status;
+    const update =
+      status === ModerationStatus.FLAGGED ? { moderationStatus: status, isExplicit: true } : { moderationStatus: status };
+    await this.mongodb.collection(`${job.target}`).updateOne({ _id: new ObjectId(job.id) }, { $set: update });
+    this.invalidate(`${job.target}`);
+    return status;
+  }
+}
@@ -3,15 +3,26 @@ import { AbstractEntity } from "../abstract/AbstractEntity";
 import { ActivityType, IActivity } from "../interfaces/IActivity";
 import { INFT } from "../interfaces/INFT";
 import { INFTCollection, OfferStatusType } from "../interfaces/INFTCollection";
+import { ModerationStatus, ModerationTarget } from "../interfaces/IModeration";
 import { IPerson } from "../interfaces/IPerson";
 import { IResponse } from "../interfaces/IResponse";
 import { IQueryFilters } from "../interfaces/Query";
 import { respond } from "../util/respond";
 import { uploadImage, uploadImageBase64 } from "../util/morailsHelper";
-import { moderationContent, S3uploadImageBase64 } from "../util/aws-s3-helper";
+import { S3uploadImageBase64 } from "../util/aws-s3-helper";
 import TextHelper from "../util/TextHelper";
+import {
+  collectionSearchFields,
+  searchQuery,
+  searchWords,
+  tagKey,
+  withoutSearchFields,
+  WITHOUT_SEARCH_FIELDS,
+} from "../util/search-helper";
+import { cacheKey } from "../services/QueryCache";
 import { config } from "../../config/config";
 import { Console } from "console";
+import { ModerationController } from "./ModerationController";
 /**
  * This is the NFTCollection controller class.
  * Do all the NFTCollection's functions such as
@@ -33,7 +44,11 @@ import { Console } from "console";
  * @method getCollectionDetail
  * @method findCollectionItem
  * @method findPerson
+ * @method ensurePageIndexes
  *
+ * The collection detail reads (collection, counts, floor price, 24h volume)
+ * are cached for `config.queryCache.ttl` seconds, the writes of the
+ * collections, items and activities invalidate them.
  *
  * @author Tadashi <tadashi@depo.io>
  * @version 0.0.1
@@ -52,6 +67,8 @@ export class NFTCollectionController extends AbstractEntity {
   protected nftTable: string = "NFT";
   protected ownerTable: string = "Person";
   protected activityTable: string = "Activity";
+  protected statsTable: string = "NFTCollectionStats";
+  protected cacheTtl: number = config.queryCache.ttl;
   /**
    * Constructor of class
    * @param nft NFTCollection data
@@ -68,91 +85,70 @@ export class NFTCollectionController extends AbstractEntity {
   async searchCollectionsItems(keyword: string, filters: IQueryFilters): Promise<void | IResponse> {
     try {
       if (this.mongodb) {
-        const collectionTable = this.mongodb.collection(this.table);
         const nftTable = this.mongodb.collection(this.nftTable);
-        const ownerTable = this.mongodb.collection(this.ownerTable);
-        let SK = keyword.split(" ");
         let aggregation = {} as any;
         aggregation = this.parseFiltersFind(filters);
-        SK.push(keyword);
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
-        let searchKeyword = SK.map(function (e) {
-          return new RegExp(e, "igm");
-        });
-        const result = (await collectionTable
-          .find({
-            $or: [
-              { name: { $in: searchKeyword } },
-              { description: { $in: searchKeyword } },
-              { category: { $in: searchKeyword } },
-              { platform: { $in: searchKeyword } },
-              { links: { $in: searchKeyword } },
-            ],
-          })
-          .skip(aggregation.skip)
-          .limit(aggregation.limit)
-          .sort({volume:-1})
-          .toArray()) as Array<INFTCollection>;
-        let collections = [];
-        if (result) {
-          collections = await Promise.all(
-            result.map(async (collection) => {
-              let floorPrice = 0;
-              const count = await this.countItemAndOwner(collection._id.toString());
-
-              const creator = (await ownerTable.findOne(this.findPerson(collection.creator))) as IPerson;
-              floorPrice = await this.getFloorPrice(`${collection._id}`);
-              return {
-                _id: collection._id,
-                logoUrl: collection.logoUrl,
-                featuredUrl: collection.featuredUrl,
-                bannerUrl: collection.bannerUrl,
-                contract: collection.contract,
-                creator: collection.creator,
-                creatorDetail: creator,
-                url: collection.url,
-                description: collection.description,
-                category: collection.category,
-                links: collection.links,
-                name: collection.name,
-                blockchain: collection.blockchain,
-                volume: collection.volume,
-                _24h: collection._24h??0,
-                _24hPercent: collection._24hPercent??0,
-                floorPrice: floorPrice,
-                owners: count.owner,
-                items: count.nfts,
-                isVerified: collection.isVerified,
-                isExplicit: collection.isExplicit,
-                properties: collection.properties,
-                platform: collection.platform,
-                offerStatus: collection.offerStatus,
-              };
-            })
-          );
-        }
+        // every word of the keyword matched as a prefix, on the searchTerms index
+        const keywordQuery = searchQuery(keyword);
+        // collections and items are paged independently, each with its own cursor
+        const collectionPage = { ...aggregation, sort: { volume: -1 } };
+        const collectionQuery = this.paginate(keywordQuery, collectionPage, filters?.after);
+        const collectionRows = await this.aggregateCollectionsWithStats(
+          collectionQuery,
+          collectionPage.sort,
+          collectionPage.skip,
+          collectionPage.limit
+        );
+        const collections = collectionRows.map((collection) => this.toCollectionListing(collection));
+        const itemPage = { ...aggregation, sort: null };
+        const itemQuery = this.paginate(keywordQuery, itemPage, filters?.afterItems);
         // const resultNft = (await nftTable.aggregate(aggregationNft).toArray()) as Array<INFTCollection>;
         const resultNft = (await nftTable
-          .find({
-            $or: [
-              { platform: { $in: searchKeyword } },
-              { name: { $in: searchKeyword } },
-              { description: { $in: searchKeyword } },
-            ],
-          })
-          .skip(aggregation.skip)
-          .limit(aggregation.limit)
+          .find(itemQuery, { projection: WITHOUT_SEARCH_FIELDS })
+          .sort(itemPage.sort)
+          .skip(itemPage.skip)
+          .limit(itemPage.limit)
           .toArray()) as Array<INFTCollection>;
         let items = [];
         if (resultNft) {
           items = resultNft;
         }
-        return respond({
+        const response = respond({
           collections,
           items,
         });
+        response.nextCursor = {
+          collections: this.nextCursor(collectionRows, collectionPage),
+          items: this.nextCursor(resultNft, itemPage),
+        };
+        return response;
+      } else {
+        throw new Error("Could not connect to the database.");
+      }
+    } catch (error) {
+      return respond(error.message, true, 500);
+    }
+  }
+  /**
+   * Autocomplete of the collection names, most traded first
+   * @param prefix beginning of a word of the collection
+   * @param limit
+   * @returns collection names
+   */
+  async suggestCollections(prefix: string, limit = 10): Promise<IResponse> {
+    try {
+      if (this.mongodb) {
+        const collectionTable = this.mongodb.collection(this.table);
+        if (!searchWords(prefix).length) return respond([]);
+        const suggestions = await collectionTable
+          .find(searchQuery(prefix), { projection: { name: 1, url: 1, logoUrl: 1, isVerified: 1 } })
+          .sort({ volume: -1 })
+          .limit(Math.min(+limit || 10, 50))
+          .toArray();
+        return respond(suggestions);
       } else {
         throw new Error("Could not connect to the database.");
       }
@@ -164,94 +160,29 @@ export class NFTCollectionController extends AbstractEntity {
     try {
       if (this.mongodb) {
         const collectionTable = this.mongodb.collection(this.table);
-        const nftTable = this.mongodb.collection(this.nftTable);
-        const ownerTable = this.mongodb.collection(this.ownerTable);
         let aggregation = {} as any;
         aggregation = this.parseFiltersFind(filters);
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
-        let result = [] as any;
-        let count;
-        if (aggregation && aggregation.filter) {
-          count = await collectionTable.find({ $or: aggregation.filter }).count();
-          result = aggregation.sort
-            ? ((await collectionTable
-                .find({ $or: aggregation.filter })
-                .sort(aggregation.sort)
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>)
-            : ((await collectionTable
-                .find({ $or: aggregation.filter })
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
-        } else {
-          count = await collectionTable.find().count();
-          result = aggregation.sort
-            ? await collectionTable
-                .find({})
-                .sort(aggregation.sort)
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()
-            : ((await collectionTable
-                .find({})
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
-        }
-
-        if (result) {
-          const collections = await Promise.all(
-            result.map(async (collection) => {
-              // let volume = 0;
-              let floorPrice = 0;
-              // const count = await nftTable.find({ $or: aggregation.filter }).count();
-              const count = await this.countItemAndOwner(collection._id.toString());
-              // const { _24h, todayTrade } = await this.get24HValues(collection._id.toString());
-              const creator = (await ownerTable.findOne(this.findPerson(collection.creator))) as IPerson;
-              floorPrice = await this.getFloorPrice(`${collection._id}`);
-              return {
-                _id: collection._id,
-                logoUrl: collection.logoUrl,
-                featuredUrl: collection.featuredUrl,
-                bannerUrl: collection.bannerUrl,
-                contract: collection.contract,
-                creator: collection.creator,
-                creatorDetail: creator,
-                url: collection.url,
-                description: collection.description,
-                category: collection.category,
-                links: collection.links,
-                name: collection.name,
-                blockchain: collection.blockchain,
-                volume: collection.volume,
-                _24h: collection._24h??0,
-                _24hPercent: collection._24hPercent??0,
-                floorPrice: floorPrice,
-                owners: count.owner,
-                items: count.nfts,
-                isVerified: collection.isVerified,
-                isExplicit: collection.isExplicit,
-                properties: collection.properties,
-                platform: collection.platform,
-                offerStatus: collection.offerStatus,
-              };
-            })
-          );
-          let rst = {
-            success: true,
-            status: "ok",
-            code: 200,
-            count: count,
-            currentPage: aggregation.page,
-            data: collections,
-          };
-          return rst;
-        }
-        return respond("collection not found.", true, 422);
+        const query = aggregation && aggregation.filter ? { $or: aggregation.filter } : {};
+        const count = await collectionTable.find(query).count();
+        const rows = await this.aggregateCollectionsWithStats(
+          this.paginate(query, aggregation, filters?.after),
+          aggregation.sort,
+          aggregation.skip,
+          aggregation.limit
+        );
+        let rst = {
+          success: true,
+          status: "ok",
+          code: 200,
+          count: count,
+          currentPage: aggregation.page,
+          nextCursor: this.nextCursor(rows, aggregation),
+          data: rows.map((collection) => this.toCollectionListing(collection)),
+        };
+        return rst;
       } else {
         throw new Error("Could not connect to the database.");
       }
@@ -343,91 +274,29 @@ export class NFTCollectionController extends AbstractEntity {
     try {
       if (this.mongodb) {
         const collectionTable = this.mongodb.collection(this.table);
-        const nftTable = this.mongodb.collection(this.nftTable);
-        const ownerTable = this.mongodb.collection(this.ownerTable);
         let aggregation = {} as any;
         aggregation = this.parseFiltersFind(filters);
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
-        let result = [] as any;
+        let query = { tagKeys: tagKey("HOT") } as any;
         let count;
         if (aggregation && aggregation.filter) {
-          count = await collectionTable
-            .find({ tagCollection: { $regex: "HOT", $options: "i" }, $or: aggregation.filter })
-            .count();
-          result = aggregation.sort
-            ? ((await collectionTable
-                .find({ tagCollection: { $regex: "HOT", $options: "i" }, $or: aggregation.filter })
-                .sort(aggregation.sort)
-                .toArray()) as Array<INFT>)
-            : ((await collectionTable
-                .find({ tagCollection: { $regex: "HOT", $options: "i" }, $or: aggregation.filter })
-                .toArray()) as Array<INFT>);
+          query = { ...query, $or: aggregation.filter };
+          count = await collectionTable.find(query).count();
         } else {
           count = await collectionTable.find().count();
-          result = aggregation.sort
-            ? await collectionTable
-                .find({ tagCollection: { $regex: "HOT", $options: "i" } })
-                .sort(aggregation.sort)
-                .toArray()
-            : ((await collectionTable
-                .find({ tagCollection: { $regex: "HOT", $options: "i" } })
-                .toArray()) as Array<INFT>);
         }
-        // const result = (await collectionTable.aggregate(aggregation).toArray()) as Array<INFTCollection>;
-        if (result) {
-          const collections = await Promise.all(
-            result.map(async (collection) => {
-              // let volume = 0;
-              let floorPrice = 0;
-              let owners = [];
-
-              const count =await  this.countItemAndOwner(collection._id.toString());
-
-              // const { _24h, todayTrade } = await this.get24HValues(collection._id.toString());
-              const creator = (await ownerTable.findOne(this.findPerson(collection.creator))) as IPerson;
-              floorPrice = await this.getFloorPrice(`${collection._id}`);
-              return {
-                _id: collection._id,
-                logoUrl: collection.logoUrl,
-                featuredUrl: collection.featuredUrl,
-                bannerUrl: collection.bannerUrl,
-                contract: collection.contract,
-                creator: collection.creator,
-                creatorDetail: creator,
-                url: collection.url,
-                description: collection.description,
-                category: collection.category,
-                links: collection.links,
-                name: collection.name,
-                blockchain: collection.blockchain,
-                volume: collection.volume,
-                _24h: collection._24h??0,
-                _24hPercent: collection._24hPercent??0,
-                floorPrice: floorPrice,
-                owners: count.owner,
-                items: count.nfts,
-                isVerified: collection.isVerified,
-                isExplicit: collection.isExplicit,
-                properties: collection.properties,
-                platform: collection.platform,
-                offerStatus: collection.offerStatus,
-                tagCollection: collection.tagCollection,
-              };
-            })
-          );
-          let rst = {
-            success: true,
-            status: "ok",
-            code: 200,
-            count: count,
-            currentPage: aggregation.page,
-            data: collections,
-          };
-          return rst;
-        }
-        return respond("collection not found.", true, 422);
+        const collections = await this.findCollectionsWithStats(query, aggregation.sort, 0, 0, true);
+        let rst = {
+          success: true,
+          status: "ok",
+          code: 200,
+          count: count,
+          currentPage: aggregation.page,
+          data: collections,
+        };
+        return rst;
       } else {
         throw new Error("Could not connect to the database.");
       }
@@ -439,87 +308,29 @@ export class NFTCollectionController extends AbstractEntity {
     try {
       if (this.mongodb) {
         const collectionTable = this.mongodb.collection(this.table);
-        const nftTable = this.mongodb.collection(this.nftTable);
-        const ownerTable = this.mongodb.collection(this.ownerTable);
         let aggregation = {} as any;
         aggregation = this.parseFiltersFind(filters);
-        let result = [] as any;
-        let count;
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
+        let query = { tagKeys: tagKey(type) } as any;
+        let count;
         if (aggregation && aggregation.filter) {
-          count = await collectionTable
-            .find({ tagCollection: { $regex: type, $options: "i" }, $or: aggregation.filter })
-            .count();
-          result = aggregation.sort
-            ? ((await collectionTable
-                .find({ tagCollection: { $regex: type, $options: "i" }, $or: aggregation.filter })
-                .sort(aggregation.sort)
-                .toArray()) as Array<INFT>)
-            : ((await collectionTable
-                .find({ tagCollection: { $regex: type, $options: "i" }, $or: aggregation.filter })
-                .toArray()) as Array<INFT>);
+          query = { ...query, $or: aggregation.filter };
+          count = await collectionTable.find(query).count();
         } else {
           count = await collectionTable.find().count();
-          result = aggregation.sort
-            ? await collectionTable
-                .find({ tagCollection: { $regex: type, $options: "i" } })
-                .sort(aggregation.sort)
-                .toArray()
-            : ((await collectionTable
-                .find({ tagCollection: { $regex: type, $options: "i" } })
-                .toArray()) as Array<INFT>);
         }
-        // const result = (await collectionTable.aggregate(aggregation).toArray()) as Array<INFTCollection>;
-        if (result) {
-          const collections = await Promise.all(
-            result.map(async (collection) => {
-              // let volume = 0;
-              let floorPrice = 0;
-              const count = await this.countItemAndOwner(collection._id.toString())
-              const creator = (await ownerTable.findOne(this.findPerson(collection.creator))) as IPerson;
-              floorPrice = await this.getFloorPrice(`${collection._id}`);
-              return {
-                _id: collection._id,
-                logoUrl: collection.logoUrl,
-                featuredUrl: collection.featuredUrl,
-                bannerUrl: collection.bannerUrl,
-                contract: collection.contract,
-                creator: collection.creator,
-                creatorDetail: creator,
-                url: collection.url,
-                description: collection.description,
-                category: collection.category,
-                links: collection.links,
-                name: collection.name,
-                blockchain: collection.blockchain,
-                volume: collection.volume,
-                _24h: collection._24h??0,
-                _24hPercent: collection._24hPercent??0,
-                floorPrice: floorPrice,
-                owners: count.owner,
-                items: count.nfts,
-                isVerified: collection.isVerified,
-                isExplicit: collection.isExplicit,
-                properties: collection.properties,
-                platform: collection.platform,
-                offerStatus: collection.offerStatus,
-                tagCollection: collection.tagCollection,
-              };
-            })
-          );
-          let rst = {
-            success: true,
-            status: "ok",
-            code: 200,
-            count: count,
-            currentPage: aggregation.page,
-            data: collections,
-          };
-          return rst;
-        }
-        return respond("collection not found.", true, 422);
+        const collections = await this.findCollectionsWithStats(query, aggregation.sort, 0, 0, true);
+        let rst = {
+          success: true,
+          status: "ok",
+          code: 200,
+          count: count,
+          currentPage: aggregation.page,
+          data: collections,
+        };
+        return rst;
       } else {
         throw new Error("Could not connect to the database.");
       }
@@ -531,101 +342,25 @@ export class NFTCollectionController extends AbstractEntity {
     try {
       if (this.mongodb) {
         const collectionTable = this.mongodb.collection(this.table);
-        const nftTable = this.mongodb.collection(this.nftTable);
-        const ownerTable = this.mongodb.collection(this.ownerTable);
         let aggregation = {} as any;
-        // const result = await collectionTable.find().toArray() as Array<INFTCollection>;
         aggregation = this.parseFiltersFind(filters);
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
-        let result = [] as any;
-        let count;
-        // const result = (await collectionTable.aggregate(aggregation).toArray()) as Array<INFTCollection>;
-        // if (!aggregation.sort) {aggregation.sort = { volume: -1 }};
         aggregation.limit=10;
         aggregation.sort={volume:-1};
-        if (aggregation && aggregation.filter) {
-          count = await collectionTable.find({ $or: aggregation.filter },{projection:{_id:1}}).count();
-          result = aggregation.sort
-            ? ((await collectionTable
-                .find({ $or: aggregation.filter })
-                .sort(aggregation.sort)
-
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>)
-            : ((await collectionTable
-                .find({ $or: aggregation.filter })
-
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
-        } else {
-          count = await collectionTable.find({},{projection:{_id:1}}).count();
-          result = aggregation.sort
-            ? await collectionTable
-                .find({})
-                .sort(aggregation.sort)
-
-                .limit(aggregation.limit)
-                .toArray()
-            : ((await collectionTable
-                .find({})
-
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
-        }
-        if (result) {
-          const collections = await Promise.all(
-            result.map(async (collection) => {
-              let floorPrice = 0;
-
-              const count = await this.countItemAndOwner(collection._id.toString());
-              const creator = (await ownerTable.findOne(this.findPerson(collection.creator))) as IPerson;
-              floorPrice = await this.getFloorPrice(`${collection._id}`);
-
-              return {
-                _id: collection._id,
-                logoUrl: collection.logoUrl,
-                featuredUrl: collection.featuredUrl,
-                bannerUrl: collection.bannerUrl,
-                contract: collection.contract,
-                creator: collection.creator,
-                creatorDetail: creator,
-                url: collection.url,
-                description: collection.description,
-                category: collection.category,
-                links: collection.links,
-                name: collection.name,
-                blockchain: collection.blockchain,
-                volume: collection.volume,
-                _24h: collection._24h,
-                _24hPercent: collection._24hPercent??0,
-                floorPrice: floorPrice,
-                owners: count.owner,
-                items: count.nfts,
-                isVerified: collection.isVerified,
-                isExplicit: collection.isExplicit,
-                properties: collection.properties,
-                platform: collection.platform,
-                offerStatus: collection.offerStatus,
-              };
-            })
-          );
-
-
-          let rst = {
-            success: true,
-            status: "ok",
-            code: 200,
-            count: count,
-            currentPage: aggregation.page,
-            data: collections,
-          };
-
-          return rst;
-
-        }
-        return respond("collection not found.", true, 422);
+        const query = aggregation && aggregation.filter ? { $or: aggregation.filter } : {};
+        const count = await collectionTable.find(query, { projection: { _id: 1 } }).count();
+        const collections = await this.findCollectionsWithStats(query, aggregation.sort, 0, aggregation.limit);
+        let rst = {
+          success: true,
+          status: "ok",
+          code: 200,
+          count: count,
+          currentPage: aggregation.page,
+          data: collections,
+        };
+        return rst;
       } else {
         throw new Error("Could not connect to the database.");
       }
@@ -685,7 +420,7 @@ export class NFTCollectionController extends AbstractEntity {
         const query = this.findCollectionItem(collectionId);
         let aggregation = {} as any;
         aggregation = this.parseFiltersItemFind(filters);
-        const result = await this.findOne(query);
+        const result = await this.findOne(query, { projection: WITHOUT_SEARCH_FIELDS });
         let rst = [] as any;
         let count;
         if (!result) {
@@ -695,33 +430,29 @@ export class NFTCollectionController extends AbstractEntity {
           return respond('Max request limit = 1000',true,401)
         }
         // const nfts = await nftTable.aggregate(aggregation).toArray() as Array<INFT>;
+        let itemQuery;
         if (aggregation && aggregation.filter) {
-          count = await nftTable.find({collection: collectionId ,... aggregation.filter }).count();
-          rst = aggregation.sort
-            ? ((await nftTable
-                .find({collection: collectionId, ...aggregation.filter })
-                .sort(aggregation.sort)
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>)
-            : ((await nftTable
-                .find({collection: collectionId, ... aggregation.filter })
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
+          itemQuery = {collection: collectionId, ...aggregation.filter };
+          count = await nftTable.find(itemQuery).count();
         } else {
+          itemQuery = {collection: collectionId};
           count = await nftTable.find().count();
-          rst = aggregation.sort
-            ? await nftTable.find({collection: collectionId}).sort(aggregation.sort).skip(aggregation.skip).limit(aggregation.limit).toArray()
-            : ((await nftTable.find({collection: collectionId}).skip(aggregation.skip).limit(aggregation.limit).toArray()) as Array<INFT>);
         }
+        rst = (await nftTable
+          .find(this.paginate(itemQuery, aggregation, filters?.after), { projection: WITHOUT_SEARCH_FIELDS })
+          .sort(aggregation.sort)
+          .skip(aggregation.skip)
+          .limit(aggregation.limit)
+          .toArray()) as Array<INFT>;
         if (rst) {
           result.nfts = rst;
         } else {
           result.nfts = [];
         }
         if (result) {
-          return respond(result);
+          const response = respond(result);
+          response.nextCursor = this.nextCursor(rst, aggregation);
+          return response;
         }
         return respond("collection items not found.", true, 422);
       } else {
@@ -761,27 +492,21 @@ export class NFTCollectionController extends AbstractEntity {
             collection: collectionId,
           }
           let activities
+          let activityQuery
           // const activities = await activityTable.find({ collection: collectionId }).toArray();
           if (aggregation && aggregation.filter) {
-            count = await activityTable.find({ ...qry, $or: aggregation.filter },{projection:{_id:1}}).count();
-            activities = aggregation.sort
-              ? ((await activityTable
-                  .find({...qry, $or: aggregation.filter })
-                  .sort(aggregation.sort)
-                  .skip(aggregation.skip)
-                  .limit(aggregation.limit)
-                  .toArray()) as Array<IActivity>)
-              : ((await activityTable
-                  .find({...qry,  $or: aggregation.filter })
-                  .skip(aggregation.skip)
-                  .limit(aggregation.limit)
-                  .toArray()) as Array<IActivity>);
+            activityQuery = { ...qry, $or: aggregation.filter };
           } else {
-            count = await activityTable.find({...qry},{projection:{_id:1}}).count();
-            activities = aggregation.sort
-              ? await activityTable.find({...qry}).sort(aggregation.sort).skip(aggregation.skip).limit(aggregation.limit).toArray() as Array<IActivity>
-              : ((await activityTable.find({...qry}).skip(aggregation.skip).limit(aggregation.limit).toArray()) as Array<IActivity>);
+            activityQuery = { ...qry };
           }
+          count = await activityTable.find(activityQuery,{projection:{_id:1}}).count();
+          activities = (await activityTable
+            .find(this.paginate(activityQuery, aggregation, filters?.after))
+            .sort(aggregation.sort)
+            .skip(aggregation.skip)
+            .limit(aggregation.limit)
+            .toArray()) as Array<IActivity>;
+          const nextCursor = this.nextCursor(activities, aggregation);
 
           let rstAct = [];
           const detailedActivity = await Promise.all(
@@ -804,7 +529,9 @@ export class NFTCollectionController extends AbstractEntity {
             })
           );
 
-          return respond(rstAct);
+          const response = respond(rstAct);
+          response.nextCursor = nextCursor;
+          return response;
         }
         return respond("Activities not found.", true, 422);
       } else {
@@ -978,18 +705,8 @@ export class NFTCollectionController extends AbstractEntity {
         featuredIpfs && featuredIpfs['explicit']?isExplicit=true:isExplicit=false;
         bannerIpfs && bannerIpfs['explicit']?isExplicit=true:isExplicit=false;
       // }
-      if (logoIpfs && logoIpfs.location ){
-        const isEx=await moderationContent(logoIpfs.key);
-        isExplicit?isEx:false;
-      }
-      if (featuredIpfs && featuredIpfs.location ){
-        const isEx=await moderationContent(featuredIpfs.key);
-        isExplicit?isEx:false;
-      }
-      if (bannerIpfs && bannerIpfs.location ){
-        const isEx=await moderationContent(bannerIpfs.key);
-        isExplicit?isEx:false;
-      }
+      // moderated by the moderation worker once saved
+      const uploadedKeys = [logoIpfs, featuredIpfs, bannerIpfs].filter((upload) => upload && upload.location).map((upload) => upload['key']);
       if (properties){
         const propertyNames: any = JSON.parse(properties);
         if (typeof propertyNames === 'object'){
@@ -1030,11 +747,17 @@ export class NFTCollectionController extends AbstractEntity {
         platform: "ARC",
         properties: initialProperties,
         offerStatus: OfferStatusType.NONE,
+        ...(uploadedKeys.length ? { moderationStatus: ModerationStatus.PENDING } : {}),
       };
+      Object.assign(nftCollection, collectionSearchFields(nftCollection));
       const result = await collection.insertOne(nftCollection);
-      if (result) nftCollection._id = result.insertedId;
+      if (result) {
+        nftCollection._id = result.insertedId;
+        this.invalidate();
+        await new ModerationController().submit(ModerationTarget.COLLECTION, nftCollection._id, uploadedKeys);
+      }
       return result
-        ? respond({ ...nftCollection, creator: creator })
+        ? respond({ ...withoutSearchFields(nftCollection), creator: creator })
         : respond("Failed to create a new collection.", true, 500);
     } catch (e) {
       return respond(e.message, true, 500);
@@ -1129,18 +852,8 @@ export class NFTCollectionController extends AbstractEntity {
       logoIpfs && logoIpfs['explicit']?isExplicit=true:isExplicit=false;
       featuredIpfs && featuredIpfs['explicit']?isExplicit=true:isExplicit=false;
       bannerIpfs && bannerIpfs['explicit']?isExplicit=true:isExplicit=false;
-      if (logoIpfs && logoIpfs.location ){
-        const isEx=await moderationContent(logoIpfs.key);
-        isExplicit?isEx:false;
-      }
-      if (featuredIpfs && featuredIpfs.location ){
-        const isEx=await moderationContent(featuredIpfs.key);
-        isExplicit?isEx:false;
-      }
-      if (bannerIpfs && bannerIpfs.location ){
-        const isEx=await moderationContent(bannerIpfs.key);
-        isExplicit?isEx:false;
-      }
+      // moderated by the moderation worker once saved
+      const uploadedKeys = [logoIpfs, featuredIpfs, bannerIpfs].filter((upload) => upload && upload.location).map((upload) => upload['key']);
       if (logoFile) {
         findResult.logoUrl = logoIpfs['location'];
       }
@@ -1194,8 +907,12 @@ export class NFTCollectionController extends AbstractEntity {
         }
       };
       findResult.properties = initialProperties;
+      if (uploadedKeys.length) findResult.moderationStatus = ModerationStatus.PENDING;
+      Object.assign(findResult, collectionSearchFields(findResult));
       const result = await collection.replaceOne({ _id: new ObjectId(collectionId) }, findResult);
-      return result ? respond({ ...findResult }) : respond("Failed to update a new collection.", true, 500);
+      this.invalidate();
+      if (result) await new ModerationController().submit(ModerationTarget.COLLECTION, collectionId, uploadedKeys);
+      return result ? respond(withoutSearchFields(findResult)) : respond("Failed to update a new collection.", true, 500);
     } catch (e) {
       return respond(e.message, true, 500);
     }
@@ -1210,7 +927,9 @@ export class NFTCollectionController extends AbstractEntity {
     const nftTable = this.mongodb.collection(this.nftTable);
     const activityTable = this.mongodb.collection(this.activityTable);
     const ownerTable = this.mongodb.collection(this.ownerTable);
-    const collection = await collectionTable.findOne(this.findCollectionItem(collectionId));
+    const collection = await this.cached(cacheKey("detail", collectionId), () =>
+      collectionTable.findOne(this.findCollectionItem(collectionId), { projection: WITHOUT_SEARCH_FIELDS })
+    );
     if (!collection) {
       return respond("collection not found", true, 501);
     }
@@ -1255,7 +974,7 @@ export class NFTCollectionController extends AbstractEntity {
     const nftTable = this.mongodb.collection(this.nftTable);
     const activityTable = this.mongodb.collection(this.activityTable);
     const ownerTable = this.mongodb.collection(this.ownerTable);
-    const collection = await collectionTable.findOne({ url });
+    const collection = await collectionTable.findOne({ url }, { projection: WITHOUT_SEARCH_FIELDS });
     if (!collection) {
       return respond("collection not found", true, 501);
     }
@@ -1272,24 +991,24 @@ export class NFTCollectionController extends AbstractEntity {
       count = await nftTable.find({ ...findItems,$or: aggregation.filter }).count();
       nfts = aggregation.sort
             ? ((await nftTable
-                .find({...findItems, $or: aggregation.filter })
+                .find({...findItems, $or: aggregation.filter }, { projection: WITHOUT_SEARCH_FIELDS })
                 .sort(aggregation.sort)
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()) as Array<INFT>)
             : ((await nftTable
-                .find({...findItems, $or: aggregation.filter })
+                .find({...findItems, $or: aggregation.filter }, { projection: WITHOUT_SEARCH_FIELDS })
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()) as Array<INFT>);
   }else{
     count = await nftTable.find({...findItems}).count();
     nfts = aggregation.sort
-      ? await nftTable.find({...findItems})
+      ? await nftTable.find({...findItems}, { projection: WITHOUT_SEARCH_FIELDS })
           .sort(aggregation.sort)
           .skip(aggregation.skip)
           .limit(aggregation.limit).toArray()
-      : ((await nftTable.find({...findItems})
+      : ((await nftTable.find({...findItems}, { projection: WITHOUT_SEARCH_FIELDS })
           .skip(aggregation.skip).limit(aggregation.limit).toArray()) as Array<INFT>);
   }
 
@@ -1328,18 +1047,103 @@ export class NFTCollectionController extends AbstractEntity {
         return respond("This collection has Items", true, 422);
       }
       const deleteCollection = await collectionTable.remove(this.findCollectionItem(collectionId));
+      this.invalidate();
       return respond(`Collection ${collectionId} has been removed`);
     } catch (e) {
       return respond(e.message, true, 401);
     }
   }
    async countItemAndOwner(collection:string){
-    const nftTable = this.mongodb.collection(this.nftTable);
-    const items = await nftTable.find({ collection: `${collection}` },{projection:{_id:1}}).count();
-    const owner =await nftTable.aggregate([
-      {$match:{collection:`${collection}`}},    {"$group" : {_id:"$owner"}},{$count:"count"}
-      ]).toArray();
+    return this.cached(cacheKey("countItemAndOwner", collection), async () => {
+      const nftTable = this.mongodb.collection(this.nftTable);
+      const items = await nftTable.find({ collection: `${collection}` },{projection:{_id:1}}).count();
+      const owner =await nftTable.aggregate([
+        {$match:{collection:`${collection}`}},    {"$group" : {_id:"$owner"}},{$count:"count"}
+        ]).toArray();
       return {nfts:items,owner:owner.length>0?owner[0].count:0};
+    }, this.nftTable);
+  }
+  /**
+   * Fetches a page of collections with their creator and precomputed stats
+   * (see `CollectionStatsController`) in a single aggregation.
+   * @param query collection filter
+   * @param sort
+   * @param skip
+   * @param limit 0 for no limit
+   * @param withTags adds the collection tags to the listing
+   * @returns collection listing
+   */
+  private async findCollectionsWithStats(
+    query: Object,
+    sort?: Object,
+    skip?: number,
+    limit?: number,
+    withTags?: boolean
+  ): Promise<Array<any>> {
+    const result = await this.aggregateCollectionsWithStats(query, sort, skip, limit);
+    return result.map((collection) => this.toCollectionListing(collection, withTags));
+  }
+  /**
+   * Raw rows of `findCollectionsWithStats`, the stored collection fields
+   * are kept so the cursor of the page can be read from the last row.
+   */
+  private async aggregateCollectionsWithStats(
+    query: Object,
+    sort?: Object,
+    skip?: number,
+    limit?: number
+  ): Promise<Array<any>> {
+    const collectionTable = this.mongodb.collection(this.table);
+    const pipeline = [{ $match: query }] as Array<any>;
+    if (sort) pipeline.push({ $sort: sort });
+    if (skip) pipeline.push({ $skip: skip });
+    if (limit) pipeline.push({ $limit: limit });
+    pipeline.push(
+      { $lookup: { from: this.statsTable, localField: "_id", foreignField: "_id", as: "stats" } },
+      { $lookup: { from: this.ownerTable, localField: "creator", foreignField: "wallet", as: "creatorDetail" } }
+    );
+    return collectionTable.aggregate(pipeline).toArray();
+  }
+  private toCollectionListing(collection: any, withTags?: boolean) {
+    const stats = collection.stats[0] ?? {};
+    return {
+      _id: collection._id,
+      logoUrl: collection.logoUrl,
+      featuredUrl: collection.featuredUrl,
+      bannerUrl: collection.bannerUrl,
+      contract: collection.contract,
+      creator: collection.creator,
+      creatorDetail: (collection.creatorDetail[0] ?? null) as IPerson,
+      url: collection.url,
+      description: collection.description,
+      category: collection.category,
+      links: collection.links,
+      name: collection.name,
+      blockchain: collection.blockchain,
+      volume: collection.volume,
+      _24h: collection._24h ?? 0,
+      _24hPercent: collection._24hPercent ?? 0,
+      floorPrice: stats.floorPrice ?? 0,
+      owners: stats.owners ?? 0,
+      items: stats.items ?? 0,
+      isVerified: collection.isVerified,
+      isExplicit: collection.isExplicit,
+      properties: collection.properties,
+      platform: collection.platform,
+      offerStatus: collection.offerStatus,
+      ...(withTags ? { tagCollection: collection.tagCollection } : {}),
+    };
+  }
+  /**
+   * Creates the indexes of the default sort keys of the listings,
+   * so a cursor page is read straight from the index
+   */
+  async ensurePageIndexes(): Promise<void> {
+    await Promise.all([
+      this.mongodb.collection(this.table).createIndex({ volume: -1, _id: -1 }),
+      this.mongodb.collection(this.nftTable).createIndex({ collection: 1, _id: 1 }),
+      this.mongodb.collection(this.activityTable).createIndex({ collection: 1, startDate: -1, _id: -1 }),
+    ]);
   }
   private checkLimitRequest(limit:number){
     return limit<=1000?true:false;
@@ -1386,9 +1190,10 @@ export class NFTCollectionController extends AbstractEntity {
   }
    async get24HValues(address: string) {
     const activityTable = this.mongodb.collection(this.activityTable);
-    const soldList = (await activityTable
-      .find({ collection: address, type: { $in: [ActivityType.TRANSFER, ActivityType.SALE] } })
-      .toArray()) as Array<IActivity>;
+    const soldList = (await this.cached(cacheKey("sold", address), () =>
+      activityTable
+        .find({ collection: address, type: { $in: [ActivityType.TRANSFER, ActivityType.SALE] } }, { projection: { date: 1, price: 1 } })
+        .toArray(), this.activityTable)) as Array<IActivity>;
     let yesterDayTrade = 0;
     let todayTrade = 0;
     const todayDate = new Date();
@@ -1414,11 +1219,12 @@ export class NFTCollectionController extends AbstractEntity {
   }
    async getFloorPrice(collection: string) {
     const actTable = this.mongodb.collection(this.activityTable);
-    const fList = (await actTable
-      .find({ collection: collection, price: { $ne: null }, active: true, type: "List" })
-      .sort({ price: 1 })
-      .limit(1)
-      .toArray()) as Array<IActivity>;
+    const fList = (await this.cached(cacheKey("floor", collection), () =>
+      actTable
+        .find({ collection: collection, price: { $ne: null }, active: true, type: "List" })
+        .sort({ price: 1 })
+        .limit(1)
+        .toArray(), this.activityTable)) as Array<IActivity>;
     if (fList && fList.length > 0) {
       return fList[0].price;
     } else {
@@ -1,15 +1,21 @@
 import { ObjectId } from "mongodb";
 import { AbstractEntity } from "../abstract/AbstractEntity";
+import { CollectionStatsController } from "./CollectionStatsController";
+import { ModerationController } from "./ModerationController";
+import { TokenMetadataController } from "./TokenMetadataController";
 import { ActivityType, IActivity } from "../interfaces/IActivity";
 import { ContentType, INFT, MintStatus, SaleStatus, TokenType } from "../interfaces/INFT";
 import { INFTCollection } from "../interfaces/INFTCollection";
+import { ModerationStatus, ModerationTarget } from "../interfaces/IModeration";
 import { IResponse } from "../interfaces/IResponse";
 import { IQueryFilters } from "../interfaces/Query";
 import { respond } from "../util/respond";
 import { dateDiff } from "../util/datediff-helper";
-import { moderationContent, S3uploadImageBase64 } from "../util/aws-s3-helper";
+import { S3uploadImageBase64 } from "../util/aws-s3-helper";
 import { IGlobal } from "../interfaces/IGlobal";
 import TextHelper from "../util/TextHelper";
+import { itemSearchFields, tagKey, withoutSearchFields, WITHOUT_SEARCH_FIELDS } from "../util/search-helper";
+import { tokenMetadata } from "../util/token-metadata";
 import { v4 } from "uuid";
 import { INFTBatch } from "../interfaces/INFTBatch";
 export class NFTController extends AbstractEntity {
@@ -31,25 +37,7 @@ export class NFTController extends AbstractEntity {
         const itemTable = this.mongodb.collection(this.table);
         const result = await itemTable.findOne(query);
         if (result) {
-          let prop=[];
-          if (Array.isArray(result.properties)) {
-            for (const property of result.properties) {
-              const { title, name } = property;
-              prop.push({
-                'trait_type':title,
-                'value':name
-              })
-                }
-              // }
-            }
-          const rst:any={
-            name:result.name,
-            description:result.description,
-            image:result.artURI,
-            // external_url:result.externalLink,
-            attributes:prop
-        }
-          return rst
+          return tokenMetadata(result) as any;
         }
         return respond("nft not found.", true, 422);
       } else {
@@ -59,6 +47,124 @@ export class NFTController extends AbstractEntity {
       return respond(error.message, true, 500);
     }
   }
+  /**
+   * Token metadata of many items of a token type, read with a single query
+   * @param tokenType 721 or 1155
+   * @param indexes token ids
+   * @returns metadata per token id, null for the unknown ids
+   */
+  async getItemsSimple(tokenType: string, indexes: Array<number>): Promise<IResponse> {
+    try {
+      const itemTable = this.mongodb.collection(this.table);
+      const ids = Array.from(new Set(indexes.map(Number)));
+      const items = await itemTable
+        .find(
+          { tokenType: `ERC${tokenType}`, index: { $in: ids } },
+          { projection: { index: 1, name: 1, description: 1, artURI: 1, properties: 1 } }
+        )
+        .toArray();
+      const metadata = {};
+      ids.forEach((id) => (metadata[id] = null));
+      items.forEach((item) => (metadata[item.index] = tokenMetadata(item)));
+      return respond(metadata);
+    } catch (error) {
+      return respond(error.message, true, 500);
+    }
+  }
+  /**
+   * Card details of many items, read with one query per table instead of one request per item
+   * (same fields as `getItemDetail`)
+   * @param keys collection id and token id of the items
+   * @param loginUser
+   * @returns the found items, in the order of the keys
+   */
+  async getItemsDetail(keys: Array<{ collectionId: string; nftId: number }>, loginUser?: string): Promise<IResponse> {
+    try {
+      const itemTable = this.mongodb.collection(this.table);
+      const acttable = this.mongodb.collection(this.activityTable);
+      const collTable = this.mongodb.collection(this.nftCollectionTable);
+      const personTable = this.mongodb.collection(this.personTable);
+
+      const indexesByCollection = new Map<string, Array<number>>();
+      keys.forEach(({ collectionId, nftId }) => {
+        const indexes = indexesByCollection.get(collectionId) ?? [];
+        indexes.push(Number(nftId));
+        indexesByCollection.set(collectionId, indexes);
+      });
+      const perCollection = Array.from(indexesByCollection.entries()).map(([collection, indexes]) => ({
+        collection,
+        index: { $in: indexes },
+      }));
+      if (!perCollection.length) return respond([]);
+
+      const items = (await itemTable
+        .find({ $or: perCollection }, { projection: WITHOUT_SEARCH_FIELDS })
+        .toArray()) as Array<any>;
+      const collectionIds = Array.from(indexesByCollection.keys()).filter((id) => ObjectId.isValid(id));
+      const [collections, owners, activities, collectionOffers] = await Promise.all([
+        collTable
+          .find({ _id: { $in: collectionIds.map((id) => new ObjectId(id)) } }, { projection: { contract: 1, creatorEarning: 1 } })
+          .toArray(),
+        personTable.find({ wallet: { $in: Array.from(new Set(items.map((item) => item.owner))) } }).toArray(),
+        acttable
+          .aggregate([
+            {
+              $match: {
+                active: true,
+                $or: Array.from(indexesByCollection.entries()).map(([collection, indexes]) => ({
+                  collection,
+                  nftId: { $in: indexes },
+                })),
+              },
+            },
+            { $sort: { startDate: -1 } },
+            { $group: { _id: { collection: "$collection", nftId: "$nftId" }, endDate: { $first: "$endDate" } } },
+          ])
+          .toArray(),
+        acttable
+          .aggregate([
+            { $match: { collection: { $in: collectionIds }, type: ActivityType.OFFERCOLLECTION } },
+            { $group: { _id: "$collection", endDate: { $first: "$endDate" } } },
+          ])
+          .toArray(),
+      ]);
+      const collectionById = new Map(collections.map((collection) => [`${collection._id}`, collection]));
+      const ownerByWallet = new Map(owners.map((owner) => [owner.wallet, owner]));
+      const activityByItem = new Map(activities.map((act) => [`${act._id.collection}/${act._id.nftId}`, act]));
+      const offerByCollection = new Map(collectionOffers.map((act) => [act._id, act]));
+      const itemByKey = new Map(items.map((item) => [`${item.collection}/${item.index}`, item]));
+
+      const result = keys
+        .map(({ collectionId, nftId }) => itemByKey.get(`${collectionId}/${Number(nftId)}`))
+        .filter((item) => item && collectionById.has(item.collection))
+        .filter((item, i, found) => found.indexOf(item) === i)
+        .map((item) => {
+          const collectionData = collectionById.get(item.collection);
+          const act = activityByItem.get(`${item.collection}/${item.index}`);
+          const endDate = act ? act.endDate : offerByCollection.get(item.collection)?.endDate;
+          const owner = ownerByWallet.get(item.owner) ?? null;
+          const detail = {
+            ...item,
+            collectionId: item.collection,
+            collection: collectionData.contract,
+            creatorEarning: collectionData.creatorEarning,
+            timeLeft: endDate ? dateDiff(new Date().getTime(), endDate) : "",
+            ownerDetail: owner,
+          };
+          if (detail.tokenType == "ERC1155") {
+            const own = detail.owners ?? [];
+            if (own.indexOf(owner) == -1) own.push(detail.owner);
+            detail.owners = own;
+            detail.ownersDetail = [owner];
+          }
+          if (detail.owner !== loginUser) delete detail.lockContent;
+          return detail;
+        });
+      return respond(result);
+    } catch (error) {
+      return respond(error.message, true, 500);
+    }
+  }
   async getItemDetail(collectionId: string, index: number,loginUser?:string): Promise<IResponse> {
     try {
       if (this.mongodb) {
@@ -66,7 +172,7 @@ export class NFTController extends AbstractEntity {
         const acttable = this.mongodb.collection(this.activityTable);
         const collTable = this.mongodb.collection(this.nftCollectionTable);
         const itemTable = this.mongodb.collection(this.table);
-        const result = await itemTable.findOne(query);
+        const result = await itemTable.findOne(query, { projection: WITHOUT_SEARCH_FIELDS });
         if (result) {
           const personTable = this.mongodb.collection(this.personTable);
           const owner = await personTable.findOne({ wallet: result.owner });
@@ -279,28 +385,16 @@ export class NFTController extends AbstractEntity {
         if (!this.checkLimitRequest(aggregation.limit)){
           return respond('Max request limit = 1000',true,401)
         }
-        if (aggregation && aggregation.filter) {
-          console.log('filter',aggregation.filter);
-          count = await nftTable.find({... aggregation.filter },{projection:{_id:1}}).count();
-          result = aggregation.sort
-            ? ((await nftTable
-                .find({ ...aggregation.filter })
-                .sort(aggregation.sort)
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>)
-            : ((await nftTable
-                .find({ ...aggregation.filter })
-                .skip(aggregation.skip)
-                .limit(aggregation.limit)
-                .toArray()) as Array<INFT>);
-        } else {
-          count = await nftTable.find({},{projection:{_id:1}}).count();
-          result = aggregation.sort
-            ? await nftTable.find({}).sort(aggregation.sort).skip(aggregation.skip).limit(aggregation.limit).toArray()
-            : ((await nftTable.find({}).skip(aggregation.skip).limit(aggregation.limit).toArray()) as Array<INFT>);
-        }
+        const query = aggregation && aggregation.filter ? { ...aggregation.filter } : {};
+        count = await nftTable.find(query,{projection:{_id:1}}).count();
+        result = (await nftTable
+          .find(this.paginate(query, aggregation, filters?.after), { projection: WITHOUT_SEARCH_FIELDS })
+          .sort(aggregation.sort)
+          .skip(aggregation.skip)
+          .limit(aggregation.limit)
+          .toArray()) as Array<INFT>;
         if (result) {
+          const nextCursor = this.nextCursor(result, aggregation);
           const resultsNFT= await this.resultItem(result,loginUser);
           let rst = {
             success: true,
@@ -308,6 +402,7 @@ export class NFTController extends AbstractEntity {
             code: 200,
             count: count,
             currentPage: aggregation.page,
+            nextCursor,
             data: resultsNFT,
           };
           return rst;
@@ -334,16 +429,16 @@ export class NFTController extends AbstractEntity {
         let result = [] as any;
         let count;
         if (aggregation && aggregation.filter) {
-          count = await nftTable.find({ tag: { $regex: type, $options: "i" }, $or: aggregation.filter }).count();
+          count = await nftTable.find({ tagKeys: tagKey(type), $or: aggregation.filter }).count();
           result = aggregation.sort
             ? ((await nftTable
-                .find({ tag: { $regex: type, $options: "i" }, $or: aggregation.filter })
+                .find({ tagKeys: tagKey(type), $or: aggregation.filter }, { projection: WITHOUT_SEARCH_FIELDS })
                 .sort(aggregation.sort)
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()) as Array<INFT>)
             : ((await nftTable
-                .find({ tag: { $regex: type, $options: "i" }, $or: aggregation.filter })
+                .find({ tagKeys: tagKey(type), $or: aggregation.filter }, { projection: WITHOUT_SEARCH_FIELDS })
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()) as Array<INFT>);
@@ -351,13 +446,13 @@ export class NFTController extends AbstractEntity {
           count = await nftTable.find().count();
           result = aggregation.sort
             ? await nftTable
-                .find({ tag: { $regex: type, $options: "i" } })
+                .find({ tagKeys: tagKey(type) }, { projection: WITHOUT_SEARCH_FIELDS })
                 .sort(aggregation.sort)
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()
             : ((await nftTable
-                .find({ tag: { $regex: type, $options: "i" } })
+                .find({ tagKeys: tagKey(type) }, { projection: WITHOUT_SEARCH_FIELDS })
                 .skip(aggregation.skip)
                 .limit(aggregation.limit)
                 .toArray()) as Array<INFT>);
@@ -439,11 +534,13 @@ export class NFTController extends AbstractEntity {
         const nftTable = this.mongodb.collection(this.table);
         const collTable = this.mongodb.collection(this.nftCollectionTable);
         const activityTable = this.mongodb.collection(this.activityTable);
-        let aggregation = {} as any;
+        let aggregation = [] as any;
         if (filters) {
           aggregation = this.parseFilters(filters);
         }
-        const result = (await nftTable.aggregate(aggregation).toArray()) as Array<INFT>;
+        const result = (await nftTable
+          .aggregate([...aggregation, { $project: WITHOUT_SEARCH_FIELDS }])
+          .toArray()) as Array<INFT>;
         if (result) {
           const resultsNFT = await Promise.all(
             result.map(async (item) => {
@@ -525,10 +622,6 @@ export class NFTController extends AbstractEntity {
       const artIpfs = artFile ? await S3uploadImageBase64(artFile, `${artName}_${Date.now()}`, mimeType, "item") : "";
       let queryArt = this.findNFTItemByArt(artIpfs['location']);
       artIpfs && artIpfs['explicit']?isExplicit=true:isExplicit=false;
-      if (artIpfs && artIpfs.location ){
-        const isEx=await moderationContent(artIpfs.key);
-        isExplicit?isEx:false;
-      }
       const findResult = (await nftTable.findOne(queryArt)) as INFT;
       if (findResult && findResult._id) {
         return respond("Current nft has been created already", true, 422);
@@ -580,17 +673,23 @@ export class NFTController extends AbstractEntity {
             : contentType==='audio'
             ? ContentType.AUDIO
             : ContentType.IMAGE,
-          fee:collection.creatorEarning??0
+          fee:collection.creatorEarning??0,
+        // moderated by the moderation worker once saved
+        ...(artIpfs && artIpfs.location ? { moderationStatus: ModerationStatus.PENDING } : {}),
       };
+      Object.assign(nft, itemSearchFields(nft));
       const result = await nftTable.insertOne(nft);
       if (result) {
         nft._id = result.insertedId;
+        await new ModerationController().submit(ModerationTarget.NFT, nft._id, [artIpfs && artIpfs['key']]);
         await collectionTable.replaceOne(
           { _id: new ObjectId(collectionId) },
           this._updateCollectionProperties(collection, nft)
         );
+        await new CollectionStatsController().refresh(collectionId);
+        await new TokenMetadataController().publish([nft]);
       }
-      return result ? respond(nft) : respond("Failed to create a new nft.", true, 501);
+      return result ? respond(withoutSearchFields(nft)) : respond("Failed to create a new nft.", true, 501);
     } catch (err) {
       console.log(err);
       return respond(err.message, true, 403);
@@ -751,22 +850,26 @@ export class NFTController extends AbstractEntity {
           ? ContentType.VIDEO
           :""
           };
+          Object.assign(nft, itemSearchFields(nft));
           nfts.push(nft);
           if (record["List For Sale"] === "Yes") {
             forSaleBatch.push({index:newIndex, price: +record["List Price (ETH)"]})
-            forSale.push({ ...nft, price: +record["List Price (ETH)"] });
+            forSale.push({ ...withoutSearchFields(nft), price: +record["List Price (ETH)"] });
           }else{
             notForSaleBatch.push({index:newIndex, price: +record["List Price (ETH)"]})
-            notForSale.push({ ...nft, price: +record["List Price (ETH)"] });
+            notForSale.push({ ...withoutSearchFields(nft), price: +record["List Price (ETH)"] });
           }  
       }
       if (nfts.length > 0){
         await nftTable.insertMany(nfts);
+        // written in the background, the backfill catches a failed write
+        new TokenMetadataController().publish(nfts);
         let collection = (await collectionTable.findOne({ _id: new ObjectId(collectionId) })) as INFTCollection;
         for (const nft of nfts) {
           collection = this._updateCollectionProperties(collection, nft);
         }
         await collectionTable.replaceOne({ _id: new ObjectId(collectionId) }, collection);
+        await new CollectionStatsController().refresh(collectionId);
         await nftBatch.insertOne({
           batchId:batchId,
           collection:collectionId,
@@ -801,6 +904,8 @@ export class NFTController extends AbstractEntity {
         return respond("This item  has activity", true, 422);
       }
       const deleteItem = await nftTable.remove({ _id: new ObjectId(id) });
+      await new CollectionStatsController().refresh(itemData.collection);
+      await new TokenMetadataController().unpublish(itemData);
       return respond(`Item ${id} has been removed`);
     } catch (e) {
       return respond(e.message, true, 401);
@@ -817,7 +922,11 @@ export class NFTController extends AbstractEntity {
         if (itemData?.owner.toLowerCase() !== ownerId) {
           return respond("this item not belong to this user", true, 422);
         }
-        const result = await nftTable.updateOne({ _id: new ObjectId(id) }, { $set: { ...nft } });
+        const result = await nftTable.updateOne(
+          { _id: new ObjectId(id) },
+          { $set: { ...nft, ...itemSearchFields({ ...itemData, ...nft }) } }
+        );
+        await new TokenMetadataController().publishById(id);
         const collectionTable = this.mongodb.collection(this.nftCollectionTable);
         const collection = (await collectionTable.findOne({ _id: new ObjectId(nft.collection) })) as INFTCollection;
         await collectionTable.replaceOne(
@@ -0,0 +1,93 @@
+import { AbstractEntity } from "../abstract/AbstractEntity";
+import { collectionSearchFields, itemSearchFields } from "../util/search-helper";
+
+/**
+ * This is the SearchIndex controller class.
+ * Keeps the `searchTerms` and `tagKeys` fields of the collections and items
+ * (see `search-helper`) and their indexes.
+ *
+ * The fields are written with the documents on create and update, the
+ * periodic reindex catches the documents changed elsewhere (tags set by
+ * the admins, documents created before the fields existed).
+ *
+ * @property {collectionTable}
+ * @property {nftTable}
+ *
+ * @method ensureIndexes
+ * @method ensureBuilt
+ * @method reindex
+ *
+ * ----
+ * Example Usage
+ *
+ * const search = new SearchIndexController();
+ *
+ * await search.reindex()
+ *
+ */
+export class SearchIndexController extends AbstractEntity {
+  protected collectionTable: string = "NFTCollection";
+  protected nftTable: string = "NFT";
+
+  constructor() {
+    super();
+  }
+
+  /**
+   * Creates the search indexes, `volume` orders the suggestions from the index
+   */
+  async ensureIndexes(): Promise<void> {
+    await Promise.all([
+      this.mongodb.collection(this.collectionTable).createIndex({ searchTerms: 1, volume: -1 }),
+      this.mongodb.collection(this.collectionTable).createIndex({ tagKeys: 1 }),
+      this.mongodb.collection(this.nftTable).createIndex({ searchTerms: 1 }),
+      this.mongodb.collection(this.nftTable).createIndex({ tagKeys: 1 }),
+    ]);
+  }
+
+  /**
+   * Builds the search fields when none was written yet (first deployment)
+   * @returns number of documents written
+   */
+  async ensureBuilt(): Promise<number> {
+    const indexed = await this.mongodb
+      .collection(this.collectionTable)
+      .findOne({ searchTerms: { $exists: true } }, { projection: { _id: 1 } });
+    return indexed ? 0 : this.reindex();
+  }
+
+  /**
+   * Recomputes the search fields, only the documents whose fields changed are written
+   * @returns number of documents written
+   */
+  async reindex(): Promise<number> {
+    const [collections, items] = await Promise.all([
+      this.reindexTable(this.collectionTable, { name: 1, category: 1, platform: 1, description: 1, tagCollection: 1 }, collectionSearchFields),
+      this.reindexTable(this.nftTable, { name: 1, description: 1, tag: 1 }, itemSearchFields),
+    ]);
+    return collections + items;
+  }
+
+  private async reindexTable(table: string, projection: Object, fields: (doc: any) => Object): Promise<number> {
+    const collection = this.mongodb.collection(table);
+    const cursor = collection.find({}, { projection: { ...projection, searchTerms: 1, tagKeys: 1 } });
+    let operations = [];
+    let written = 0;
+    const flush = async () => {
+      if (!operations.length) return;
+      await collection.bulkWrite(operations, { ordered: false });
+      written += operations.length;
+      operations = [];
+    };
+    while (await cursor.hasNext()) {
+      const doc = await cursor.next();
+      const update = fields(doc);
+      const changed = Object.keys(update).some((key) => `${doc[key] ?? ""}` !== `${update[key]}`);
+      if (!changed) continue;
+      operations.push({ updateOne: { filter: { _id: doc._id }, update: { $set: update } } });
+      if (operations.length >= 500) await flush();
+    }
+    await flush();
+    return written;
+  }
+}
@@ -0,0 +1,110 @@
+import { ObjectId } from "mongodb";
+import { AbstractEntity } from "../abstract/AbstractEntity";
+import { INFT } from "../interfaces/INFT";
+import { config } from "../../config/config";
+import { S3deleteObject, S3putJson } from "../util/aws-s3-helper";
+import { metadataKey, tokenMetadata } from "../util/token-metadata";
+
+// metadata objects written at once by the backfill
+const BACKFILL_CONCURRENCY = 20;
+
+/**
+ * This is the TokenMetadata controller class.
+ * Publishes the token metadata of the items as static JSON to the user
+ * bucket (see `token-metadata`), whenever an item is created or updated,
+ * and backfills the items created before.
+ *
+ * @property {table}
+ *
+ * @method publish
+ * @method publishById
+ * @method unpublish
+ * @method backfill
+ *
+ * ----
+ * Example Usage
+ *
+ * const metadata = new TokenMetadataController();
+ *
+ * await metadata.publish(nfts)
+ *
+ */
+export class TokenMetadataController extends AbstractEntity {
+  protected table: string = "NFT";
+
+  constructor() {
+    super();
+  }
+
+  /**
+   * Writes the metadata of the items.
+   * Never throws, a failed write is fixed by the next backfill.
+   * @param items items with their token type and index
+   * @returns number of metadata written
+   */
+  async publish(items: Array<Partial<INFT>>): Promise<number> {
+    let written = 0;
+    for (let i = 0; i < items.length; i += BACKFILL_CONCURRENCY) {
+      const results = await Promise.all(
+        items.slice(i, i + BACKFILL_CONCURRENCY).map(async (item) => {
+          if (!item || !item.tokenType || item.index == null) return false;
+          try {
+            await S3putJson(metadataKey(item.tokenType, item.index), tokenMetadata(item), config.tokenMetadata.cacheControl);
+            return true;
+          } catch (error) {
+            console.log(`TokenMetadataController::publish::${item.tokenType}::${item.index}`, error);
+            return false;
+          }
+        })
+      );
+      written += results.filter(Boolean).length;
+    }
+    return written;
+  }
+
+  /**
+   * Writes the metadata of an item read from the database, e.g. after an update
+   * @param id item id
+   */
+  async publishById(id: string): Promise<number> {
+    if (!ObjectId.isValid(id)) return 0;
+    const item = await this.mongodb.collection(this.table).findOne({ _id: new ObjectId(id) });
+    return item ? this.publish([item]) : 0;
+  }
+
+  /**
+   * Removes the metadata of a deleted item, never throws
+   * @param item
+   */
+  async unpublish(item: Partial<INFT>): Promise<void> {
+    try {
+      await S3deleteObject(metadataKey(item.tokenType, item.index));
+    } catch (error) {
+      console.log(`TokenMetadataController::unpublish::${item.tokenType}::${item.index}`, error);
+    }
+  }
+
+  /**
+   * Writes the metadata of every item
+   * @returns number of metadata written
+   */
+  async backfill(): Promise<number> {
+    const cursor = this.mongodb
+      .collection(this.table)
+      .find(
+        { index: { $ne: null }, tokenType: { $ne: null } },
+        { projection: { tokenType: 1, index: 1, name: 1, description: 1, artURI: 1, properties: 1 } }
+      );
+    let batch = [];
+    let written = 0;
+    while (await cursor.hasNext()) {
+      batch.push(await cursor.next());
+      if (batch.length >= BACKFILL_CONCURRENCY * 10) {
+        written += await this.publish(batch);
+        batch = [];
+      }
+    }
+    written += await this.publish(batch);
+    return written;
+  }
+}
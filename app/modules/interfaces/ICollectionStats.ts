@@ -0,0 +1,10 @@
+import { ObjectId } from "mongodb";
+
+export interface ICollectionStats {
+  _id: ObjectId; // same id as the collection
+  collection: string; // collection id
+  items: number; // nft items in the collection
+  owners: number; // distinct owners of the items
+  floorPrice: number; // lowest active listing price
+  updatedAt: number; // date of the last refresh
+}
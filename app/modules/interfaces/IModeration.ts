@@ -0,0 +1,17 @@
+export enum ModerationStatus {
+  PENDING = <any>"PENDING", // waiting for the moderation worker
+  APPROVED = <any>"APPROVED", // no moderation label found
+  FLAGGED = <any>"FLAGGED", // moderation labels found, marked explicit
+  SKIPPED = <any>"SKIPPED", // media that can't be moderated (video, audio, too large)
+}
+
+export enum ModerationTarget {
+  NFT = <any>"NFT",
+  COLLECTION = <any>"NFTCollection",
+}
+
+export interface IModerationJob {
+  target: ModerationTarget; // table of the document holding the media
+  id: string; // id of the document
+  keys: Array<string>; // keys of the uploaded media in the user bucket
+}
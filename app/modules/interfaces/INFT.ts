@@ -1,3 +1,5 @@
+import { ModerationStatus } from "./IModeration";
+
 export interface INFT {
   _id?: string; // id of nft
   collection: string; // collection contract address
@@ -13,6 +15,7 @@ export interface INFT {
   properties: Array<any>; // traits of nft item
   lockContent?: string; // content
   isExplicit: boolean; // explicit flag
+  moderationStatus?: ModerationStatus; // moderation of the uploaded art
   explicitContent?: string; // explicit content
   royalties?: number; // royalties
   saleStatus: any;
@@ -22,6 +25,8 @@ export interface INFT {
   contentType: ContentType;
   timeLeft?: string;
   tag?:Array<string>;
+  tagKeys?: Array<string>; // normalized tags
+  searchTerms?: Array<string>; // word prefixes of the name and description
   successContent?:string,
   successContentType?:string
   batchId?:string,
@@ -1,3 +1,5 @@
+import { ModerationStatus } from "./IModeration";
+
 export interface INFTCollection {
   _id?: string;
   logoUrl?: string; // uri of collection logo
@@ -14,6 +16,7 @@ export interface INFTCollection {
   blockchain: string; // blockchain
   isVerified: boolean; // verified flag
   isExplicit: boolean; // explicit flag
+  moderationStatus?: ModerationStatus; // moderation of the uploaded logo, featured and banner images
   platform: string; // platform
   properties: object;
   offerStatus: OfferStatusType;
@@ -23,6 +26,8 @@ export interface INFTCollection {
   _24hPercent?:number,
   yesterDayTrade?:number,
   tagCollection?: Array<string>;
+  tagKeys?: Array<string>; // normalized tags
+  searchTerms?: Array<string>; // word prefixes of the name, category, platform and description
 }
 
 export enum OfferStatusType {
@@ -5,10 +5,12 @@
  * @property {string} status
  * @property {number} code
  * @property {any} data
+ * @property {string} nextCursor continuation token of keyset paginated listings
  */
  export interface IResponse {
     success: boolean,
     status: string,
     code: number
     data: any
+    nextCursor?: string | Object
 }
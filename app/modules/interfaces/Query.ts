@@ -15,6 +15,8 @@ export interface IQueryFilters {
     direction?: string,
     filters?: Array<IFiltering>,
     cursor?: number,
+    after?: string, // opaque continuation token returned as `nextCursor`
+    afterItems?: string, // cursor of the items of the search listing
     amount?: number,
     page?:number,
     limit?:number,
@@ -2,7 +2,7 @@ import * as ccxt from 'ccxt';
 import { FastifyReply, FastifyRequest } from 'fastify';
 import { formatPercentage } from '../../util/formatPercent';
 import { removeScientificNotation } from '../../util/removeScientificNotation';
-import Axios from 'axios';
+import httpClient from '../../services/HttpClient';
 
 const getPriceByUSDT = async (exchangeName, quoteArray, formatedMarket) => {
   const exchange = new ccxt[exchangeName]();
@@ -411,7 +411,8 @@ export const fetchGateioMarketCandlesticks = async (
   const { currency_pair } = req.params as any;
 
   try {
-    const { data } = await Axios.get(
+    const { data } = await httpClient.get(
+      "gateio",
       `https://api.gateio.ws/api/v4/spot/candlesticks?currency_pair=${currency_pair}`
     );
     return res.send(data);
@@ -0,0 +1,17 @@
+import { FastifyReply, FastifyRequest } from "fastify";
+import metrics from "../../services/Metrics";
+
+/**
+ * Returns the prometheus metrics of this process.
+ * Only answers scrapes made inside the cluster, requests
+ * coming through the load balancer carry `x-forwarded-for`.
+ * @param {*} req
+ * @param {*} res
+ */
+export const get = async (req: FastifyRequest, res: FastifyReply) => {
+  if (req.headers["x-forwarded-for"]) {
+    return res.code(404).send();
+  }
+  const body = await metrics.expose();
+  res.header("content-type", metrics.registry.contentType).send(body);
+};
@@ -0,0 +1,10 @@
+import { get } from "./get";
+
+/**
+ * Exports the prometheus metrics route.
+ * @param {*} router
+ * @param {*} options
+ */
+export const metrics = async (router: any, options: any) => {
+  router.get("/", get);
+};
@@ -11,6 +11,12 @@ export const getCollectionsItems = async (req: FastifyRequest, res: FastifyReply
   const result = await ctl.searchCollectionsItems(keyword, filters);
   res.send(result);
 };
+export const suggestCollections = async (req: FastifyRequest, res: FastifyReply) => {
+  const { q, limit } = req.query as any;
+  const ctl = new NFTCollectionController();
+  const result = await ctl.suggestCollections(`${q ?? ""}`, limit);
+  res.send(result);
+};
 export const getCollections = async (req: FastifyRequest, res: FastifyReply) => {
   const query = req.url.split("?")[1];
   const filters = query ? parseQueryUrl(query) : null;
@@ -12,6 +12,7 @@ import {
   getTagItems,
   getBatchItem,
   getItemSimple,
+  getItemsDetail,
 } from "./item";
 
 import {
@@ -30,6 +31,7 @@ import {
   updateCollection,
   getHotCollections,
   getTagCollections,
+  suggestCollections,
 } from "./collection";
 import {
   createOwner,
@@ -57,6 +59,16 @@ import {
 } from "./activity";
 import { claimReward, getReward, getRewardAirDrop, getTest } from "./reward";
 import { sign } from "./sign";
+import {
+  activityListResponse,
+  itemKeysBody,
+  collectionItemsResponse,
+  collectionListResponse,
+  nftListResponse,
+  searchResponse,
+  withBody,
+  withResponse,
+} from "../../schemas";
 
 /**
  * Exports the nft collection actions routes.
@@ -67,24 +79,25 @@ export const nft = async (router: any, options: any) => {
   /**
    * remove auth
    */
-  router.get("/collection", getCollections);
-  router.get("/collection/top", getTopCollections);
-  router.get("/collection/hot", getHotCollections);
+  router.get("/collection", { schema: { response: collectionListResponse } }, getCollections);
+  router.get("/collection/top", { schema: { response: collectionListResponse } }, getTopCollections);
+  router.get("/collection/hot", { schema: { response: collectionListResponse } }, getHotCollections);
+  router.get("/collection/suggest", suggestCollections);
   router.get("/collection/url/:url", getCollectionByUrl);
-  router.get("/collection/:collectionId/items", getItems);
+  router.get("/collection/:collectionId/items", { schema: { response: collectionItemsResponse } }, getItems);
   router.get("/collection/:collectionId/owners", config.route("jwt"), getOwners);
-  router.get("/collection/:collectionId/history",config.route("jwt"), getActivities);
-  router.get("/collection/:collectionId/activity",config.route("jwt"), getActivities);
+  router.get("/collection/:collectionId/history", withResponse(config.route("jwt"), activityListResponse), getActivities);
+  router.get("/collection/:collectionId/activity", withResponse(config.route("jwt"), activityListResponse), getActivities);
   router.get("/collection/:collectionId/offer", config.route("jwt"), getCollectionOffer);
 
   router.get("/collection/:collectionId", config.routeParamsValidationJWT("jwt"), getCollectionDetail);
-  router.get("/collection/tag/:tag",  getTagCollections);
+  router.get("/collection/tag/:tag", { schema: { response: collectionListResponse } }, getTagCollections);
 
 
   router.delete("/collection/:collectionId", config.route("jwt"), deleteCollection);
   router.put("/collection/:collectionId", config.route("jwt"), updateCollection);
   router.post("/collection/create", config.route("jwt"), createCollection);
-  router.get("/activity",config.route("jwt"), getAllActivites);
+  router.get("/activity", withResponse(config.route("jwt"), activityListResponse), getAllActivites);
   router.delete("/activity/:id", config.route("jwt"), deleteActivityId);
   router.post("/activity/listForSale", config.route("jwt"), listForSale);
   router.post("/activity/listForSale/:batchId", config.route("jwt"), listForSaleBatch);
@@ -98,14 +111,15 @@ export const nft = async (router: any, options: any) => {
   router.post("/activity/cancelCollectionOffer", config.route("jwt"), cancelCollectionOffer);
   router.post("/activity/signOffer", config.route("jwt"), signOffer);
 
-  router.get("/items", config.routeParamsValidationJWT("jwt"), getAllItems);
-  router.get("/items/trending", config.routeParamsValidationJWT("jwt"),getTrendingItems);
-  router.get("/items/tag/:tag",config.routeParamsValidationJWT("jwt"), getTagItems);
+  router.get("/items", withResponse(config.routeParamsValidationJWT("jwt"), nftListResponse), getAllItems);
+  router.get("/items/trending", withResponse(config.routeParamsValidationJWT("jwt"), nftListResponse), getTrendingItems);
+  router.get("/items/tag/:tag", withResponse(config.routeParamsValidationJWT("jwt"), nftListResponse), getTagItems);
   router.get("/items/chain/:blockchain/:tokenId",config.routeParamsValidation(), getItemSimple);
   router.post("/items/create", config.route("jwt"), createItem);
   router.get("/items/batch/:batchId", getBatchItem)
   router.post("/items/batch-upload", config.route("jwt"), batchUpload);
 
+  router.post("/items/bulk", withBody(withResponse(config.routeParamsValidationJWT("jwt"), nftListResponse), itemKeysBody), getItemsDetail);
   router.get("/items/:collectionId/:nftId/history",config.routeParamsValidation(), getItemHistory);
   router.get("/items/:collectionId/:nftId/offers", config.routeParamsValidation(), getItemOffers);
   router.get("/items/:collectionId/:nftId", config.routeParamsValidationJWT("jwt"), getItemDetail);
@@ -117,12 +131,12 @@ export const nft = async (router: any, options: any) => {
   router.post("/owners/:ownerId/upload-profile", config.route("jwt"), uploadOwnerPhoto);
   router.put("/owners/:ownerId", config.route("jwt"), updateOwner);
   router.get("/owners/:ownerId", getOwner);
-  router.get("/owners/:ownerId/nfts", config.routeParamsValidationJWT("jwt"), getOwnerNtfs);
-  router.get("/owners/:ownerId/history",  config.routeParamsValidationJWT("jwt"), getOwnerHistory);
-  router.get("/owners/:ownerId/collection", config.routeParamsValidationJWT("jwt"), getOwnerCollection);
-  router.get("/owners/:ownerId/offers",  config.routeParamsValidationJWT("jwt"), getOwnerOffers);
+  router.get("/owners/:ownerId/nfts", withResponse(config.routeParamsValidationJWT("jwt"), nftListResponse), getOwnerNtfs);
+  router.get("/owners/:ownerId/history", withResponse(config.routeParamsValidationJWT("jwt"), activityListResponse), getOwnerHistory);
+  router.get("/owners/:ownerId/collection", withResponse(config.routeParamsValidationJWT("jwt"), collectionListResponse), getOwnerCollection);
+  router.get("/owners/:ownerId/offers", withResponse(config.routeParamsValidationJWT("jwt"), activityListResponse), getOwnerOffers);
 
-  router.get("/search", getCollectionsItems);
+  router.get("/search", { schema: { response: searchResponse } }, getCollectionsItems);
   router.get("/rewards/:walletId", config.route("jwt"), getReward);
   router.get("/rewards/airdrop/:walletId",config.route("jwt"), getRewardAirDrop);
   router.post("/rewardsClaim", config.route("jwt"), claimReward);
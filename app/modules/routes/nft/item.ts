@@ -27,6 +27,15 @@ export const getItemSimple = async (req: FastifyRequest, res: FastifyReply) => {
   res.send(result);
 };
 
+export const getItemsDetail = async (req: FastifyRequest, res: FastifyReply) => {
+  const { items } = req.body as { items: Array<{ collectionId: string; nftId: number }> };
+  const user = req["session"] as any;
+  const owner = user && user.walletId ? user.walletId.toLowerCase() : null;
+  const ctl = new NFTController();
+  const result = await ctl.getItemsDetail(items, owner);
+  res.send(result);
+};
+
 
 export const getItemHistory = async (req: FastifyRequest, res: FastifyReply) => {
   const { collectionId, nftId } = req.params as { collectionId: string; nftId: number };
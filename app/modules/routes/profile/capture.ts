@@ -0,0 +1,41 @@
+import { FastifyReply, FastifyRequest } from "fastify";
+import { config } from "../../../config/config";
+import profiler from "../../services/Profiler";
+import { respond } from "../../util/respond";
+
+/**
+ * Captures a CPU profile or a heap snapshot of the pod serving the request
+ * and uploads it to the profile bucket. Restricted to the admin wallets.
+ * Method: POST
+ *
+ * @param {*} req
+ *    kind:     cpu | heap
+ *    seconds:  duration of the cpu profile
+ * @param {*} res
+ *    success:  200 (pod, bucket and key of the profile)
+ *    fail:     400, 403, 409, 500
+ */
+export const capture = async (req: FastifyRequest, res: FastifyReply) => {
+  const walletId = (req["session"] as any)?.walletId?.toLowerCase();
+  if (!walletId || !config.profiling.adminWallets.includes(walletId)) {
+    return res.code(403).send(respond("Forbidden", true, 403));
+  }
+
+  const { kind } = req.params as any;
+  if (!["cpu", "heap"].includes(kind)) {
+    return res.code(400).send(respond("Profile kind must be cpu or heap", true, 400));
+  }
+  if (!config.profiling.bucket) {
+    return res.code(500).send(respond("Profile bucket is not configured", true, 500));
+  }
+  if (profiler.running) {
+    return res.code(409).send(respond("A profile is already being captured", true, 409));
+  }
+
+  try {
+    const result = await profiler.capture(kind, (req.body as any)?.seconds);
+    res.send(respond(result));
+  } catch (error) {
+    res.code(500).send(respond(`${error.message}`, true, 500));
+  }
+};
@@ -0,0 +1,11 @@
+import { config } from "../../../config/config";
+import { capture } from "./capture";
+
+/**
+ * Exports the profiling routes
+ * @param {*} router
+ * @param {*} options
+ */
+export const profile = async (router, options) => {
+  router.post("/:kind", config.route("jwt"), capture);
+};
@@ -13,6 +13,8 @@ import { contract } from './contract';
 import { test } from './test/index';
 import { nft } from './nft/index';
 import { tokenUri } from './tokenUri';
+import { metrics } from './metrics';
+import { profile } from './profile';
 
 /**
  * Creates the array of routes to be set up.
@@ -37,6 +39,8 @@ export function routes(app: any): Array<Promise<any>> {
     app.register(contract, { prefix: 'ws/v2/sign' }),
     // app.register(test, { prefix: 'ws/v2/test'}),
     app.register(nft, { prefix: 'ws/v2/nft'}),
-    app.register(tokenUri,{prefix:'/'})
+    app.register(tokenUri,{prefix:'/'}),
+    app.register(metrics, { prefix: 'metrics' }),
+    app.register(profile, { prefix: 'ws/v2/profile' })
   ];
 }
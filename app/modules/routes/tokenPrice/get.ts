@@ -1,8 +1,8 @@
 import * as ccxt from "ccxt";
-import Axios from "axios";
 import { FastifyReply, FastifyRequest } from "fastify";
 
 import binanceService from "../../services/BinanceService";
+import httpClient from "../../services/HttpClient";
 
 const UniswapV2API =
   "https://api.thegraph.com/subgraphs/name/uniswap/uniswap-v2";
@@ -20,16 +20,16 @@ const getPriceFromUniswap = async (address: string) => {
         bundle: { ethPrice },
       },
     },
-  } = await await Axios.post(UniswapV2API, {
+  } = await httpClient.post("uniswap", UniswapV2API, {
     query: `{bundle(id: 1) { id ethPrice } }`,
   });
 
-  const { data: v2Data } = await Axios.post(UniswapV2API, {
+  const { data: v2Data } = await httpClient.post("uniswap", UniswapV2API, {
     query: `{token(id: "${address}") { id derivedETH } }`,
   });
 
   if (v2Data.errors || !v2Data.data.token) {
-    const { data: v3Data } = await Axios.post(UniswapV3API, {
+    const { data: v3Data } = await httpClient.post("uniswap", UniswapV3API, {
       query: `{token(id: "${address}") { id derivedETH } }`,
     });
 
@@ -42,11 +42,47 @@ const getPriceFromUniswap = async (address: string) => {
   return 0;
 };
 
+/**
+ * Prices of many tokens with one query per subgraph, v3 only being asked for the tokens missing from v2
+ * @param addresses token addresses
+ * @returns usd price per lower cased address, 0 when unknown
+ */
+const getPricesFromUniswap = async (addresses: string[]) => {
+  const ids = Array.from(
+    new Set(addresses.filter((address) => /^0x[a-fA-F0-9]{40}$/.test(`${address}`)).map((address) => address.toLowerCase()))
+  );
+  const prices: { [address: string]: number } = {};
+  if (!ids.length) {
+    return prices;
+  }
+  const tokensQuery = `tokens(first: ${ids.length}, where: { id_in: ${JSON.stringify(ids)} }) { id derivedETH }`;
+
+  const { data: v2Data } = await httpClient.post("uniswap", UniswapV2API, {
+    query: `{ bundle(id: 1) { ethPrice } ${tokensQuery} }`,
+  });
+  const ethPrice = Number(v2Data.data?.bundle?.ethPrice);
+  (v2Data.data?.tokens ?? []).forEach((token) => {
+    prices[token.id] = ethPrice * Number(token.derivedETH);
+  });
+
+  const missing = ids.filter((id) => !prices[id]);
+  if (missing.length) {
+    const { data: v3Data } = await httpClient.post("uniswap", UniswapV3API, {
+      query: `{ tokens(first: ${missing.length}, where: { id_in: ${JSON.stringify(missing)} }) { id derivedETH } }`,
+    });
+    (v3Data.data?.tokens ?? []).forEach((token) => {
+      prices[token.id] = ethPrice * Number(token.derivedETH);
+    });
+  }
+  ids.forEach((id) => (prices[id] = prices[id] || 0));
+  return prices;
+};
+
 const getPoolTokenPriceUniswap = async (address: string) => {
   if (!address) {
     return 0;
   }
-  const { data: v2Data } = await Axios.post(UniswapV2API, {
+  const { data: v2Data } = await httpClient.post("uniswap", UniswapV2API, {
     query: `{pair(id: "${address}") { totalSupply, reserveUSD } }`,
   });
   return (
@@ -107,13 +143,13 @@ export const getTokenUsdtPrices = async (
       parsedTickers[key.split(/\/|\-/)[0]] = allTickers[key].average;
     });
 
-    for (let i = 0; i < quotes.length; i++) {
-      if (!parsedTickers[quotes[i]]) {
-        parsedTickers = {
-          ...parsedTickers,
-          [quotes[i]]: await getPriceFromUniswap(addresses[i]),
-        };
-      }
+    // quotes missing from binance are priced from uniswap in one batch
+    const missing = quotes.map((quote, i) => i).filter((i) => !parsedTickers[quotes[i]]);
+    if (missing.length) {
+      const uniswapPrices = await getPricesFromUniswap(missing.map((i) => addresses?.[i]));
+      missing.forEach((i) => {
+        parsedTickers[quotes[i]] = uniswapPrices[`${addresses?.[i]}`.toLowerCase()] ?? 0;
+      });
     }
 
     res.send(parsedTickers);
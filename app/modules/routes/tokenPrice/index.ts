@@ -1,3 +1,4 @@
+import { tokenPricesBody, withBody } from "../../schemas";
 import { getTokenUsdtPrice, getTokenUsdtPrices } from "./get";
 
 /**
@@ -8,5 +9,5 @@ import { getTokenUsdtPrice, getTokenUsdtPrices } from "./get";
 export const tokenPrice = async (router: any, options: any) => {
   router.get("/:symbol/:address", getTokenUsdtPrice);
   router.get("/:symbol", getTokenUsdtPrice);
-  router.post("/", getTokenUsdtPrices);
+  router.post("/", withBody({}, tokenPricesBody), getTokenUsdtPrices);
 };
@@ -3,9 +3,14 @@ import { config } from "../../../config/config";
 import { NFTCollectionController } from "../../controller/NFTCollectionController";
 import { NFTController } from "../../controller/NFTController";
 import { parseQueryUrl } from "../../util/parse-query-url";
+import { metadataUrl } from "../../util/token-metadata";
 
 export const getTokenURI = async (req,res) => {
     const { contract, nftId } = req.params as { contract: string; nftId: number };
+    // served by the cdn once the static metadata is backfilled
+    if (config.tokenMetadata.redirect) {
+        return res.header("Cache-Control", config.tokenMetadata.cacheControl).redirect(302, metadataUrl(contract, nftId));
+    }
     const ctl = new NFTController();
  
     
@@ -25,3 +30,11 @@ export const getTokenURI = async (req,res) => {
 
 
   };
+
+export const getTokenURIs = async (req, res) => {
+    const { contract } = req.params as { contract: string };
+    const { ids } = req.body as { ids: Array<number> };
+    const ctl = new NFTController();
+    const result = await ctl.getItemsSimple(contract, ids);
+    return res.send(result);
+};
@@ -1,7 +1,9 @@
 import { config } from "../../../config/config";
-import { getTokenURI } from "./getTokenUri";
+import { tokenIdsBody, withBody } from "../../schemas";
+import { getTokenURI, getTokenURIs } from "./getTokenUri";
 
 
 export const tokenUri = async (router: any, options: any) => {
     router.get("/nft/:contract/:nftId",config.routeParamsValidation(), getTokenURI);
+    router.post("/nft/:contract", withBody(config.routeParamsValidation(), tokenIdsBody), getTokenURIs);
 }
\ No newline at end of file
@@ -0,0 +1,33 @@
+import { IActivity } from "../interfaces/IActivity";
+import { anyValue, entity, list, nullableBoolean, nullableNumber, nullableString } from "./common";
+
+/**
+ * Serialized fields of `IActivity`, typed by the interface so a field
+ * added to the interface can't be forgotten here.
+ * `collection` is replaced by the collection document in some listings.
+ */
+const activityProperties: Record<keyof Required<IActivity>, Object> = {
+  _id: nullableString,
+  collection: anyValue,
+  nftId: nullableNumber,
+  type: nullableString,
+  price: nullableNumber,
+  from: nullableString,
+  to: nullableString,
+  by: nullableString,
+  date: nullableNumber,
+  startDate: nullableNumber,
+  endDate: nullableNumber,
+  fee: nullableNumber,
+  nonce: nullableNumber,
+  signature: anyValue,
+  active: nullableBoolean,
+  offerCollection: nullableNumber,
+  batchId: nullableString,
+  netPrice: nullableNumber,
+  fromListener: nullableBoolean,
+};
+
+export const activitySchema = entity(activityProperties);
+
+export const activityListResponse = list(activitySchema);
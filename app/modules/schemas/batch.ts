@@ -0,0 +1,55 @@
+/**
+ * Request bodies of the batch routes
+ *
+ * A page resolves all of its cards with one request instead of one per
+ * card, the size of a batch is bounded to keep a single request cheap.
+ */
+export const MAX_BATCH_SIZE = 100;
+
+const tokenId = { type: "integer", minimum: 0 };
+
+/**
+ * `{ items: [{ collectionId, nftId }] }`
+ */
+export const itemKeysBody = {
+  type: "object",
+  required: ["items"],
+  properties: {
+    items: {
+      type: "array",
+      minItems: 1,
+      maxItems: MAX_BATCH_SIZE,
+      items: {
+        type: "object",
+        required: ["collectionId", "nftId"],
+        properties: {
+          collectionId: { type: "string", pattern: "^[a-fA-F0-9]{24}$" },
+          nftId: tokenId,
+        },
+      },
+    },
+  },
+};
+
+/**
+ * `{ ids: [tokenId] }`
+ */
+export const tokenIdsBody = {
+  type: "object",
+  required: ["ids"],
+  properties: {
+    ids: { type: "array", minItems: 1, maxItems: MAX_BATCH_SIZE, items: tokenId },
+  },
+};
+
+/**
+ * `{ quotes: [symbol], addresses: [address] }`, the address of a quote being at its index
+ */
+export const tokenPricesBody = {
+  type: "object",
+  required: ["quotes"],
+  properties: {
+    quotes: { type: "array", minItems: 1, maxItems: MAX_BATCH_SIZE, items: { type: "string" } },
+    addresses: { type: "array", maxItems: MAX_BATCH_SIZE, items: { type: "string", nullable: true } },
+  },
+};
@@ -0,0 +1,61 @@
+import { INFTCollection } from "../interfaces/INFTCollection";
+import { SearchField } from "../util/search-helper";
+import { anyValue, entity, envelope, list, nullableBoolean, nullableNumber, nullableString } from "./common";
+import { nftSchema } from "./nft";
+
+/**
+ * Serialized fields of `INFTCollection`, typed by the interface so a field
+ * added to the interface can't be forgotten here; the search fields aren't sent
+ */
+const collectionProperties: Record<keyof Omit<Required<INFTCollection>, SearchField>, Object> = {
+  _id: nullableString,
+  logoUrl: nullableString,
+  featuredUrl: nullableString,
+  bannerUrl: nullableString,
+  name: nullableString,
+  creator: nullableString,
+  contract: nullableString,
+  url: nullableString,
+  description: nullableString,
+  category: nullableString,
+  links: anyValue,
+  creatorEarning: nullableNumber,
+  blockchain: nullableString,
+  isVerified: nullableBoolean,
+  isExplicit: anyValue,
+  moderationStatus: nullableString,
+  platform: nullableString,
+  properties: anyValue,
+  offerStatus: nullableString,
+  volume: nullableNumber,
+  floorPrice: nullableNumber,
+  _24h: nullableNumber,
+  _24hPercent: nullableNumber,
+  yesterDayTrade: nullableNumber,
+  tagCollection: anyValue,
+};
+
+export const collectionSchema = entity(collectionProperties);
+
+/** Collection with its precomputed stats and creator, see `findCollectionsWithStats` */
+export const collectionListingSchema = entity({
+  ...collectionProperties,
+  creatorDetail: anyValue,
+  owners: nullableNumber,
+  items: nullableNumber,
+});
+
+export const collectionListResponse = list(collectionListingSchema);
+
+/** Collection with a page of its items */
+export const collectionItemsResponse = envelope(
+  entity({ ...collectionProperties, nfts: { type: "array", items: nftSchema } })
+);
+
+/** Keyword search, one list of collections and one of items */
+export const searchResponse = envelope(
+  entity({
+    collections: { type: "array", items: collectionListingSchema },
+    items: { type: "array", items: nftSchema },
+  })
+);
@@ -0,0 +1,65 @@
+/**
+ * Building blocks of the response schemas
+ *
+ * A response schema lets Fastify serialize the replies with the serializer
+ * compiled from the schema instead of the generic `JSON.stringify`.
+ * The entity schemas keep `additionalProperties`, so the fields added
+ * by the controllers to a listing are still sent (with `JSON.stringify`).
+ * Fields whose stored type varies (user input, legacy documents) are
+ * declared with the empty schema, which serializes any value as is.
+ * The batch routes also declare their request body (see `batch`).
+ */
+export const anyValue = {};
+export const nullableString = { type: "string", nullable: true };
+export const nullableNumber = { type: "number", nullable: true };
+export const nullableBoolean = { type: "boolean", nullable: true };
+
+export const entity = (properties: Object) => ({
+  type: "object",
+  properties,
+  additionalProperties: true,
+});
+
+/**
+ * Response of `respond` and of the listings, `count` and `currentPage` being the paging of the listings
+ * @param data schema of the payload
+ * @returns the `response` of a route schema
+ */
+export const envelope = (data: Object) => ({
+  200: {
+    type: "object",
+    properties: {
+      success: { type: "boolean" },
+      status: { type: "string" },
+      code: { type: "number" },
+      count: nullableNumber,
+      currentPage: nullableNumber,
+      nextCursor: anyValue,
+      data,
+    },
+  },
+});
+
+export const list = (items: Object) => envelope({ type: "array", items });
+
+/**
+ * Adds a response schema to the options of a route
+ * @param options route options, e.g. `config.route("jwt")`
+ * @param response response schema
+ * @returns
+ */
+export const withResponse = (options: any, response: Object) => ({
+  ...options,
+  schema: { ...(options?.schema ?? {}), response },
+});
+
+/**
+ * Adds a request body schema to the options of a route
+ * @param options route options
+ * @param body body schema
+ * @returns
+ */
+export const withBody = (options: any, body: Object) => ({
+  ...options,
+  schema: { ...(options?.schema ?? {}), body },
+});
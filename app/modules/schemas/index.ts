@@ -0,0 +1,5 @@
+export * from "./common";
+export * from "./nft";
+export * from "./collection";
+export * from "./activity";
+export * from "./batch";
@@ -0,0 +1,43 @@
+import { INFT } from "../interfaces/INFT";
+import { SearchField } from "../util/search-helper";
+import { anyValue, entity, envelope, list, nullableNumber, nullableString } from "./common";
+
+/**
+ * Serialized fields of `INFT`, typed by the interface so a field added
+ * to the interface can't be forgotten here; the search fields aren't sent
+ */
+const nftProperties: Record<keyof Omit<Required<INFT>, SearchField>, Object> = {
+  _id: nullableString,
+  collection: nullableString,
+  index: nullableNumber,
+  owner: nullableString,
+  owners: anyValue,
+  creator: nullableString,
+  artURI: nullableString,
+  name: nullableString,
+  price: nullableNumber,
+  externalLink: nullableString,
+  description: nullableString,
+  properties: anyValue,
+  lockContent: anyValue,
+  isExplicit: anyValue,
+  moderationStatus: nullableString,
+  explicitContent: nullableString,
+  royalties: nullableNumber,
+  saleStatus: nullableString,
+  mintStatus: nullableString,
+  status_date: nullableNumber,
+  tokenType: nullableString,
+  contentType: nullableString,
+  timeLeft: nullableString,
+  tag: anyValue,
+  successContent: nullableString,
+  successContentType: anyValue,
+  batchId: nullableString,
+  fee: nullableNumber,
+};
+
+export const nftSchema = entity(nftProperties);
+
+export const nftListResponse = list(nftSchema);
+export const nftResponse = envelope(nftSchema);
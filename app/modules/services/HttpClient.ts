@@ -0,0 +1,226 @@
+import Axios, { AxiosRequestConfig, AxiosResponse } from "axios";
+import * as http from "http";
+import * as https from "https";
+import { config } from "../../config/config";
+import metrics from "./Metrics";
+
+export interface IUpstreamOptions {
+  // ms before a call fails
+  timeout: number;
+  // calls in flight, the next ones wait for a slot
+  maxConcurrent: number;
+  // calls waiting for a slot, the next ones are rejected
+  maxQueued: number;
+  // consecutive failures opening the circuit
+  failureThreshold: number;
+  // ms the circuit stays open before a trial call
+  resetTimeout: number;
+}
+
+/**
+ * Thrown without calling the upstream, when its circuit is open or its queue is full
+ */
+export class UpstreamUnavailableError extends Error {
+  constructor(public upstream: string, reason: string) {
+    super(`${upstream} is unavailable: ${reason}`);
+    this.name = "UpstreamUnavailableError";
+  }
+}
+
+/**
+ * Network errors, timeouts, 429 and 5xx count as failures of the upstream, other 4xx are the caller's
+ */
+const isHttpFailure = (error: any): boolean =>
+  !error?.response || error.response.status === 429 || error.response.status >= 500;
+
+/**
+ * Concurrency limit and circuit breaker of one upstream
+ */
+class Upstream {
+  private active = 0;
+  private waiting: Array<() => void> = [];
+  private failures = 0;
+  private openedAt = 0;
+  private probing = false;
+
+  constructor(private name: string, readonly options: IUpstreamOptions) {}
+
+  async run<T>(operation: string, fn: () => Promise<T>, isFailure: (error: any) => boolean): Promise<T> {
+    this.admit();
+    await this.acquire();
+    try {
+      const result = await metrics.time(this.name, operation, fn);
+      this.succeeded();
+      return result;
+    } catch (error) {
+      isFailure(error) ? this.failed() : this.succeeded();
+      throw error;
+    } finally {
+      this.release();
+    }
+  }
+
+  /**
+   * Rejects the calls while the circuit is open, then lets a single trial call through
+   */
+  private admit() {
+    if (!this.openedAt) return;
+    if (this.probing || Date.now() - this.openedAt < this.options.resetTimeout) {
+      metrics.observeOutboundRejection(this.name, "circuit_open");
+      throw new UpstreamUnavailableError(this.name, "circuit open");
+    }
+    this.probing = true;
+  }
+
+  private async acquire() {
+    if (this.active < this.options.maxConcurrent) {
+      this.active++;
+      return;
+    }
+    if (this.waiting.length >= this.options.maxQueued) {
+      this.probing = false;
+      metrics.observeOutboundRejection(this.name, "queue_full");
+      throw new UpstreamUnavailableError(this.name, "too many queued calls");
+    }
+    // the slot is handed over by `release`
+    await new Promise<void>((resolve) => this.waiting.push(resolve));
+  }
+
+  private release() {
+    const next = this.waiting.shift();
+    if (next) next();
+    else this.active--;
+  }
+
+  private succeeded() {
+    if (this.openedAt) metrics.observeCircuit(this.name, false);
+    this.failures = 0;
+    this.openedAt = 0;
+    this.probing = false;
+  }
+
+  private failed() {
+    this.failures++;
+    if (this.probing || this.failures >= this.options.failureThreshold) {
+      if (!this.openedAt) metrics.observeCircuit(this.name, true);
+      this.openedAt = Date.now();
+      this.probing = false;
+    }
+  }
+}
+
+/**
+ * Client of the outbound calls
+ *
+ * Every upstream (recaptcha, opensea, uniswap, moralis, each ccxt
+ * exchange...) is called through shared keep-alive agents, with its own
+ * concurrency limit, timeout and circuit breaker (see `config.outbound`).
+ * The latency of the calls is recorded per upstream by `Metrics`.
+ *
+ * ----
+ * Example usage:
+ *
+ * import httpClient from "../services/HttpClient";
+ *
+ * const { data } = await httpClient.post("uniswap", UniswapV2API, { query });
+ * const file = await httpClient.call("moralis", "saveIPFS", () => file.saveIPFS());
+ */
+export class HttpClient {
+  readonly httpAgent = new http.Agent({
+    keepAlive: true,
+    maxSockets: config.outbound.maxSockets,
+    maxFreeSockets: config.outbound.maxFreeSockets,
+  });
+  readonly httpsAgent = new https.Agent({
+    keepAlive: true,
+    maxSockets: config.outbound.maxSockets,
+    maxFreeSockets: config.outbound.maxFreeSockets,
+  });
+  private axios = Axios.create({ httpAgent: this.httpAgent, httpsAgent: this.httpsAgent });
+  private upstreams = new Map<string, Upstream>();
+
+  /**
+   * Sends an HTTP request to the upstream
+   * @param upstream upstream name, selects the limits of `config.outbound.upstreams`
+   * @param request axios request, its `timeout` defaults to the upstream one
+   * @param operation metrics label, the HTTP method by default
+   * @returns
+   */
+  request<T = any>(upstream: string, request: AxiosRequestConfig, operation?: string): Promise<AxiosResponse<T>> {
+    const target = this.upstreamOf(upstream);
+    return target.run(
+      operation ?? `${request.method ?? "GET"}`.toUpperCase(),
+      () => this.axios.request<T>({ timeout: target.options.timeout, ...request }),
+      isHttpFailure
+    );
+  }
+
+  get<T = any>(upstream: string, url: string, request?: AxiosRequestConfig): Promise<AxiosResponse<T>> {
+    return this.request<T>(upstream, { ...request, method: "GET", url });
+  }
+
+  post<T = any>(upstream: string, url: string, data?: any, request?: AxiosRequestConfig): Promise<AxiosResponse<T>> {
+    return this.request<T>(upstream, { ...request, method: "POST", url, data });
+  }
+
+  /**
+   * Guards a call made with an SDK (Moralis...) with the limits of the upstream.
+   * On timeout the caller gets an error, the SDK call itself isn't cancelled.
+   * @param upstream
+   * @param operation
+   * @param fn the call
+   * @param isFailure errors counting as failures of the upstream, all of them by default
+   * @returns the call result
+   */
+  call<T>(upstream: string, operation: string, fn: () => Promise<T>, isFailure: (error: any) => boolean = () => true): Promise<T> {
+    const target = this.upstreamOf(upstream);
+    return target.run(operation, () => withTimeout(fn(), target.options.timeout, upstream), isFailure);
+  }
+
+  /**
+   * Sends every ccxt request through the shared agents and the limits of its exchange (`ccxt.<id>` upstream).
+   * All of them go through `Exchange.fetch`, so the prototype is wrapped once.
+   * Only the network errors of ccxt count as failures, not the exchange errors (bad symbol, balance...).
+   * @param ccxt the ccxt module
+   */
+  instrumentCcxt(ccxt: any) {
+    const proto = ccxt.Exchange?.prototype;
+    if (!proto || proto.__httpClient) return;
+    const fetch = proto.fetch;
+    const self = this;
+    const isFailure = (error) => error instanceof ccxt.NetworkError;
+    proto.fetch = function (url, method = "GET", ...args) {
+      // the exchange apis are served over https
+      if (!this.agent) this.agent = self.httpsAgent;
+      return self.upstreamOf(`ccxt.${this.id}`).run(method, () => fetch.call(this, url, method, ...args), isFailure);
+    };
+    proto.__httpClient = true;
+  }
+
+  private upstreamOf(name: string): Upstream {
+    if (!this.upstreams.has(name)) {
+      const family = name.split(".")[0];
+      const options = {
+        ...config.outbound.defaults,
+        ...(config.outbound.upstreams[family] ?? {}),
+        ...(config.outbound.upstreams[name] ?? {}),
+      };
+      this.upstreams.set(name, new Upstream(name, options));
+    }
+    return this.upstreams.get(name);
+  }
+}
+
+function withTimeout<T>(promise: Promise<T>, ms: number, upstream: string): Promise<T> {
+  let timer: NodeJS.Timeout;
+  const timeout = new Promise<never>((_, reject) => {
+    timer = setTimeout(() => reject(new Error(`${upstream} timed out after ${ms}ms`)), ms);
+  });
+  return Promise.race([promise, timeout]).finally(() => clearTimeout(timer));
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const httpClient = new HttpClient();
+export default httpClient;
@@ -0,0 +1,99 @@
+import { hostname } from "os";
+import { config } from "../../config/config";
+
+/**
+ * Ships the pooled log entries to stdout
+ *
+ * Loggers keep pushing entries into `config.__logPool` while serving
+ * requests. This service drains the pool on a timer and writes every
+ * entry as a single JSON line, so the request path never waits on log
+ * I/O. The node log agent (Fluent Bit) collects the container output
+ * and forwards it to CloudWatch.
+ *
+ * ----
+ * Example usage:
+ *
+ * import logShipper from "./app/modules/services/LogShipper";
+ *
+ * logShipper.start();
+ * ...
+ * logShipper.stop(); // flushes whatever is left in the pool
+ */
+export class LogShipper {
+  private timer = null as NodeJS.Timeout;
+  private scheduled = false;
+  private meta = {
+    service: "depo-backend",
+    env: config.env,
+    pod: hostname(),
+    pid: process.pid,
+  };
+
+  /**
+   * Starts the periodic flush of the log pool
+   */
+  start() {
+    if (this.timer) return;
+    this.timer = setInterval(() => this.flush(), config.logShipping.interval);
+    // Never keep the process alive only to ship logs
+    this.timer.unref();
+  }
+
+  /**
+   * Stops the periodic flush and drains the pool
+   */
+  stop() {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    this.flush();
+  }
+
+  /**
+   * Flushes on the next tick when the pool reached the batch size,
+   * instead of waiting for the timer.
+   */
+  schedule() {
+    if (this.scheduled || config.__logPool.length < config.logShipping.batchSize) return;
+    this.scheduled = true;
+    setImmediate(() => {
+      this.scheduled = false;
+      this.flush();
+    });
+  }
+
+  /**
+   * Writes every pooled entry to stdout in a single write
+   */
+  flush() {
+    if (!config.__logPool.length) return;
+    const entries = config.__logPool.splice(0);
+    const lines = [];
+    entries.forEach((entry) => {
+      lines.push(this.serialize(entry));
+    });
+    process.stdout.write(`${lines.join("\n")}\n`);
+  }
+
+  /**
+   * Serializes one entry, falling back to its message when
+   * the entry can't be converted to JSON (eg. circular structures).
+   * @param entry
+   * @returns
+   */
+  private serialize(entry: any): string {
+    const level = entry.error || entry.statusCode >= 500 ? "error" : entry.statusCode >= 400 ? "warn" : "info";
+    try {
+      return JSON.stringify({ level, ...this.meta, ...entry });
+    } catch (error) {
+      return JSON.stringify({ level, ...this.meta, type: entry.type, date: entry.date, error: `${error.message}` });
+    }
+  }
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const logShipper = new LogShipper();
+export default logShipper;
@@ -0,0 +1,252 @@
+import * as client from "prom-client";
+import { MongoClient } from "mongodb";
+import { FastifyReply, FastifyRequest } from "fastify";
+
+/**
+ * Prometheus metrics of the API
+ *
+ * Keeps a dedicated registry with the default nodejs metrics (event loop
+ * lag, GC pauses, heap, handles) plus the per-route request histogram,
+ * the outbound call histogram and breaker metrics (see `HttpClient`),
+ * the MongoDB pool / command metrics and the query cache counters.
+ * The registry is exposed by the `/metrics` route, and aggregated over
+ * the cluster workers by the primary when there are several.
+ *
+ * ----
+ * Example usage:
+ *
+ * import metrics from "../services/Metrics";
+ *
+ * const tickers = await metrics.time("ccxt", "fetchTickers", () => binance.fetchTickers(symbols));
+ */
+export class Metrics {
+  registry = new client.Registry();
+
+  private httpDuration = new client.Histogram({
+    name: "http_request_duration_seconds",
+    help: "Duration of the HTTP requests served by the API",
+    labelNames: ["method", "route", "status_code"],
+    buckets: [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    registers: [this.registry],
+  });
+
+  private outboundDuration = new client.Histogram({
+    name: "outbound_request_duration_seconds",
+    help: "Duration of the calls made to upstream services",
+    labelNames: ["upstream", "operation", "outcome"],
+    buckets: [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+    registers: [this.registry],
+  });
+
+  private outboundRejections = new client.Counter({
+    name: "outbound_requests_rejected_total",
+    help: "Outbound calls rejected without calling the upstream",
+    labelNames: ["upstream", "reason"],
+    registers: [this.registry],
+  });
+
+  private outboundCircuit = new client.Gauge({
+    name: "outbound_circuit_open",
+    help: "1 while the circuit breaker of the upstream is open",
+    labelNames: ["upstream"],
+    registers: [this.registry],
+  });
+
+  private mongoCommandDuration = new client.Histogram({
+    name: "mongodb_command_duration_seconds",
+    help: "Duration of the commands sent to MongoDB",
+    labelNames: ["command", "outcome"],
+    buckets: [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+    registers: [this.registry],
+  });
+
+  private mongoCheckoutFailures = new client.Counter({
+    name: "mongodb_pool_checkout_failures_total",
+    help: "Failed attempts to check out a connection from the MongoDB pool",
+    labelNames: ["reason"],
+    registers: [this.registry],
+  });
+
+  private cacheLookups = new client.Counter({
+    name: "query_cache_lookups_total",
+    help: "Lookups in the in-process query cache",
+    labelNames: ["table", "outcome"],
+    registers: [this.registry],
+  });
+
+  private cacheEvictions = new client.Counter({
+    name: "query_cache_evictions_total",
+    help: "Entries dropped from the in-process query cache",
+    labelNames: ["table", "reason"],
+    registers: [this.registry],
+  });
+
+  private mongoPool = {
+    total: 0,
+    checkedOut: 0,
+  };
+
+  constructor() {
+    client.collectDefaultMetrics({ register: this.registry });
+    // the primary of a cluster aggregates the registries of its workers
+    client.AggregatorRegistry.setRegistries([this.registry]);
+
+    const pool = this.mongoPool;
+    new client.Gauge({
+      name: "mongodb_pool_connections",
+      help: "Open connections in the MongoDB pool",
+      registers: [this.registry],
+      collect() {
+        this.set(pool.total);
+      },
+    });
+    new client.Gauge({
+      name: "mongodb_pool_checked_out_connections",
+      help: "MongoDB pool connections in use",
+      registers: [this.registry],
+      collect() {
+        this.set(pool.checkedOut);
+      },
+    });
+  }
+
+  /**
+   * Records the duration of a served request.
+   * Routes are labelled with their declared url to keep the cardinality low.
+   * @param req
+   * @param res
+   */
+  observeRequest(req: FastifyRequest, res: FastifyReply) {
+    const route = (req as any).routerPath || (res.context?.config as any)?.url || "not_found";
+    this.httpDuration.observe(
+      { method: req.method, route, status_code: res.statusCode },
+      res.getResponseTime() / 1000
+    );
+  }
+
+  /**
+   * Times an outbound call
+   * @param upstream upstream service name (ccxt, moralis, s3...)
+   * @param operation called operation
+   * @param fn function performing the call
+   * @returns the call result
+   */
+  async time<T>(upstream: string, operation: string, fn: () => Promise<T>): Promise<T> {
+    const end = this.outboundDuration.startTimer({ upstream, operation });
+    try {
+      const result = await fn();
+      end({ outcome: "success" });
+      return result;
+    } catch (error) {
+      end({ outcome: "error" });
+      throw error;
+    }
+  }
+
+  /**
+   * Records an outbound call which was timed elsewhere
+   * @param upstream
+   * @param operation
+   * @param seconds
+   * @param outcome
+   */
+  observeOutbound(upstream: string, operation: string, seconds: number, outcome: "success" | "error") {
+    this.outboundDuration.observe({ upstream, operation, outcome }, seconds);
+  }
+
+  /**
+   * Records an outbound call rejected by the limits of its upstream
+   * @param upstream
+   * @param reason
+   */
+  observeOutboundRejection(upstream: string, reason: "circuit_open" | "queue_full") {
+    this.outboundRejections.inc({ upstream, reason });
+  }
+
+  /**
+   * Records the state of the circuit breaker of an upstream
+   * @param upstream
+   * @param open
+   */
+  observeCircuit(upstream: string, open: boolean) {
+    this.outboundCircuit.set({ upstream }, open ? 1 : 0);
+  }
+
+  /**
+   * Records a lookup in the query cache
+   * @param table
+   * @param outcome
+   */
+  observeCacheLookup(table: string, outcome: "hit" | "miss") {
+    this.cacheLookups.inc({ table, outcome });
+  }
+
+  /**
+   * Records entries dropped from the query cache
+   * @param table
+   * @param reason full cache, expired entry or write of the table
+   * @param count
+   */
+  observeCacheEviction(table: string, reason: "size" | "ttl" | "write", count = 1) {
+    this.cacheEvictions.inc({ table, reason }, count);
+  }
+
+  /**
+   * Listens to the pool and command monitoring events of the client.
+   * Command events are only emitted when the client was created with `monitorCommands`.
+   * @param mongoClient
+   */
+  instrumentMongo(mongoClient: MongoClient) {
+    const pool = this.mongoPool;
+    const started = new Map<number, { command: string; at: [number, number] }>();
+    mongoClient.on("connectionCreated", () => pool.total++);
+    mongoClient.on("connectionClosed", () => (pool.total = Math.max(pool.total - 1, 0)));
+    mongoClient.on("connectionCheckedOut", () => pool.checkedOut++);
+    mongoClient.on("connectionCheckedIn", () => (pool.checkedOut = Math.max(pool.checkedOut - 1, 0)));
+    mongoClient.on("connectionCheckOutFailed", (event) => this.mongoCheckoutFailures.inc({ reason: `${event.reason}` }));
+    mongoClient.on("commandStarted", (event) => {
+      started.set(event.requestId, { command: event.commandName, at: process.hrtime() });
+    });
+    const finish = (outcome: string) => (event) => {
+      const start = started.get(event.requestId);
+      if (!start) return;
+      started.delete(event.requestId);
+      const [s, ns] = process.hrtime(start.at);
+      this.mongoCommandDuration.observe({ command: start.command, outcome }, s + ns / 1e9);
+    };
+    mongoClient.on("commandSucceeded", finish("success"));
+    mongoClient.on("commandFailed", finish("error"));
+  }
+
+  /**
+   * Times every request sent with the aws-sdk v2 (S3, Rekognition...)
+   * @param AWS the aws-sdk module
+   */
+  instrumentAwsSdk(AWS: any) {
+    if (AWS.__metrics) return;
+    AWS.events.on("send", (res) => {
+      res.request.__startedAt = process.hrtime();
+    });
+    AWS.events.on("complete", (res) => {
+      const req = res.request;
+      if (!req.__startedAt) return;
+      const [s, ns] = process.hrtime(req.__startedAt);
+      const upstream = req.service?.serviceIdentifier ?? "aws";
+      this.observeOutbound(upstream, req.operation, s + ns / 1e9, res.error ? "error" : "success");
+    });
+    AWS.__metrics = true;
+  }
+
+  /**
+   * Returns the metrics in the prometheus text format
+   */
+  async expose(): Promise<string> {
+    return this.registry.metrics();
+  }
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const metrics = new Metrics();
+export default metrics;
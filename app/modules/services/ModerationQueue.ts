@@ -0,0 +1,130 @@
+import {
+  ChangeMessageVisibilityBatchCommand,
+  DeleteMessageBatchCommand,
+  ReceiveMessageCommand,
+  SendMessageCommand,
+  SQSClient,
+} from "@aws-sdk/client-sqs";
+import { config } from "../../config/config";
+import { IModerationJob } from "../interfaces/IModeration";
+
+export interface IModerationMessage {
+  job: IModerationJob;
+  receipt: string; // handle used to acknowledge or release the message
+}
+
+/**
+ * Queue of the uploads waiting for moderation
+ *
+ * A received message is hidden from the other consumers until it is
+ * acknowledged (deleted) or released (delivered again). A message failing
+ * too many times goes to the dead letter queue.
+ */
+export interface IModerationQueue {
+  publish(job: IModerationJob): Promise<void>;
+  receive(max: number): Promise<Array<IModerationMessage>>;
+  ack(messages: Array<IModerationMessage>): Promise<void>;
+  release(messages: Array<IModerationMessage>): Promise<void>;
+}
+
+/**
+ * Upload event queue of the region, provisioned by the backend stack.
+ * The client resolves its credentials with the default provider chain
+ * (the service account role of the pod).
+ */
+export class SqsModerationQueue implements IModerationQueue {
+  private sqs: SQSClient;
+
+  constructor(private queueUrl: string, region: string) {
+    this.sqs = new SQSClient({ region });
+  }
+
+  async publish(job: IModerationJob) {
+    await this.sqs.send(new SendMessageCommand({ QueueUrl: this.queueUrl, MessageBody: JSON.stringify(job) }));
+  }
+
+  async receive(max: number): Promise<Array<IModerationMessage>> {
+    const { Messages } = await this.sqs.send(
+      new ReceiveMessageCommand({
+        QueueUrl: this.queueUrl,
+        MaxNumberOfMessages: Math.min(max, 10),
+        WaitTimeSeconds: 20, // long polling
+      })
+    );
+    return (Messages ?? []).map((message) => ({ job: JSON.parse(message.Body), receipt: message.ReceiptHandle }));
+  }
+
+  async ack(messages: Array<IModerationMessage>) {
+    if (!messages.length) return;
+    await this.sqs.send(
+      new DeleteMessageBatchCommand({
+        QueueUrl: this.queueUrl,
+        Entries: messages.map((message, index) => ({ Id: `${index}`, ReceiptHandle: message.receipt })),
+      })
+    );
+  }
+
+  async release(messages: Array<IModerationMessage>) {
+    if (!messages.length) return;
+    await this.sqs.send(
+      new ChangeMessageVisibilityBatchCommand({
+        QueueUrl: this.queueUrl,
+        Entries: messages.map((message, index) => ({
+          Id: `${index}`,
+          ReceiptHandle: message.receipt,
+          VisibilityTimeout: 30, // backs off before the next attempt
+        })),
+      })
+    );
+  }
+}
+
+/**
+ * Local stand-in of the queue, used for development and tests
+ * when no queue url is configured
+ */
+export class MemoryModerationQueue implements IModerationQueue {
+  readonly deadLetters: Array<IModerationJob> = [];
+  private pending: Array<{ job: IModerationJob; receives: number }> = [];
+  private inFlight = new Map<string, { job: IModerationJob; receives: number }>();
+  private sequence = 0;
+
+  constructor(private maxReceives = 5) {}
+
+  get size(): number {
+    return this.pending.length + this.inFlight.size;
+  }
+
+  async publish(job: IModerationJob) {
+    this.pending.push({ job, receives: 0 });
+  }
+
+  async receive(max: number): Promise<Array<IModerationMessage>> {
+    return this.pending.splice(0, max).map((entry) => {
+      const receipt = `${++this.sequence}`;
+      this.inFlight.set(receipt, { ...entry, receives: entry.receives + 1 });
+      return { job: entry.job, receipt };
+    });
+  }
+
+  async ack(messages: Array<IModerationMessage>) {
+    messages.forEach((message) => this.inFlight.delete(message.receipt));
+  }
+
+  async release(messages: Array<IModerationMessage>) {
+    messages.forEach((message) => {
+      const entry = this.inFlight.get(message.receipt);
+      if (!entry) return;
+      this.inFlight.delete(message.receipt);
+      entry.receives >= this.maxReceives ? this.deadLetters.push(entry.job) : this.pending.push(entry);
+    });
+  }
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const moderationQueue: IModerationQueue = config.moderation.queueUrl
+  ? new SqsModerationQueue(config.moderation.queueUrl, config.moderation.region)
+  : new MemoryModerationQueue();
+export default moderationQueue;
@@ -0,0 +1,115 @@
+import { DetectModerationLabelsCommand, RekognitionClient } from "@aws-sdk/client-rekognition";
+import { GetObjectCommand, S3Client } from "@aws-sdk/client-s3";
+import { config } from "../../config/config";
+import { ModerationController } from "../controller/ModerationController";
+import moderationQueue, { IModerationMessage, IModerationQueue } from "./ModerationQueue";
+
+/**
+ * Tells if a media holds moderation labels, null when it can't be moderated
+ */
+export type ModerationDetector = (key: string) => Promise<boolean | null>;
+
+// formats and size accepted by Rekognition for the image bytes
+const MODERATED_EXTENSIONS = ["jpg", "jpeg", "png"];
+const MAX_IMAGE_BYTES = 5 * 1024 * 1024;
+
+/**
+ * Moderates the queued uploads in batches
+ *
+ * The images are read from the user bucket and sent as bytes to the
+ * Rekognition endpoint of the region of the pod, instead of pointing
+ * Rekognition to an object of a bucket of another region. A failed
+ * message is released and tried again, then lands in the dead letter
+ * queue.
+ *
+ * ----
+ * Example usage:
+ *
+ * import moderationWorker from "../services/ModerationWorker";
+ *
+ * moderationWorker.start();
+ */
+export class ModerationWorker {
+  private stopped = true;
+  private controller = new ModerationController();
+
+  constructor(private queue: IModerationQueue = moderationQueue, private detect: ModerationDetector = detectLabels) {}
+
+  /**
+   * Polls the queue until `stop` is called
+   */
+  async start() {
+    this.stopped = false;
+    while (!this.stopped) {
+      try {
+        const processed = await this.runOnce();
+        // the memory queue doesn't long poll
+        if (!processed && !config.moderation.queueUrl) await new Promise((resolve) => setTimeout(resolve, 1000));
+      } catch (error) {
+        console.log("ModerationWorker::start", error);
+        await new Promise((resolve) => setTimeout(resolve, 5000));
+      }
+    }
+  }
+
+  stop() {
+    this.stopped = true;
+  }
+
+  /**
+   * Moderates one batch of messages
+   * @returns number of messages received
+   */
+  async runOnce(): Promise<number> {
+    const messages = await this.queue.receive(config.moderation.batchSize);
+    const done: Array<IModerationMessage> = [];
+    const failed: Array<IModerationMessage> = [];
+    await Promise.all(
+      messages.map(async (message) => {
+        try {
+          const labels = await Promise.all(message.job.keys.map((key) => this.detect(key)));
+          await this.controller.applyResult(message.job, labels);
+          done.push(message);
+        } catch (error) {
+          console.log(`ModerationWorker::${message.job.target}::${message.job.id}`, error);
+          failed.push(message);
+        }
+      })
+    );
+    await this.queue.ack(done);
+    await this.queue.release(failed);
+    return messages.length;
+  }
+}
+
+const rekognition = new RekognitionClient({ region: config.moderation.region });
+const s3 = new S3Client({
+  region: config.moderation.bucketRegion,
+  ...(config.aws.s3_key
+    ? { credentials: { accessKeyId: config.aws.s3_key, secretAccessKey: config.aws.s3_secret } }
+    : {}),
+});
+
+async function detectLabels(key: string): Promise<boolean | null> {
+  const extension = key.split(".").pop().toLowerCase();
+  if (!MODERATED_EXTENSIONS.includes(extension)) return null;
+
+  const object = await s3.send(new GetObjectCommand({ Bucket: config.aws.s3_user_bucket, Key: key }));
+  if (object.ContentLength > MAX_IMAGE_BYTES) return null;
+  const chunks = [];
+  for await (const chunk of object.Body as AsyncIterable<Buffer>) chunks.push(chunk);
+
+  const { ModerationLabels } = await rekognition.send(
+    new DetectModerationLabelsCommand({
+      Image: { Bytes: Buffer.concat(chunks) },
+      MinConfidence: config.moderation.minConfidence,
+    })
+  );
+  return (ModerationLabels ?? []).length > 0;
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const moderationWorker = new ModerationWorker();
+export default moderationWorker;
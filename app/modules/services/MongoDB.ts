@@ -1,5 +1,6 @@
 import { Db, MongoClient } from "mongodb";
 import { config } from "../../config/config";
+import metrics from "./Metrics";
 
 export class MongoDBService {
   private client = null as MongoClient;
@@ -31,7 +32,9 @@ export class MongoDBService {
       useNewUrlParser: true,
       useUnifiedTopology: true,
       connectWithNoPrimary: true,
-    });
+      monitorCommands: true,
+    } as any);
+    metrics.instrumentMongo(this.client);
   }
 
   /**
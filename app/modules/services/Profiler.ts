@@ -0,0 +1,132 @@
+import { createReadStream, createWriteStream, promises as fs } from "fs";
+import { Session } from "inspector";
+import { hostname, tmpdir } from "os";
+import { join } from "path";
+import { PutObjectCommand, S3Client } from "@aws-sdk/client-s3";
+import { config } from "../../config/config";
+
+export type ProfileKind = "cpu" | "heap";
+
+/**
+ * Captures V8 profiles of the running process
+ *
+ * A CPU profile samples the main thread for a few seconds while the pod
+ * keeps serving traffic, a heap snapshot freezes the process while it is
+ * written. The capture is written to a temporary file, then uploaded to
+ * the profile bucket under `<env>/<pod>/<date>.<cpuprofile|heapsnapshot>`
+ * so it can be opened with the Chrome devtools.
+ *
+ * The S3 client resolves its credentials with the default provider chain
+ * (the pod service account role), not with the static keys of the user bucket.
+ * Only one capture runs at a time per process.
+ *
+ * ----
+ * Example usage:
+ *
+ * import profiler from "../services/Profiler";
+ *
+ * const { key } = await profiler.capture("cpu", 30);
+ */
+export class Profiler {
+  private busy = false;
+  private s3 = new S3Client({ region: config.profiling.region });
+
+  get running(): boolean {
+    return this.busy;
+  }
+
+  /**
+   * Captures a profile and uploads it
+   * @param kind cpu profile or heap snapshot
+   * @param seconds duration of the cpu profile, capped by `config.profiling.maxSeconds`
+   * @returns the bucket key of the profile
+   */
+  async capture(kind: ProfileKind, seconds = 10): Promise<{ pod: string; bucket: string; key: string }> {
+    if (this.busy) throw new Error("A profile is already being captured");
+    this.busy = true;
+
+    const pod = hostname();
+    const extension = kind === "cpu" ? "cpuprofile" : "heapsnapshot";
+    const file = join(tmpdir(), `${pod}-${Date.now()}.${extension}`);
+    const session = new Session();
+    session.connect();
+    try {
+      if (kind === "cpu") {
+        const duration = Math.min(Math.max(+seconds || 10, 1), config.profiling.maxSeconds);
+        await this.cpuProfile(session, duration, file);
+      } else {
+        await this.heapSnapshot(session, file);
+      }
+      const key = `${config.env}/${pod}/${new Date().toISOString()}.${extension}`;
+      await this.upload(file, key);
+      return { pod, bucket: config.profiling.bucket, key };
+    } finally {
+      session.disconnect();
+      await fs.unlink(file).catch(() => null);
+      this.busy = false;
+    }
+  }
+
+  /**
+   * Samples the main thread for `seconds`, the event loop keeps running meanwhile
+   * @param session
+   * @param seconds
+   * @param file
+   */
+  private async cpuProfile(session: Session, seconds: number, file: string) {
+    await this.post(session, "Profiler.enable");
+    await this.post(session, "Profiler.start");
+    await new Promise((resolve) => setTimeout(resolve, seconds * 1000));
+    const { profile } = await this.post(session, "Profiler.stop");
+    await this.post(session, "Profiler.disable");
+    await fs.writeFile(file, JSON.stringify(profile));
+  }
+
+  /**
+   * Streams a heap snapshot to `file`, chunk by chunk,
+   * to avoid holding the whole snapshot in memory
+   * @param session
+   * @param file
+   */
+  private async heapSnapshot(session: Session, file: string) {
+    const out = createWriteStream(file);
+    const written = new Promise((resolve, reject) => {
+      out.on("finish", resolve);
+      out.on("error", reject);
+    });
+    session.on("HeapProfiler.addHeapSnapshotChunk", (message) => {
+      out.write(message.params.chunk);
+    });
+    try {
+      await this.post(session, "HeapProfiler.takeHeapSnapshot", { reportProgress: false });
+    } finally {
+      out.end();
+    }
+    await written;
+  }
+
+  private async upload(file: string, key: string) {
+    const { size } = await fs.stat(file);
+    await this.s3.send(
+      new PutObjectCommand({
+        Bucket: config.profiling.bucket,
+        Key: key,
+        Body: createReadStream(file),
+        ContentLength: size,
+        ContentType: "application/json",
+      })
+    );
+  }
+
+  private post(session: Session, method: string, params?: object): Promise<any> {
+    return new Promise((resolve, reject) => {
+      session.post(method, params, (error, result) => (error ? reject(error) : resolve(result)));
+    });
+  }
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const profiler = new Profiler();
+export default profiler;
@@ -0,0 +1,176 @@
+import { ObjectId } from "mongodb";
+import { config } from "../../config/config";
+import metrics from "./Metrics";
+
+interface ICacheEntry {
+  value: any;
+  expiresAt: number;
+}
+
+/**
+ * Least recently used entries of one table, bounded in size and age
+ */
+class LruCache {
+  // a Map iterates in insertion order, the first key is the least recently used
+  private entries = new Map<string, ICacheEntry>();
+
+  constructor(private table: string, private maxEntries: number) {}
+
+  get size(): number {
+    return this.entries.size;
+  }
+
+  get(key: string): ICacheEntry {
+    const entry = this.entries.get(key);
+    if (!entry) return undefined;
+    this.entries.delete(key);
+    if (entry.expiresAt <= Date.now()) {
+      metrics.observeCacheEviction(this.table, "ttl");
+      return undefined;
+    }
+    this.entries.set(key, entry);
+    return entry;
+  }
+
+  set(key: string, value: any, ttlSeconds: number) {
+    this.entries.delete(key);
+    this.entries.set(key, { value, expiresAt: Date.now() + ttlSeconds * 1000 });
+    while (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      metrics.observeCacheEviction(this.table, "size");
+    }
+  }
+
+  clear() {
+    if (this.entries.size) metrics.observeCacheEviction(this.table, "write", this.entries.size);
+    this.entries.clear();
+  }
+}
+
+/**
+ * In-process cache of the MongoDB reads, one LRU per table
+ *
+ * Writes going through the entities clear the cache of the tables they
+ * change, the TTL bounds how long the other pods (and the writes made
+ * outside of the entities) can serve a stale read.
+ * Concurrent misses of the same key share a single query, and a read
+ * started before a write of its table is not stored.
+ *
+ * ----
+ * Example usage:
+ *
+ * import queryCache, { cacheKey } from "../services/QueryCache";
+ *
+ * const detail = await queryCache.wrap("NFTCollection", cacheKey("detail", id), 10, () => table.findOne(query));
+ */
+export class QueryCache {
+  private tables = new Map<string, LruCache>();
+  private generations = new Map<string, number>();
+  private pending = new Map<string, Promise<any>>();
+  private counters = new Map<string, { hits: number; misses: number }>();
+
+  constructor(private maxEntries: number = config.queryCache.maxEntries) {}
+
+  /**
+   * Returns the cached value of the key or loads and caches it
+   * @param table table read by `load`, invalidated by its writes
+   * @param key
+   * @param ttlSeconds
+   * @param load query of the value, a failed query is not cached
+   * @returns a copy of the value, the callers can change it
+   */
+  async wrap<T>(table: string, key: string, ttlSeconds: number, load: () => Promise<T>): Promise<T> {
+    const cache = this.cacheOf(table);
+    const counter = this.counterOf(table);
+    const entry = cache.get(key);
+    if (entry) {
+      counter.hits++;
+      metrics.observeCacheLookup(table, "hit");
+      return clone(entry.value);
+    }
+    counter.misses++;
+    metrics.observeCacheLookup(table, "miss");
+
+    const pendingKey = `${table}:${key}`;
+    let loading = this.pending.get(pendingKey);
+    if (!loading) {
+      const generation = this.generations.get(table) ?? 0;
+      loading = load()
+        .then((value) => {
+          if (value !== undefined && generation === (this.generations.get(table) ?? 0)) {
+            cache.set(key, value, ttlSeconds);
+          }
+          return value;
+        })
+        .finally(() => this.pending.delete(pendingKey));
+      this.pending.set(pendingKey, loading);
+    }
+    return clone(await loading);
+  }
+
+  /**
+   * Drops the cached reads of the tables
+   * @param tables
+   */
+  invalidate(...tables: Array<string>) {
+    tables.forEach((table) => {
+      this.generations.set(table, (this.generations.get(table) ?? 0) + 1);
+      this.tables.get(table)?.clear();
+    });
+  }
+
+  /**
+   * Entries, hits and misses per table
+   */
+  stats(): { [table: string]: { entries: number; hits: number; misses: number } } {
+    const stats = {};
+    this.counters.forEach((counter, table) => {
+      stats[table] = { entries: this.tables.get(table)?.size ?? 0, ...counter };
+    });
+    return stats;
+  }
+
+  private cacheOf(table: string): LruCache {
+    if (!this.tables.has(table)) this.tables.set(table, new LruCache(table, this.maxEntries));
+    return this.tables.get(table);
+  }
+
+  private counterOf(table: string) {
+    if (!this.counters.has(table)) this.counters.set(table, { hits: 0, misses: 0 });
+    return this.counters.get(table);
+  }
+}
+
+/**
+ * Key of a query, ObjectIds, dates and regular expressions are kept apart from plain strings
+ * @param parts query, options...
+ * @returns
+ */
+export function cacheKey(...parts: Array<any>): string {
+  return JSON.stringify(parts, function (key, value) {
+    const raw = this[key];
+    if (raw instanceof ObjectId) return { $oid: value };
+    if (raw instanceof Date) return { $date: value };
+    if (raw instanceof RegExp) return { $regex: `${raw}` };
+    return value;
+  });
+}
+
+/**
+ * Copies the arrays and plain objects, ObjectIds and dates are shared
+ */
+function clone<T>(value: T): T {
+  if (Array.isArray(value)) return value.map(clone) as any;
+  if (value && typeof value === "object" && Object.getPrototypeOf(value) === Object.prototype) {
+    const copy = {} as T;
+    Object.keys(value).forEach((key) => (copy[key] = clone(value[key])));
+    return copy;
+  }
+  return value;
+}
+
+/**
+ * Exposing this service as Singleton
+ */
+const queryCache = new QueryCache();
+export default queryCache;
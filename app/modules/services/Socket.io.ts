@@ -1,7 +1,38 @@
 import { Socket } from 'socket.io';
+import { createAdapter } from '@socket.io/redis-adapter';
+import { Emitter } from '@socket.io/redis-emitter';
+import { createClient } from 'redis';
 import { config } from '../../config/config';
 import { parseQueryUrl } from '../util/parse-query-url';
 
+/**
+ * Rooms the clients can subscribe to, the confirmed sales are pushed to `activity`
+ */
+export const ROOMS = ['activity'];
+
+/**
+ * Socket.io adapter of the websocket pods, sharing their rooms through the
+ * Redis pub/sub of `REDIS_URL`: an event emitted by a pod, or published by a
+ * REST process (see `redisEmitter`), reaches the clients of every pod.
+ */
+export async function redisAdapter() {
+    const pubClient = createClient({ url: config.realtime.redisUrl });
+    const subClient = pubClient.duplicate();
+    await Promise.all([pubClient.connect(), subClient.connect()]);
+    return createAdapter(pubClient, subClient);
+}
+
+/**
+ * Emitter of the processes without Socket.io server (the REST tier), set as
+ * `config.io` so `emit` publishes the events to the rooms of the websocket pods.
+ */
+export async function redisEmitter(): Promise<Emitter> {
+    const client = createClient({ url: config.realtime.redisUrl });
+    client.on('error', (error) => console.log('socket.io::redis emitter', error));
+    await client.connect();
+    return new Emitter(client);
+}
+
 /**
  * This function initiates the socket-client handling
  * 
@@ -38,6 +69,13 @@ async function handle(client: Socket, jwt: string): Promise<void> {
         client.on('my-event', (data) => {
             // code
         })
+        // Joins the rooms the activities and prices are pushed to
+        client.on('subscribe', (room: string) => {
+            if (ROOMS.includes(room)) client.join(room);
+        });
+        client.on('unsubscribe', (room: string) => {
+            client.leave(room);
+        });
     }
 }
 
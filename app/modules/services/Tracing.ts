@@ -0,0 +1,76 @@
+import { CompositePropagator, W3CTraceContextPropagator } from "@opentelemetry/core";
+import { OTLPTraceExporter } from "@opentelemetry/exporter-trace-otlp-grpc";
+import { AWSXRayIdGenerator } from "@opentelemetry/id-generator-aws-xray";
+import { registerInstrumentations } from "@opentelemetry/instrumentation";
+import { AwsInstrumentation } from "@opentelemetry/instrumentation-aws-sdk";
+import { FastifyInstrumentation } from "@opentelemetry/instrumentation-fastify";
+import { HttpInstrumentation } from "@opentelemetry/instrumentation-http";
+import { MongoDBInstrumentation } from "@opentelemetry/instrumentation-mongodb";
+import { AWSXRayPropagator } from "@opentelemetry/propagator-aws-xray";
+import { Resource } from "@opentelemetry/resources";
+import { BatchSpanProcessor, ParentBasedSampler, TraceIdRatioBasedSampler } from "@opentelemetry/sdk-trace-base";
+import { NodeTracerProvider } from "@opentelemetry/sdk-trace-node";
+import { SemanticResourceAttributes } from "@opentelemetry/semantic-conventions";
+
+/**
+ * OpenTelemetry tracing of the API
+ *
+ * Traces the served requests (http + fastify hooks and handlers) and the
+ * calls they make to MongoDB, the AWS SDK and every other upstream going
+ * through the node http client (Moralis, ccxt, OpenSea, Uniswap...).
+ * Spans are sent with OTLP to the collector of the node, which exports
+ * them to X-Ray, so trace ids are generated in the X-Ray format.
+ *
+ * The instrumentations patch the modules when they are required, this
+ * file must be required before anything else in `server.ts`, and it
+ * doesn't use `config` for the same reason.
+ *
+ * Tracing is only enabled when `OTEL_EXPORTER_OTLP_ENDPOINT` is set, the
+ * share of sampled root traces is given by `OTEL_TRACES_SAMPLER_ARG`.
+ * The exported provider (null when disabled) is shut down by the server
+ * when it closes, which flushes the pending spans.
+ */
+const IGNORED_PATHS = ["/", "/metrics"];
+
+if (process.env && !process.env.ENV?.match(/prod|stag/gi)) {
+  const dotenv = require("dotenv");
+  dotenv.config();
+}
+
+export function startTracing(): NodeTracerProvider {
+  if (!process.env.OTEL_EXPORTER_OTLP_ENDPOINT) return null;
+
+  const ratio = Number(process.env.OTEL_TRACES_SAMPLER_ARG ?? 0.05);
+  const provider = new NodeTracerProvider({
+    resource: new Resource({
+      [SemanticResourceAttributes.SERVICE_NAME]: process.env.OTEL_SERVICE_NAME || "depo-backend",
+      [SemanticResourceAttributes.DEPLOYMENT_ENVIRONMENT]: process.env.ENV || "staging",
+    }),
+    // Follows the decision of the caller, samples the root traces by ratio
+    sampler: new ParentBasedSampler({ root: new TraceIdRatioBasedSampler(isNaN(ratio) ? 0.05 : ratio) }),
+    idGenerator: new AWSXRayIdGenerator(),
+  });
+  provider.addSpanProcessor(new BatchSpanProcessor(new OTLPTraceExporter()));
+  provider.register({
+    propagator: new CompositePropagator({
+      propagators: [new W3CTraceContextPropagator(), new AWSXRayPropagator()],
+    }),
+  });
+
+  registerInstrumentations({
+    tracerProvider: provider,
+    instrumentations: [
+      new HttpInstrumentation({
+        ignoreIncomingRequestHook: (req) => IGNORED_PATHS.includes(req.url),
+      }),
+      new FastifyInstrumentation(),
+      new MongoDBInstrumentation(),
+      new AwsInstrumentation({ suppressInternalInstrumentation: true }),
+    ],
+  });
+
+  return provider;
+}
+
+const tracing = startTracing();
+export default tracing;
@@ -3,51 +3,9 @@ const AWS =require('aws-sdk');
 const s3_key=config.aws.s3_key;
 const s3_secret=config.aws.s3_secret;
 const s3_bucket = config.aws.s3_user_bucket;
-const cloudfront = 'https://d1ymw6k8ugpy6v.cloudfront.net';
+const cloudfront = config.aws.cdn_url;
 const configParams={accessKeyId:s3_key,secretAccessKey: s3_secret,signatureVersion: 'v4'};
-const { RekognitionClient, CompareFacesCommand ,DetectModerationLabelsCommand} = require("@aws-sdk/client-rekognition");
 
-const checkModeration=async (params,S3object)=>{
-   return new Promise((resolve, reject) => {
-      const rekognition = new AWS.Rekognition({...params,region:'us-east-1'});
-      rekognition.detectModerationLabels({
-                "Image": {
-                    "S3Object":S3object
-                },
-                "MinConfidence": 10,
-      },(err,data)=>{
-         if (data && data.ModerationLabels.length>0){
-            resolve(true)
-         }else(
-            resolve(false)
-         )
-         
-      })
-    })
-};
-export const moderationContent=async(key)=>{
-   AWS.config.update(configParams);
-   const params = {
-      Bucket: s3_bucket,
-      Key:  `${key}`,
-      ACL: 'public-read', // change to public
-   }
-   return new Promise((resolve, reject) => {
-      const rekognition = new AWS.Rekognition({...params,region:'us-east-1'});
-      rekognition.detectModerationLabels({
-                "Image": {
-                    "S3Object": {"Bucket": s3_bucket,"Name": `${key}` ,}
-                },
-                "MinConfidence": 10,
-      },(err,data)=>{
-         if (data && data.ModerationLabels.length>0){
-            resolve(true)
-         }else(
-            resolve(false)
-         )
-      })
-    })
-}
 export const S3uploadImageBase64 = async(data,fileName,contentType,folder) => {
 
       
@@ -111,3 +69,22 @@ export const S3GetSignedUrl=async(key)=>{
       }
       return url;
 }
+
+export const S3putJson = async (key: string, data: Object, cacheControl: string) => {
+    AWS.config.update(configParams);
+    const s3bucket = new AWS.S3({accessKeyId:s3_key,secretAccessKey:s3_secret});
+    await s3bucket.putObject({
+        Bucket: s3_bucket,
+        Key: key,
+        Body: JSON.stringify(data),
+        ACL: 'public-read',
+        ContentType: 'application/json',
+        CacheControl: cacheControl,
+    }).promise();
+    return `${cloudfront}/${key}`;
+}
+export const S3deleteObject = async (key: string) => {
+    AWS.config.update(configParams);
+    const s3bucket = new AWS.S3({accessKeyId:s3_key,secretAccessKey:s3_secret});
+    await s3bucket.deleteObject({ Bucket: s3_bucket, Key: key }).promise();
+}
@@ -1,23 +1,32 @@
 import { config } from "../../config/config";
+import httpClient from "../services/HttpClient";
 const Moralis = require('moralis/node');
 const serverUrl = config.moralis.server_url||"https://zuamhrw01nef.usemoralis.com:2053/server";
 const appId = config.moralis.appId|| "lkUu0BI4e5x7c1Ed1vbWR8aT2OkJguMb9cm75pBb";
 const masterKey = config.moralis.masterKey||"6E1ibTletQ4lE7MrbFlRPTQ6u37PhSQH2u8Ifwfb";
 
+// the sdk is started once per process
+let started: Promise<void>;
+const startMoralis = () => {
+  started = started ?? httpClient.call("moralis", "start", () => Moralis.start({ serverUrl, appId, masterKey }));
+  started.catch(() => (started = undefined));
+  return started;
+};
+
 export const uploadImage = async(data) => {
-  await Moralis.start({ serverUrl, appId, masterKey });
+  await startMoralis();
   const x = Array.from(Buffer.from(data.img, 'binary'));
   const contentType = data.contentType;
   const file = new Moralis.File(data.name, x, contentType);
 
   
   // const file = new Moralis.File(data.name, data.artFile);
-  await file.saveIPFS({useMasterKey:true});
+  await httpClient.call("moralis", "saveIPFS", () => file.saveIPFS({useMasterKey:true}));
   return file.url();
 }
 export const uploadImageBase64=async(data)=>{
-  await Moralis.start({ serverUrl, appId, masterKey });
+  await startMoralis();
   const file = new Moralis.File(data.name, {base64 : data.img });
-  await file.saveIPFS({useMasterKey:true});
+  await httpClient.call("moralis", "saveIPFS", () => file.saveIPFS({useMasterKey:true}));
   return file.url();
 }
\ No newline at end of file
@@ -1,4 +1,5 @@
 import { config } from "../../config/config";
+import httpClient from "../services/HttpClient";
 
 
 
@@ -6,14 +7,13 @@ import { config } from "../../config/config";
 export const recaptchaVerification=async(recaptchaResponse:string)=>{
     const secret_key = config.google_recaptcha.server;
     const urlVerification=config.google_recaptcha.urlVerification;
-    const axios = require("axios").default;
     try {
         const options = {
-            method: 'POST',
+            method: 'POST' as const,
             url: `${urlVerification}?secret=${secret_key}&response=${recaptchaResponse}`,
           };            
           
-          const res= await   axios.request(options);
+          const res= await   httpClient.request("recaptcha", options);
 
           if (res && res.status==200 && res.data && !res.data.success){
               return {
@@ -6,6 +6,7 @@ import { ActivityType, IActivity } from "../interfaces/IActivity";
 import { INFTReward } from "../interfaces/INFTReward";
 import { IResponse } from "../interfaces/IResponse";
 import { respond } from "./respond";
+import httpClient from "../services/HttpClient";
 
 export class rewardHelper extends AbstractEntity {
     protected data: INFTReward;
@@ -46,7 +47,6 @@ export class rewardHelper extends AbstractEntity {
           }
     }
     async airDropRewards(wallet:string):Promise<any>{
-        const axios = require("axios").default;
         const openSeaUrl=config.opensea.api_addr;
         const openSeaKey=config.opensea.api_key;
         const asset_owner=wallet;
@@ -54,12 +54,12 @@ export class rewardHelper extends AbstractEntity {
 
 
         const options = {
-            method: 'GET',
+            method: 'GET' as const,
             url: `${openSeaUrl}collections?asset_owner=${asset_owner}&offset=0&limit=300`,
             headers: {Accept: 'application/json', 'X-API-KEY': `${openSeaKey}`}
         };
 
-        const result = await axios.request(options);
+        const result = await httpClient.request("opensea", options);
 
         let sales=0;
         let volume=0
@@ -234,7 +234,6 @@ export class rewardHelper extends AbstractEntity {
 
 
     private async getOpenSea(startDate:number,endDate:number){
-        const axios = require("axios").default;
         const openSeaUrl=config.opensea.api_addr;
         const openSeaKey=config.opensea.api_key;
         const assetContract = '0x8002e428e9F2A19C4f78C625bda69fe70b81Ac26';
@@ -245,13 +244,13 @@ export class rewardHelper extends AbstractEntity {
         let eDate = `${date2.getFullYear()}-${date2.getMonth()+1}-${date2.getDate()} 0:0:0`
 
         const options = {
-            method: 'GET',
+            method: 'GET' as const,
             url: `${openSeaUrl}events?only_opensea=true&asset_contract_address=${assetContract}&event_type=successful&occurred_before=${sDate}&occurred_after=${eDate}`,
             headers: {Accept: 'application/json', 'X-API-KEY': `${openSeaKey}`}
         };
         let sales=1;
         let volume=1;
-        const result = await axios.request(options);
+        const result = await httpClient.request("opensea", options);
 
         if (result && result.data.length>0){
              sales = result.data.reduce((acc, obj) => {
@@ -0,0 +1,98 @@
+/**
+ * Search fields of the collections and items
+ *
+ * `searchTerms` holds every prefix of the words of the searchable texts and
+ * `tagKeys` the normalized tags, both indexed as multikey arrays, so a prefix
+ * search or a tag listing is an equality on an index instead of a regex scan.
+ * The fields are written with the documents and rebuilt by the
+ * `SearchIndexController` job.
+ */
+import { INFT } from "../interfaces/INFT";
+import { INFTCollection } from "../interfaces/INFTCollection";
+
+// prefixes between these lengths are indexed, longer search words are truncated
+export const MIN_PREFIX = 2;
+export const MAX_PREFIX = 15;
+// bounds the index entries of documents with long descriptions
+const MAX_WORDS = 64;
+
+/**
+ * Lower cased words without accents, split on whitespace and ascii punctuation
+ * (other scripts, e.g. hangul, are kept as they are)
+ * @param text
+ * @returns
+ */
+export const searchWords = (text: string): Array<string> => {
+  if (!text || typeof text !== "string") return [];
+  return text
+    .normalize("NFD")
+    .replace(/[\u0300-\u036f]/g, "")
+    .normalize("NFC")
+    .toLowerCase()
+    .split(/[\s!-\/:-@\[-`{-~]+/)
+    .filter((word) => word.length >= MIN_PREFIX);
+};
+
+/**
+ * Prefixes of the words of the texts, `Cool Cats` gives `co, coo, cool, ca, cat, cats`
+ * @param texts
+ * @returns
+ */
+export const searchTerms = (...texts: Array<string>): Array<string> => {
+  const words = Array.from(new Set([].concat(...texts.map(searchWords)))).slice(0, MAX_WORDS);
+  const terms = new Set<string>();
+  words.forEach((word) => {
+    for (let length = MIN_PREFIX; length <= Math.min(word.length, MAX_PREFIX); length++) {
+      terms.add(word.substring(0, length));
+    }
+  });
+  return Array.from(terms);
+};
+
+/**
+ * Normalized tags, `[" Hot", "HOT", "new"]` gives `["hot", "new"]`
+ * @param tags
+ * @returns
+ */
+export const tagKeys = (tags: Array<string>): Array<string> => {
+  if (!Array.isArray(tags)) return [];
+  return Array.from(new Set(tags.filter((tag) => typeof tag === "string").map(tagKey).filter(Boolean)));
+};
+
+export const tagKey = (tag: string): string => `${tag ?? ""}`.trim().toLowerCase();
+
+/**
+ * Query matching the documents holding every word of the keyword as a prefix
+ * @param keyword
+ * @returns query, matching nothing when the keyword has no searchable word
+ */
+export const searchQuery = (keyword: string): Object => {
+  const words = Array.from(new Set(searchWords(keyword).map((word) => word.substring(0, MAX_PREFIX))));
+  return words.length ? { searchTerms: { $all: words } } : { _id: null };
+};
+
+export const collectionSearchFields = (collection: Partial<INFTCollection>) => ({
+  searchTerms: searchTerms(collection.name, collection.category, collection.platform, collection.description),
+  tagKeys: tagKeys(collection.tagCollection),
+});
+
+export const itemSearchFields = (nft: Partial<INFT>) => ({
+  searchTerms: searchTerms(nft.name, nft.description),
+  tagKeys: tagKeys(nft.tag),
+});
+
+// fields of the collections and items only queried, never answered to the clients
+export type SearchField = "searchTerms" | "tagKeys";
+
+// projection of the reads answered to the clients
+export const WITHOUT_SEARCH_FIELDS = { searchTerms: 0, tagKeys: 0 };
+
+/**
+ * Copy of a written document answered to the client, without its search fields
+ * @param doc
+ * @returns
+ */
+export const withoutSearchFields = <T extends { searchTerms?: Array<string>; tagKeys?: Array<string> }>(doc: T) => {
+  const { searchTerms, tagKeys, ...rest } = doc;
+  return rest;
+};
@@ -0,0 +1,32 @@
+/**
+ * Token metadata of the items (ERC721 / ERC1155 metadata JSON schema)
+ *
+ * The metadata is served by the tokenURI route and published as static
+ * JSON to `metadata/<721|1155>/<token id>.json` of the user bucket by the
+ * `TokenMetadataController`, so marketplaces and indexers crawl the CDN
+ * instead of the API and MongoDB.
+ */
+import { config } from "../../config/config";
+import { INFT } from "../interfaces/INFT";
+
+export const tokenMetadata = (item: Partial<INFT>) => {
+  const attributes = Array.isArray(item.properties)
+    ? item.properties.map(({ title, name }) => ({ trait_type: title, value: name }))
+    : [];
+  return {
+    name: item.name,
+    description: item.description,
+    image: item.artURI,
+    attributes,
+  };
+};
+
+/**
+ * `ERC721` or `721` gives `721`
+ */
+const standard = (tokenType: string): string => `${tokenType ?? ""}`.replace(/^ERC/i, "");
+
+export const metadataKey = (tokenType: string, index: number): string => `metadata/${standard(tokenType)}/${index}.json`;
+
+export const metadataUrl = (tokenType: string, index: number): string =>
+  `${config.tokenMetadata.baseUrl}/${standard(tokenType)}/${index}.json`;
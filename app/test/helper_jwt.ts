@@ -12,7 +12,6 @@ import { ErrorLogger } from "../modules/middleware/ErrorLogger";
 import { SessionChecker } from "../modules/middleware/SessionChecker";
 import { config } from "../config/config";
 import { router } from "../modules/routes";
-import { LogController } from "../modules/controller/LogController";
 import { FastifyReply } from "fastify";
 
 function build() {
@@ -0,0 +1,24 @@
+import { build } from "../../helper";
+
+let app = build();
+
+test("metrics API test [GET] [/metrics]", async () => {
+  const res = await app.inject({
+    method: 'GET',
+    url: "http://localhost:3001/metrics",
+  });
+  expect(res.statusCode).toEqual(200);
+  expect(res.body).toContain("nodejs_eventloop_lag_seconds");
+  expect(res.body).toContain("mongodb_pool_connections");
+});
+
+test("metrics API test through the load balancer [GET] [/metrics]", async () => {
+  const res = await app.inject({
+    method: 'GET',
+    url: "http://localhost:3001/metrics",
+    headers: {
+      'x-forwarded-for': '10.0.0.1',
+    },
+  });
+  expect(res.statusCode).toEqual(404);
+});
@@ -0,0 +1,39 @@
+import { build, config } from "../../helper";
+import metrics from "../../../modules/services/Metrics";
+import { HttpClient, UpstreamUnavailableError } from "../../../modules/services/HttpClient";
+
+let app = build();
+
+//consecutive failures open the circuit, the upstream isn't called anymore
+test("outbound circuit opens after the failure threshold", async () => {
+  config.outbound.upstreams["test-breaker"] = { failureThreshold: 2, resetTimeout: 60000 };
+  const client = new HttpClient();
+  let calls = 0;
+  const failing = async () => {
+    calls++;
+    throw new Error("unavailable");
+  };
+
+  await expect(client.call("test-breaker", "get", failing)).rejects.toThrow("unavailable");
+  await expect(client.call("test-breaker", "get", failing)).rejects.toThrow("unavailable");
+  await expect(client.call("test-breaker", "get", failing)).rejects.toBeInstanceOf(UpstreamUnavailableError);
+  expect(calls).toEqual(2);
+  expect(await metrics.expose()).toContain('outbound_circuit_open{upstream="test-breaker"} 1');
+});
+
+//calls beyond the concurrency limit wait for a slot
+test("outbound calls are limited per upstream", async () => {
+  config.outbound.upstreams["test-limit"] = { maxConcurrent: 2 };
+  const client = new HttpClient();
+  let active = 0;
+  let maxActive = 0;
+  const slow = async () => {
+    active++;
+    maxActive = Math.max(maxActive, active);
+    await new Promise((resolve) => setTimeout(resolve, 10));
+    active--;
+  };
+
+  await Promise.all(Array.from({ length: 6 }, () => client.call("test-limit", "get", slow)));
+  expect(maxActive).toEqual(2);
+});
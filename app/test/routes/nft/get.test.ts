@@ -25,3 +25,44 @@ test("getOwners API test [GET] [/]", async () => {
   expect(res.statusCode).toEqual(200);
 });
 
+//token metadata of many ids in one request, null for the unknown ids
+test("getTokenURIs API test [POST] [/nft/:contract]", async () => {
+  const res = await app.inject({
+    method: 'POST',
+    url: "http://localhost:3001/nft/721",
+    headers: {
+      'Access-Control-Allow-Origin': '*',
+    },
+    payload: { ids: [1, 2, 999999999] },
+  });
+  expect(res.statusCode).toEqual(200);
+  const body = JSON.parse(res.body);
+  expect(Object.keys(body.data)).toEqual(["1", "2", "999999999"]);
+  expect(body.data["999999999"]).toEqual(null);
+});
+
+//batches are bounded
+test("getItemsDetail API test [POST] [/items/bulk] - too many items", async () => {
+  const res = await app.inject({
+    method: 'POST',
+    url: "http://localhost:3001/ws/v2/nft/items/bulk",
+    headers: {
+      'Access-Control-Allow-Origin': '*',
+    },
+    payload: { items: Array.from({ length: 101 }, (_, nftId) => ({ collectionId: "62a0f6f3c2d6e4a3b8f1c0de", nftId })) },
+  });
+  expect(res.statusCode).toEqual(400);
+});
+
+test("getItemsDetail API test [POST] [/items/bulk]", async () => {
+  const res = await app.inject({
+    method: 'POST',
+    url: "http://localhost:3001/ws/v2/nft/items/bulk",
+    headers: {
+      'Access-Control-Allow-Origin': '*',
+    },
+    payload: { items: [{ collectionId: "62a0f6f3c2d6e4a3b8f1c0de", nftId: 1 }] },
+  });
+  expect(res.statusCode).toEqual(200);
+  expect(Array.isArray(JSON.parse(res.body).data)).toEqual(true);
+});
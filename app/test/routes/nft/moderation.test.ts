@@ -0,0 +1,38 @@
+import { build, config } from "../../helper";
+import { ModerationStatus, ModerationTarget } from "../../../modules/interfaces/IModeration";
+import { MemoryModerationQueue } from "../../../modules/services/ModerationQueue";
+import { ModerationWorker } from "../../../modules/services/ModerationWorker";
+
+let app = build();
+
+//uploads are moderated from the queue and flagged explicit
+test("moderation worker flags the queued upload", async () => {
+  const nftTable = config.mongodb.instance.collection("NFT");
+  const { insertedId } = await nftTable.insertOne({ name: "moderation-test", isExplicit: false, moderationStatus: ModerationStatus.PENDING });
+  const queue = new MemoryModerationQueue();
+  const worker = new ModerationWorker(queue, async (key) => key.endsWith(".png"));
+
+  await queue.publish({ target: ModerationTarget.NFT, id: `${insertedId}`, keys: ["item/1.png"] });
+  expect(await worker.runOnce()).toEqual(1);
+  expect(queue.size).toEqual(0);
+
+  const nft = await nftTable.findOne({ _id: insertedId });
+  await nftTable.deleteOne({ _id: insertedId });
+  expect(nft.moderationStatus).toEqual(ModerationStatus.FLAGGED);
+  expect(nft.isExplicit).toEqual(true);
+});
+
+//failed moderations are retried, then dead lettered
+test("moderation worker releases the failed jobs", async () => {
+  const queue = new MemoryModerationQueue(2);
+  const worker = new ModerationWorker(queue, async () => {
+    throw new Error("unavailable");
+  });
+
+  await queue.publish({ target: ModerationTarget.NFT, id: "missing", keys: ["item/2.png"] });
+  await worker.runOnce();
+  expect(queue.size).toEqual(1);
+  await worker.runOnce();
+  expect(queue.size).toEqual(0);
+  expect(queue.deadLetters.length).toEqual(1);
+});
@@ -0,0 +1,45 @@
+import { build } from "../../helper";
+import { ObjectId } from "mongodb";
+import queryCache, { QueryCache, cacheKey } from "../../../modules/services/QueryCache";
+import { NFTCollectionController } from "../../../modules/controller/NFTCollectionController";
+import { CollectionStatsController } from "../../../modules/controller/CollectionStatsController";
+
+let app = build();
+
+//least recently used entries are dropped first
+test("query cache is bounded per table", async () => {
+  const cache = new QueryCache(2);
+  const load = (value: string) => async () => ({ value });
+
+  await cache.wrap("Test", "a", 10, load("a"));
+  await cache.wrap("Test", "b", 10, load("b"));
+  await cache.wrap("Test", "a", 10, load("a"));
+  await cache.wrap("Test", "c", 10, load("c"));
+  expect(await cache.wrap("Test", "b", 10, load("reloaded"))).toEqual({ value: "reloaded" });
+  expect(cache.stats().Test).toEqual({ entries: 2, hits: 1, misses: 4 });
+
+  cache.invalidate("Test");
+  expect(cache.stats().Test.entries).toEqual(0);
+});
+
+//ObjectIds and regular expressions don't share the key of a string
+test("query cache keys keep the value types apart", () => {
+  const id = new ObjectId();
+  expect(cacheKey({ _id: id })).not.toEqual(cacheKey({ _id: `${id}` }));
+  expect(cacheKey({ name: /cat/ })).not.toEqual(cacheKey({ name: /dog/ }));
+});
+
+//detail reads are served from the cache until a write of the collection
+test("collection reads are invalidated by the stats refresh", async () => {
+  const collectionId = `${new ObjectId()}`;
+  const ctl = new NFTCollectionController();
+
+  await ctl.countItemAndOwner(collectionId);
+  const { hits } = queryCache.stats().NFT;
+  await ctl.countItemAndOwner(collectionId);
+  expect(queryCache.stats().NFT.hits).toEqual(hits + 1);
+
+  await new CollectionStatsController().refresh(collectionId);
+  await ctl.countItemAndOwner(collectionId);
+  expect(queryCache.stats().NFT.hits).toEqual(hits + 1);
+});
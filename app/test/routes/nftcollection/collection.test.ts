@@ -1,4 +1,7 @@
-import { build } from "../../helper";
+import { build, config } from "../../helper";
+import { CollectionStatsController } from "../../../modules/controller/CollectionStatsController";
+import { SearchIndexController } from "../../../modules/controller/SearchIndexController";
+import { searchWords } from "../../../modules/util/search-helper";
 
 let app = build();
 
@@ -18,6 +21,64 @@ test("getCollection API test [GET] [/collection]", async () => {
   expect(res.statusCode).toEqual(200);
 });
 
+//get collections with the precomputed stats
+test("getCollection API stats test [GET] [/collection]", async () => {
+  await new CollectionStatsController().rebuildAll();
+  const res = await app.inject({
+    method: 'GET',
+    url: "http://localhost:3001/ws/v2/nft/collection",
+  });
+  expect(res.statusCode).toEqual(200);
+  JSON.parse(res.body).data.forEach((collection) => {
+    expect(typeof collection.items).toEqual("number");
+    expect(typeof collection.owners).toEqual("number");
+    expect(typeof collection.floorPrice).toEqual("number");
+    // serialized by the response schema, fields outside of it are kept
+    expect(typeof collection._id).toEqual("string");
+    expect(collection).toHaveProperty("creatorDetail");
+  });
+});
+
+//search collections and items by word prefix
+test("search API test [GET] [/search]", async () => {
+  const collection = await config.mongodb.instance.collection("NFTCollection").findOne({ name: { $type: "string", $ne: "" } });
+  if (!collection) return;
+  await new SearchIndexController().reindex();
+  const words = searchWords(collection.name);
+  if (!words.length) return;
+  const prefix = words[0].substring(0, 3);
+  const res = await app.inject({
+    method: 'GET',
+    url: `http://localhost:3001/ws/v2/nft/search?keyword=${encodeURIComponent(prefix)}`,
+  });
+  expect(res.statusCode).toEqual(200);
+  const ids = JSON.parse(res.body).data.collections.map((found) => `${found._id}`);
+  expect(ids.length).toBeGreaterThan(0);
+});
+
+//autocomplete of the collection names
+test("suggest API test [GET] [/collection/suggest]", async () => {
+  const res = await app.inject({
+    method: 'GET',
+    url: "http://localhost:3001/ws/v2/nft/collection/suggest?q=a",
+  });
+  expect(res.statusCode).toEqual(200);
+  expect(Array.isArray(JSON.parse(res.body).data)).toEqual(true);
+});
+
+//get collections page by page with the cursor
+test("getCollection API cursor test [GET] [/collection]", async () => {
+  const url = "http://localhost:3001/ws/v2/nft/collection?limit=2&orderBy=volume&direction=DESC";
+  const first = JSON.parse((await app.inject({ method: 'GET', url })).body);
+  const offset = JSON.parse((await app.inject({ method: 'GET', url: `${url}&page=2` })).body);
+  if (!first.nextCursor) {
+    expect(first.data.length).toBeLessThan(2);
+    return;
+  }
+  const next = JSON.parse((await app.inject({ method: 'GET', url: `${url}&after=${first.nextCursor}` })).body);
+  expect(next.data.map((collection) => collection._id)).toEqual(offset.data.map((collection) => collection._id));
+});
+
 // //get items - no collection
 // test("getItems API test [GET] [/collection/:contract/items]", async () => {
 //   const res = await app.inject({
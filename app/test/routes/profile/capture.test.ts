@@ -0,0 +1,12 @@
+import { build } from "../../helper";
+
+let app = build();
+
+test("profile API test without an admin session [POST] [/cpu]", async () => {
+  const res = await app.inject({
+    method: 'POST',
+    url: "http://localhost:3001/ws/v2/profile/cpu",
+    payload: { seconds: 1 },
+  });
+  expect(res.statusCode).toEqual(403);
+});
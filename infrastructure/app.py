@@ -5,6 +5,7 @@ from base import Base as BaseStack
 from production.pipeline import Pipeline as ProductionPipeline
 from staging.pipeline import Pipeline as StagingPipeline
 from development.pipeline import Pipeline as DevelopmentPipeline
+from regions import REGIONS
 
 common_tags = {"Application": "depo-backend", "project": "Depo"}
 
@@ -12,57 +13,30 @@ namespace = common_tags["Application"]
 props = {"namespace": namespace}
 account = "927228102540"
 
-virginia = cdk.Environment(account=account, region="us-east-1")
-
-seoul = cdk.Environment(account=account, region="ap-northeast-2")
-
-frankfurt = cdk.Environment(
-    account=account,
-    region="eu-central-1",
-)
-
-sydney = cdk.Environment(account=account, region="ap-southeast-2")
-
-ireland = cdk.Environment(
-    account=account,
-    region="eu-west-1",
-)
-
-london = cdk.Environment(account=account,region="eu-west-2",)
-
-
-ohio = cdk.Environment(account=account, region="us-east-2")
-
+pipelines = {
+    "production": ProductionPipeline,
+    "staging": StagingPipeline,
+    "development": DevelopmentPipeline,
+}
 
 app = cdk.App()
 
-base_stack_virginia = BaseStack(app, f"{namespace}-base-virginia", props=props, env=virginia)
-base_stack_seoul = BaseStack(app, f"{namespace}-base-seoul", props=props, env=seoul)
-base_stack_frankfurt = BaseStack(app, f"{namespace}-base-frankfurt", props=props, env=frankfurt)
-base_stack_sydney = BaseStack(app, f"{namespace}-base-sydney", props=props, env=sydney)
-base_stack_ireland = BaseStack(app, f"{namespace}-base-ireland", props=props, env=ireland)
-base_stack_ohio = BaseStack(app, f"{namespace}-base-ohio", props=props, env=ohio)
-base_stack_london = BaseStack(app, f"{namespace}-base-london", props=props, env=london)
-
-# Production
-pipeline_virginia = ProductionPipeline(app, f"{props['namespace']}-pipeline-virginia", base_stack_virginia.outputs, env=virginia, tags=common_tags)
-pipeline_virginia.add_dependency(base_stack_virginia)
-pipeline_seoul = ProductionPipeline(app, f"{props['namespace']}-pipeline-seoul", base_stack_seoul.outputs, env=seoul, tags=common_tags)
-pipeline_seoul.add_dependency(base_stack_seoul)
-pipeline_frankfurt = ProductionPipeline(app, f"{props['namespace']}-pipeline-frankfurt", base_stack_frankfurt.outputs, env=frankfurt, tags=common_tags)
-pipeline_frankfurt.add_dependency(base_stack_frankfurt)
-pipeline_sydney = ProductionPipeline(app, f"{props['namespace']}-pipeline-sydney", base_stack_sydney.outputs, env=sydney, tags=common_tags)
-pipeline_sydney.add_dependency(base_stack_sydney)
-
-pipeline_ireland = ProductionPipeline(app, f"{props['namespace']}-pipeline-ireland", base_stack_ireland.outputs, env=ireland, tags=common_tags)
-pipeline_ireland.add_dependency(base_stack_ireland)
-
-# Staging
-pipeline_ohio_staging = StagingPipeline(app, f"{props['namespace']}-pipeline-ohio-staging", base_stack_ohio.outputs, env=ohio, tags=common_tags)
-pipeline_ohio_staging.add_dependency(base_stack_ohio)
-
-# Development
-pipeline_london_staging = DevelopmentPipeline(app, f"{props['namespace']}-pipeline-london-staging", base_stack_london.outputs, env=london, tags=common_tags)
-pipeline_london_staging.add_dependency(base_stack_london)
+# a base stack and a pipeline deploying the backend per region, see regions.py
+for region in REGIONS:
+    env = cdk.Environment(account=account, region=region.region)
+    base_stack = BaseStack(
+        app,
+        f"{namespace}-base-{region.name}",
+        props={**props, "alarm_emails": region.environment.alarm_emails},
+        env=env,
+    )
+    pipeline = pipelines[region.pipeline](
+        app,
+        f"{namespace}-pipeline-{region.stack_suffix}",
+        {**base_stack.outputs, "region": region},
+        env=env,
+        tags=common_tags,
+    )
+    pipeline.add_dependency(base_stack)
 
 app.synth()
@@ -4,16 +4,42 @@ from typing import Any, Dict, Optional
 from aws_cdk import core
 from aws_cdk import aws_ecr as ecr
 from aws_cdk import aws_eks as eks
+from aws_cdk import aws_iam as iam
 from aws_cdk import aws_ssm as ssm
 from aws_cdk import aws_route53 as route53
 from aws_cdk import aws_certificatemanager as cm
 
+from canary import CanaryReleases
+from dns import POD_DNS_CONFIG, NodeLocalDnsCache
+from log_shipping import LogShipping
+from manifests import KUBECTL_MEMORY, apply_manifest, kubectl_handler
+from moderation import ModerationQueue
+from monitoring import ContainerInsights, GlobalDashboard, Monitoring
+from profiling import ProfileStore
+from regions import REGIONS, Region, check_workloads
+from scaling import ScheduledScaling
+from tracing import TraceCollector
+from waf import EdgeRateLimits
+from websocket import WebsocketTier
+
+# port of the metrics aggregated over the workers, served by the cluster primary
+METRICS_PORT = 9091
+
 
 class Stack(core.Stack):
+    """
+    Backend of a region: the API, its moderation worker and their telemetry,
+    set up by the environment and sized by the capacity of `props["region"]`,
+    an entry of `regions.REGIONS`.
+    """
+
     def __init__(self, scope: core.Construct, id: str, props: Dict, **kwargs) -> None:
         super().__init__(scope, id, **kwargs)
 
         self.namespace = props["namespace"].lower()
+        self.config: Region = props["region"]
+        environment = self.config.environment
+        capacity = self.config.capacity
 
         with open("package.json", "r") as f:
             package_json = json.load(f)
@@ -30,7 +56,7 @@ class Stack(core.Stack):
             zone_name="api.arc.market",
         )
 
-        domain = "staging.api.arc.market"
+        domain = environment.domain
 
         # ACM
         certificate = cm.Certificate(
@@ -46,13 +72,24 @@ class Stack(core.Stack):
             cluster_name=ssm.StringParameter.from_string_parameter_name(
                 self,
                 "ClusterName",
-                string_parameter_name="/depo/depo-k8s/cluster-name/staging",
+                string_parameter_name=f"/depo/depo-k8s/cluster-name{environment.ssm_suffix}",
             ).string_value,
             kubectl_role_arn=ssm.StringParameter.from_string_parameter_name(
                 self,
                 "KubectlRoleARN",
-                string_parameter_name="/depo/depo-k8s/kubectl-role-arn/staging",
+                string_parameter_name=f"/depo/depo-k8s/kubectl-role-arn{environment.ssm_suffix}",
             ).string_value,
+            open_id_connect_provider=iam.OpenIdConnectProvider.from_open_id_connect_provider_arn(
+                self,
+                "OidcProvider",
+                ssm.StringParameter.from_string_parameter_name(
+                    self,
+                    "OidcProviderARN",
+                    string_parameter_name=f"/depo/depo-k8s/oidc-provider-arn{environment.ssm_suffix}",
+                ).string_value,
+            ),
+            kubectl_memory=KUBECTL_MEMORY,
+            prune=True,
         )
 
         # ECR repository
@@ -60,6 +97,37 @@ class Stack(core.Stack):
             self, "Repository", repository_name=props["namespace"]
         )
 
+        # identity of the API pods, used by the AWS clients relying on the default credentials
+        api_service_account = eks_cluster.add_service_account("ApiServiceAccount", name=self.give_name("api"))
+
+        # bucket receiving the cpu profiles and heap snapshots captured by the admins
+        profiles = ProfileStore(self, "Profiles")
+        profiles.bucket.grant_put(api_service_account)
+
+        # upload event queue, the uploads are moderated by the moderation worker
+        moderation = ModerationQueue(self, "Moderation")
+        moderation.queue.grant_send_messages(api_service_account)
+        moderation_service_account = eks_cluster.add_service_account(
+            "ModerationServiceAccount", name=self.give_name("moderation-worker")
+        )
+        moderation.grant_moderate(moderation_service_account)
+
+        # pods scheduled on the nodes of the preferred architecture while there are some
+        node_affinity = {
+            "nodeAffinity": {
+                "preferredDuringSchedulingIgnoredDuringExecution": [
+                    {
+                        "weight": 100,
+                        "preference": {
+                            "matchExpressions": [
+                                {"key": "kubernetes.io/arch", "operator": "In", "values": [capacity.node_architecture]}
+                            ]
+                        },
+                    }
+                ]
+            }
+        }
+
         # API manifest
         api_deployment = {
             "apiVersion": "apps/v1",
@@ -67,23 +135,77 @@ class Stack(core.Stack):
             "metadata": {"name": f"{props['namespace']}-deployment"},
             "spec": {
                 "selector": {"matchLabels": {"app.kubernetes.io/name": f"{props['namespace']}-app"}},
-                "replicas": 5,
                 "template": {
-                    "metadata": {"labels": {"app.kubernetes.io/name": f"{props['namespace']}-app"}},
+                    "metadata": {
+                        "labels": {"app.kubernetes.io/name": f"{props['namespace']}-app"},
+                        # scraped by prometheus, the route only answers in-cluster requests
+                        "annotations": {
+                            "prometheus.io/scrape": "true",
+                            "prometheus.io/port": str(METRICS_PORT if capacity.workers_per_pod > 1 else 3001),
+                            "prometheus.io/path": "/metrics",
+                        },
+                    },
                     "spec": {
+                        **capacity.pod_node_selector,
+                        "serviceAccountName": api_service_account.service_account_name,
+                        "dnsConfig": POD_DNS_CONFIG,
+                        "affinity": node_affinity,
                         "containers": [
                             {
                                 "image": repository.repository_uri_for_tag(self.version),
                                 "imagePullPolicy": "Always",
                                 "name": props["namespace"],
-                                "ports": [{"containerPort": 3001}],
+                                "ports": [{"containerPort": 3001}, {"containerPort": METRICS_PORT, "name": "metrics"}],
                                 # "command": ["npm", "start"],
                                 "command": ["ts-node", "-r", "esm", "server.ts"],
                                 "envFrom": [{"secretRef": {"name": "kucoin-creds"}}],
+                                "resources": {
+                                    "requests": {
+                                        "cpu": f"{capacity.workers_per_pod * capacity.worker_cpu_millicores}m",
+                                        "memory": f"{capacity.workers_per_pod * capacity.worker_memory_mib}Mi",
+                                    },
+                                    "limits": {"memory": f"{capacity.workers_per_pod * capacity.worker_memory_mib * 2}Mi"},
+                                },
                                 "env": [
+                                    {"name": "WEB_CONCURRENCY", "value": str(capacity.workers_per_pod)},
+                                    {"name": "METRICS_PORT", "value": str(METRICS_PORT)},
                                     {
                                         "name": "ENV",
-                                        "value": "staging"
+                                        "value": environment.name,
+                                    },
+                                    {
+                                        "name": "HOST_IP",
+                                        "valueFrom": {"fieldRef": {"fieldPath": "status.hostIP"}},
+                                    },
+                                    {
+                                        "name": "OTEL_EXPORTER_OTLP_ENDPOINT",
+                                        "value": "http://$(HOST_IP):4317",
+                                    },
+                                    {
+                                        "name": "OTEL_TRACES_SAMPLER_ARG",
+                                        "value": environment.traces_sample_ratio,
+                                    },
+                                    {
+                                        "name": "PROFILE_BUCKET",
+                                        "value": profiles.bucket.bucket_name,
+                                    },
+                                    {
+                                        "name": "PROFILE_BUCKET_REGION",
+                                        "value": self.region,
+                                    },
+                                    {
+                                        "name": "AWS_REGION",
+                                        "value": self.region,
+                                    },
+                                    {
+                                        "name": "MODERATION_QUEUE_URL",
+                                        "value": moderation.queue.queue_url,
+                                    },
+                                    {
+                                        "name": "ADMIN_WALLETS",
+                                        "valueFrom": {
+                                            "secretKeyRef": {"name": "admin", "key": "wallets", "optional": True}
+                                        },
                                     },
                                     {
                                         "name": "MONGODB_USER",
@@ -121,6 +243,19 @@ class Stack(core.Stack):
                                             "secretKeyRef": {"name": "auth", "key": "jwt_secret"}
                                         },
                                     },
+                                    *(
+                                        [
+                                            {
+                                                # exempts the load test of the pipeline from the rate limit
+                                                "name": "LOAD_TEST_TOKEN",
+                                                "valueFrom": {
+                                                    "secretKeyRef": {"name": "auth", "key": "load_test_token", "optional": True}
+                                                },
+                                            }
+                                        ]
+                                        if environment.load_test
+                                        else []
+                                    ),
                                     {
                                         "name": "EMAIL_SERVICE_API_KEY",
                                         "valueFrom": {
@@ -253,7 +388,7 @@ class Stack(core.Stack):
                                             "secretKeyRef": {"name": "mailauth", "key": "pass"}
                                         },
                                     },  
-                                      {
+                                       {
                                         "name": "ARC721",
                                         "valueFrom": {
                                             "secretKeyRef": {"name": "nftblockchain", "key": "arc721"}
@@ -265,6 +400,7 @@ class Stack(core.Stack):
                                             "secretKeyRef": {"name": "nftblockchain", "key": "arc1155"}
                                         },
                                     },  
+
                                 ],
                             }
                         ]
@@ -284,6 +420,40 @@ class Stack(core.Stack):
             },
         }
 
+        # target group of the canary pods, weighted against the stable one by Argo Rollouts
+        api_canary_service = {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": f"{props['namespace']}-canary"},
+            "spec": api_service["spec"],
+        }
+
+        # Socket.io clients, on their own pods sharing their rooms through redis
+        websockets = WebsocketTier(
+            self,
+            "Websockets",
+            cluster=eks_cluster,
+            name=props["namespace"],
+            api_pod_spec=api_deployment["spec"]["template"]["spec"],
+            min_replicas=capacity.websocket_min_replicas,
+            max_replicas=capacity.websocket_max_replicas,
+        )
+        websockets.manifest.node.add_dependency(api_service_account)
+        # the API publishes its events to the rooms of the websocket pods
+        api_deployment["spec"]["template"]["spec"]["containers"][0]["env"].append(
+            {"name": "REDIS_URL", "value": websockets.redis_url}
+        )
+
+        load_balancer_annotations = {}
+        if capacity.load_balancer_attributes:
+            load_balancer_annotations["alb.ingress.kubernetes.io/load-balancer-attributes"] = ",".join(
+                f"{key}={value}" for key, value in capacity.load_balancer_attributes.items()
+            )
+        if environment.edge_rate_limits:
+            # rate limits and bot rules applied by the load balancer, before the pods
+            edge_rate_limits = EdgeRateLimits(self, "EdgeRateLimits", name=self.give_name("waf"))
+            load_balancer_annotations["alb.ingress.kubernetes.io/wafv2-acl-arn"] = edge_rate_limits.web_acl_arn
+
         api_ingress = {
             "apiVersion": "networking.k8s.io/v1beta1",
             "kind": "Ingress",
@@ -298,6 +468,7 @@ class Stack(core.Stack):
                     "alb.ingress.kubernetes.io/healthcheck-path": "/",
                     "alb.ingress.kubernetes.io/success-codes": '204',
                     "alb.ingress.kubernetes.io/certificate-arn": certificate.certificate_arn,
+                    **load_balancer_annotations,
                     "external-dns.alpha.kubernetes.io/hostname": domain,
                     "alb.ingress.kubernetes.io/actions.ssl-redirect": json.dumps(
                         {
@@ -323,11 +494,14 @@ class Stack(core.Stack):
                                         "servicePort": "use-annotation",
                                     },
                                 },
+                                websockets.ingress_path,
                                 {
+                                    # with canary releases, forwarded to the stable and canary target
+                                    # groups by the `actions.<service>` annotation, managed by Argo Rollouts
                                     "path": "/*",
                                     "backend": {
                                         "serviceName": f"{props['namespace']}-service",
-                                        "servicePort": 80,
+                                        "servicePort": "use-annotation" if environment.canary_releases else 80,
                                     },
                                 },
                             ]
@@ -337,12 +511,129 @@ class Stack(core.Stack):
             },
         }
 
-        eks_cluster.add_manifest("API", api_deployment)
-        eks_cluster.add_manifest("Service", api_service)
-        eks_cluster.add_manifest("Ingress", api_ingress)
+        api_workload = api_deployment
+        api_manifests = [api_deployment]
+        if environment.canary_releases:
+            # new versions take a share of the traffic first, promoted or rolled back on their latency and errors
+            canary = CanaryReleases(self, "CanaryReleases", cluster=eks_cluster, app_name=props["namespace"])
+            api_workload = canary.rollout(
+                api_deployment,
+                stable_service=api_service["metadata"]["name"],
+                canary_service=api_canary_service["metadata"]["name"],
+                ingress=api_ingress["metadata"]["name"],
+            )
+            # the Deployment stays applied, scaled down by the Rollout referencing it
+            api_manifests.append(api_workload)
+        # the manifests changed by a deploy are applied, with the paths of `eks_cluster.add_manifest`
+        api_manifest = apply_manifest(eks_cluster, "manifest-API", eks_cluster, *api_manifests)
+        api_manifest.node.add_dependency(api_service_account)
+        if environment.canary_releases:
+            api_manifest.node.add_dependency(canary.controller)
+
+        # the replicas of the API are set by its autoscaler
+        scaling = ScheduledScaling(
+            self,
+            "ScheduledScaling",
+            cluster=eks_cluster,
+            name=f"{props['namespace']}-autoscaler",
+            target=api_workload,
+            min_replicas=capacity.min_replicas,
+            max_replicas=capacity.max_replicas,
+            schedules=capacity.scaling_schedules,
+            node_selector=capacity.node_selector,
+        )
+        scaling.node.add_dependency(api_manifest)
+
+        # moderation worker, same image and settings as the API for the variables it reads
+        api_container = api_deployment["spec"]["template"]["spec"]["containers"][0]
+        moderation_env = {"ENV", "AWS_REGION", "MODERATION_QUEUE_URL", "LOGGING"}
+        moderation_deployment = {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": f"{props['namespace']}-moderation-worker"},
+            "spec": {
+                "selector": {"matchLabels": {"app.kubernetes.io/name": f"{props['namespace']}-moderation-worker"}},
+                "replicas": capacity.moderation_replicas,
+                "template": {
+                    "metadata": {"labels": {"app.kubernetes.io/name": f"{props['namespace']}-moderation-worker"}},
+                    "spec": {
+                        **capacity.pod_node_selector,
+                        "serviceAccountName": moderation_service_account.service_account_name,
+                        "dnsConfig": POD_DNS_CONFIG,
+                        "affinity": node_affinity,
+                        "containers": [
+                            {
+                                "image": api_container["image"],
+                                "imagePullPolicy": "Always",
+                                "name": "moderation-worker",
+                                "command": ["ts-node", "-r", "esm", "moderation-worker.ts"],
+                                "env": [
+                                    var
+                                    for var in api_container["env"]
+                                    if var["name"] in moderation_env or var["name"].startswith(("MONGODB_", "AWS_S3_"))
+                                ],
+                                "resources": {
+                                    "limits": {"cpu": "500m", "memory": "512Mi"},
+                                    "requests": {"cpu": "100m", "memory": "256Mi"},
+                                },
+                            }
+                        ],
+                    },
+                },
+            },
+        }
+        moderation_manifest = apply_manifest(eks_cluster, "manifest-ModerationWorker", eks_cluster, moderation_deployment)
+        moderation_manifest.node.add_dependency(moderation_service_account)
+        # every pod of the backend runs on the nodes of its capacity
+        check_workloads(capacity, [api_deployment, moderation_deployment, *scaling.workloads, *websockets.workloads])
+        apply_manifest(eks_cluster, "manifest-Service", eks_cluster, api_service)
+        if environment.canary_releases:
+            apply_manifest(eks_cluster, "manifest-CanaryService", eks_cluster, api_canary_service)
+        ingress_manifest = apply_manifest(eks_cluster, "manifest-Ingress", eks_cluster, api_ingress)
+
+        if self.config.node_local_dns:
+            NodeLocalDnsCache(self, "NodeLocalDnsCache", cluster=eks_cluster, cluster_dns_ip=self.config.cluster_dns_ip)
+
+        # ship the API logs written to stdout to CloudWatch
+        log_shipping = LogShipping(
+            self,
+            "LogShipping",
+            cluster=eks_cluster,
+            app_name=props["namespace"],
+            log_group_name=f"/depo/{self.give_name('api')}",
+        )
+
+        # OTel collector exporting the API traces to X-Ray
+        TraceCollector(self, "TraceCollector", cluster=eks_cluster, namespace=log_shipping.namespace)
+
+        # Container Insights, dashboard and latency SLO alarms of the region
+        ContainerInsights(self, "ContainerInsights", cluster=eks_cluster, namespace=log_shipping.namespace)
+        Monitoring(
+            self,
+            "Monitoring",
+            cluster=eks_cluster,
+            app_name=props["namespace"],
+            dashboard_name=f"{self.give_name('api')}-{self.region}",
+            thresholds=environment.slo_thresholds,
+            alarm_emails=environment.alarm_emails,
+            load_balancer_name=self.give_name("alb"),
+            ingress=ingress_manifest,
+            kubectl_handler=kubectl_handler(self, eks_cluster),
+        )
+
+        # one stack of the environment also holds the dashboard comparing its regions
+        if self.config.global_dashboard:
+            GlobalDashboard(
+                self,
+                "GlobalDashboard",
+                app_name=props["namespace"],
+                load_balancer_name=self.give_name("alb"),
+                dashboard_name=self.give_name("api-global"),
+                regions=[region.region for region in REGIONS if region.environment.name == environment.name],
+            )
 
     def give_name(self, name: str) -> str:
-        return f"{self.namespace}-{name}-staging"
+        return f"{self.namespace}-{name}{self.config.environment.name_suffix}"
 
 
 class Stage(core.Stage):
@@ -7,6 +7,55 @@ from aws_cdk import aws_iam as iam
 import aws_cdk.aws_ssm as ssm
 from aws_cdk import aws_codebuild as codebuild
 
+from monitoring import BuildMonitoring
+
+# platforms of the image manifest, the backend node groups may run on amd64 or arm64 (Graviton)
+IMAGE_PLATFORMS = "linux/amd64,linux/arm64"
+BUILDX_VERSION = "v0.9.1"
+BUILDX_RELEASE = f"https://github.com/docker/buildx/releases/download/{BUILDX_VERSION}"
+BUILDX_BINARY = f"buildx-{BUILDX_VERSION}.linux-amd64"
+BINFMT_IMAGE = "tonistiigi/binfmt:qemu-v6.2.0"
+
+# namespace of the durations of the build steps, published by the post_build phase (build_timings.py)
+BUILD_METRICS_NAMESPACE = "Depo/Build"
+BUILD_TIMINGS_FILE = "/tmp/build-timings"
+
+# steps of the build and their usual duration (seconds) with some margin, a step
+# taking longer fires its build-time alarm
+BUILD_STEP_BUDGETS = {
+    "cdk-install": 120,
+    "pip-install": 180,
+    "ecr-login": 30,
+    "buildx-setup": 120,
+    # one command, buildx pushes the images as it builds them
+    "image-build-push": 1500,
+    "image-inspect": 60,
+    "cdk-synth": 300,
+}
+# layers of every stage of both platforms, read and written in the ECR repository under the buildcache tag: the
+# docker-container builder of buildx doesn't use the DOCKER_LAYER cache of CodeBuild. ECR takes the cache as an
+# OCI image manifest only, written by the buildkit of the builder
+BUILD_CACHE = (
+    "--cache-from type=registry,ref=$ECR:buildcache "
+    "--cache-to type=registry,ref=$ECR:buildcache,mode=max,image-manifest=true,oci-mediatypes=true"
+)
+# whole build, the project times out after 60 minutes
+BUILD_DURATION_BUDGET = 45 * 60
+
+
+def timed(step: str, *commands: str) -> str:
+    """
+    Buildspec command running `commands` one after the other, and recording
+    their duration as `step` when they succeed.
+    """
+    if step not in BUILD_STEP_BUDGETS:
+        raise ValueError(f"Unknown build step {step}")
+    return (
+        "STEP_START=$(date +%s%3N) && "
+        + " && ".join(commands)
+        + f' && echo "{step} $(($(date +%s%3N) - STEP_START))" >> {BUILD_TIMINGS_FILE}'
+    )
+
 
 class Base(core.Stack):
     def __init__(self, app: core.App, id: str, props: Dict, **kwargs) -> None:
@@ -35,7 +84,8 @@ class Base(core.Stack):
         build = codebuild.PipelineProject(
             self,
             "Build",
-            cache=codebuild.Cache.local(codebuild.LocalCacheMode.DOCKER_LAYER, codebuild.LocalCacheMode.CUSTOM),
+            # the image layers are cached in the repository by buildx, see BUILD_CACHE
+            cache=codebuild.Cache.local(codebuild.LocalCacheMode.CUSTOM),
             project_name=f"{props['namespace']}-build",
             build_spec=codebuild.BuildSpec.from_object({
                 "version": 0.2,
@@ -49,11 +99,21 @@ class Base(core.Stack):
                     "pre_build": {
                         "commands": [
                             "echo '- PREBUILD PHASE-'",
-                            "npm i -g aws-cdk",
+                            timed("cdk-install", "npm i -g aws-cdk"),
                             # "npm install",
-                            "pip3 install -U pip",
-                            "pip3 install -r infrastructure/requirements.txt",
-                            "aws ecr get-login-password --region $REGION | docker login --username AWS --password-stdin $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com", # noqa
+                            timed("pip-install", "pip3 install -U pip", "pip3 install -r infrastructure/requirements.txt"),
+                            timed("ecr-login", "aws ecr get-login-password --region $REGION | docker login --username AWS --password-stdin $ACCOUNT_ID.dkr.ecr.$REGION.amazonaws.com"), # noqa
+                            # buildx, with the emulators building the arm64 image on the amd64 host
+                            timed(
+                                "buildx-setup",
+                                "mkdir -p ~/.docker/cli-plugins",
+                                f"curl -fsSL -o ~/.docker/cli-plugins/docker-buildx {BUILDX_RELEASE}/{BUILDX_BINARY}",
+                                # checked against the sha256 published with the release, an empty one fails the check
+                                f'echo "$(curl -fsSL {BUILDX_RELEASE}/checksums.txt | grep "{BUILDX_BINARY}$" | cut -d " " -f 1)  $HOME/.docker/cli-plugins/docker-buildx" | sha256sum -c -', # noqa
+                                "chmod +x ~/.docker/cli-plugins/docker-buildx",
+                                f"docker run --privileged --rm {BINFMT_IMAGE} --install arm64",
+                                "docker buildx create --name multiarch --use",
+                            ),
                         ]
                     },
                     "build": {
@@ -62,13 +122,17 @@ class Base(core.Stack):
                             # "npm test",
                             # "npm prune --production",
                             "VERSION=`node -e \"console.log(require('./package.json').version);\"`",
-                            "docker build --build-arg AWS_REGION=$REGION --build-arg ACCOUNT_ID=$ACCOUNT_ID -t $TAG:$VERSION .",
-                            "docker tag $TAG:$VERSION $ECR:$VERSION",
-                            "docker push $ECR:$VERSION",
+                            # one manifest list holding the image of every platform, pushed as it is built
+                            timed("image-build-push", f"docker buildx build --platform $PLATFORMS --build-arg AWS_REGION=$REGION --build-arg ACCOUNT_ID=$ACCOUNT_ID {BUILD_CACHE} -t $ECR:$VERSION --push ."), # noqa
+                            timed("image-inspect", "docker buildx imagetools inspect $ECR:$VERSION"),
                         ]
                     },
                     "post_build": {
-                        "commands": "cdk synth '*' -o ."
+                        "commands": [timed("cdk-synth", "cdk synth '*' -o .")],
+                        # the durations of the steps which ran, the phases are in the AWS/CodeBuild metrics
+                        "finally": [
+                            f"python3 infrastructure/build_timings.py {BUILD_TIMINGS_FILE} {BUILD_METRICS_NAMESPACE} ${{CODEBUILD_BUILD_ID%%:*}} || echo 'build timings not published'", # noqa
+                        ],
                     }
                 },
                 "artifacts": {
@@ -91,6 +155,7 @@ class Base(core.Stack):
                 "ECR": codebuild.BuildEnvironmentVariable(value=repository.repository_uri),
                 "REGION": codebuild.BuildEnvironmentVariable(value=self.region),
                 "ACCOUNT_ID": codebuild.BuildEnvironmentVariable(value=core.Aws.ACCOUNT_ID),
+                "PLATFORMS": codebuild.BuildEnvironmentVariable(value=IMAGE_PLATFORMS),
                 # "MONGODB_HOST": codebuild.BuildEnvironmentVariable(value=ssm.StringParameter.from_string_parameter_name(
                 #     self,"MongoDBHost",string_parameter_name="/depo/test/secret/mongo/host",).string_value),    
                 # "MONGODB_USER":codebuild.BuildEnvironmentVariable(value=ssm.StringParameter.from_string_parameter_name(
@@ -119,6 +184,18 @@ class Base(core.Stack):
 
         repository.grant_pull_push(build_role)
 
+        # durations of the build steps and phases, alarms on build-time regressions
+        BuildMonitoring(
+            self,
+            "BuildMonitoring",
+            project=build,
+            namespace=BUILD_METRICS_NAMESPACE,
+            step_budgets=BUILD_STEP_BUDGETS,
+            duration_budget=BUILD_DURATION_BUDGET,
+            dashboard_name=f"{props['namespace']}-build-{self.region}",
+            alarm_emails=props["alarm_emails"],
+        )
+
         self.output_props = props.copy()
         self.output_props["build"] = build
         self.output_props["bucket"] = bucket
@@ -150,6 +227,15 @@ class Base(core.Stack):
 
         role.add_to_policy(iam.PolicyStatement(actions=["sts:AssumeRole"], resources=["*"]))
 
+        # build step durations, see build_timings.py
+        role.add_to_policy(
+            iam.PolicyStatement(
+                actions=["cloudwatch:PutMetricData"],
+                resources=["*"],
+                conditions={"StringEquals": {"cloudwatch:namespace": BUILD_METRICS_NAMESPACE}},
+            )
+        )
+
         # allow codebuild to pull/push images from/to any repository
         # this is needed because the base image in Dockerfile is a
         # ubuntu:20.04 image hosted in an ECR repository
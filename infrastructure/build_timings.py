@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Publishes the durations of the build steps, recorded by the commands of
+`base.timed`, as the `StepDuration` metric (seconds) of the build project.
+Run by the post_build phase of the build, with the aws cli of the image:
+
+python3 infrastructure/build_timings.py <timings file> <namespace> <project name>
+"""
+import json
+import subprocess
+import sys
+
+
+def main(path: str, namespace: str, project: str) -> None:
+    try:
+        with open(path) as f:
+            timings = [line.split() for line in f if line.strip()]
+    except FileNotFoundError:
+        timings = []
+    if not timings:
+        print("no build timings recorded")
+        return
+
+    for step, milliseconds in timings:
+        print(f"{step:<20} {int(milliseconds) / 1000:>8.1f}s")
+
+    metric_data = [
+        {
+            "MetricName": "StepDuration",
+            "Dimensions": [{"Name": "ProjectName", "Value": project}, {"Name": "Step", "Value": step}],
+            "Value": int(milliseconds) / 1000,
+            "Unit": "Seconds",
+        }
+        for step, milliseconds in timings
+    ]
+    subprocess.run(
+        ["aws", "cloudwatch", "put-metric-data", "--namespace", namespace, "--metric-data", json.dumps(metric_data)],
+        check=True,
+    )
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:4])
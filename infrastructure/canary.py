@@ -0,0 +1,207 @@
+import copy
+from typing import Dict, List, Optional
+
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+
+ARGO_ROLLOUTS_CHART_VERSION = "2.21.3"
+PROMETHEUS_CHART_VERSION = "15.12.0"
+CANARY_NAMESPACE = "argo-rollouts"
+
+# in-cluster address of the prometheus server installed below (release `prometheus`)
+PROMETHEUS_ADDRESS = f"http://prometheus-server.{CANARY_NAMESPACE}.svc.cluster.local"
+
+# share of the traffic sent to the new version, then observed, before the next step
+CANARY_STEPS = [
+    {"setWeight": 10},
+    {"pause": {"duration": "5m"}},
+    {"setWeight": 50},
+    {"pause": {"duration": "5m"}},
+]
+
+# the canary is rolled back when, over the last 2 minutes, its p99 latency is above this
+# ratio of the stable p99 or its 5xx rate (%) above the stable one by this many points
+CANARY_THRESHOLDS = {"latency_p99_ratio": 1.5, "error_rate_increase": 1.0}
+
+# stable p99 (seconds) used as the base of the ratio when below, so fast routes don't make it noisy
+LATENCY_FLOOR = 0.1
+
+
+class CanaryReleases(core.Construct):
+    """
+    Canary releases of the API with Argo Rollouts.
+
+    The API runs as a `Rollout` of its Deployment (see `rollout`): a new
+    version first takes a small share of the requests, through the weighted
+    target groups of the stable and canary services set on the ALB by the
+    Argo Rollouts controller.
+    While the canary runs, an analysis compares the p99 latency and the 5xx
+    rate of the canary pods with the stable pods, from the
+    `http_request_duration_seconds` histogram scraped by a Prometheus server.
+    The version is promoted after the last step, or rolled back as soon as the
+    analysis fails.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        app_name: str,
+        thresholds: Optional[Dict[str, float]] = None,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.app_name = app_name
+        thresholds = {**CANARY_THRESHOLDS, **(thresholds or {})}
+
+        self.controller = eks.HelmChart(
+            self,
+            "ArgoRollouts",
+            cluster=cluster,
+            chart="argo-rollouts",
+            repository="https://argoproj.github.io/argo-helm",
+            version=ARGO_ROLLOUTS_CHART_VERSION,
+            release="argo-rollouts",
+            namespace=CANARY_NAMESPACE,
+            create_namespace=True,
+        )
+
+        # only the server, scraping the pods annotated with `prometheus.io/scrape`
+        prometheus = eks.HelmChart(
+            self,
+            "Prometheus",
+            cluster=cluster,
+            chart="prometheus",
+            repository="https://prometheus-community.github.io/helm-charts",
+            version=PROMETHEUS_CHART_VERSION,
+            release="prometheus",
+            namespace=CANARY_NAMESPACE,
+            create_namespace=True,
+            values={
+                "alertmanager": {"enabled": False},
+                "pushgateway": {"enabled": False},
+                "nodeExporter": {"enabled": False},
+                "kubeStateMetrics": {"enabled": False},
+                "server": {
+                    "retention": "2d",
+                    "persistentVolume": {"enabled": False},
+                    "resources": {
+                        "limits": {"cpu": "500m", "memory": "1Gi"},
+                        "requests": {"cpu": "100m", "memory": "512Mi"},
+                    },
+                },
+            },
+        )
+        prometheus.node.add_dependency(self.controller)
+
+        self.analysis_template_name = f"{app_name}-canary-analysis"
+        analysis_template = eks.KubernetesManifest(
+            self,
+            "AnalysisTemplate",
+            cluster=cluster,
+            manifest=[self._analysis_template(thresholds)],
+        )
+        # the AnalysisTemplate kind is defined by the chart
+        analysis_template.node.add_dependency(self.controller)
+
+    def rollout(
+        self,
+        deployment: Dict,
+        stable_service: str,
+        canary_service: str,
+        ingress: str,
+        service_port: int = 80,
+        steps: Optional[List[Dict]] = None,
+    ) -> Dict:
+        """
+        Rollout manifest running the pods of a Deployment manifest with canary releases.
+
+        The Rollout references the Deployment (`workloadRef`) instead of
+        copying its pod template, so both are applied: the versions are
+        released by changing the template of the Deployment, and the
+        controller scales the Deployment down as the pods of the Rollout
+        become ready, which moves a running Deployment to canaries without
+        dropping its pods first.
+        """
+        return {
+            "apiVersion": "argoproj.io/v1alpha1",
+            "kind": "Rollout",
+            "metadata": copy.deepcopy(deployment["metadata"]),
+            "spec": {
+                "selector": copy.deepcopy(deployment["spec"]["selector"]),
+                "workloadRef": {
+                    "apiVersion": deployment["apiVersion"],
+                    "kind": deployment["kind"],
+                    "name": deployment["metadata"]["name"],
+                    "scaleDown": "progressively",
+                },
+                "strategy": {
+                    "canary": {
+                        "stableService": stable_service,
+                        "canaryService": canary_service,
+                        "trafficRouting": {
+                            "alb": {"ingress": ingress, "rootService": stable_service, "servicePort": service_port}
+                        },
+                        "analysis": {
+                            "templates": [{"templateName": self.analysis_template_name}],
+                            # from the first weight on, until the promotion
+                            "startingStep": 1,
+                            "args": [
+                                {"name": "canary-hash", "valueFrom": {"podTemplateHashValue": "Latest"}},
+                                {"name": "stable-hash", "valueFrom": {"podTemplateHashValue": "Stable"}},
+                            ],
+                        },
+                        "steps": steps or CANARY_STEPS,
+                    }
+                },
+            },
+        }
+
+    def _analysis_template(self, thresholds: Dict[str, float]) -> Dict:
+        def selector(arg: str) -> str:
+            return f'app_kubernetes_io_name="{self.app_name}-app",rollouts_pod_template_hash="{{{{args.{arg}}}}}"'
+
+        def p99(arg: str) -> str:
+            return (
+                "histogram_quantile(0.99, sum by (le) "
+                f"(rate(http_request_duration_seconds_bucket{{{selector(arg)}}}[2m])))"
+            )
+
+        def error_rate(arg: str) -> str:
+            return (
+                f'100 * (sum(rate(http_request_duration_seconds_count{{{selector(arg)},status_code=~"5.."}}[2m])) or vector(0))'
+                f" / sum(rate(http_request_duration_seconds_count{{{selector(arg)}}}[2m]))"
+            )
+
+        def metric(name: str, query: str, threshold: float) -> Dict:
+            return {
+                "name": name,
+                "interval": "1m",
+                # a single bad minute doesn't roll back the release
+                "failureLimit": 1,
+                # no request served by the canary yet
+                "successCondition": f"isNaN(result[0]) || result[0] <= {threshold}",
+                "provider": {"prometheus": {"address": PROMETHEUS_ADDRESS, "query": query}},
+            }
+
+        return {
+            "apiVersion": "argoproj.io/v1alpha1",
+            "kind": "AnalysisTemplate",
+            "metadata": {"name": self.analysis_template_name},
+            "spec": {
+                "args": [{"name": "canary-hash"}, {"name": "stable-hash"}],
+                "metrics": [
+                    metric(
+                        "latency-p99-ratio",
+                        f"{p99('canary-hash')} / clamp_min({p99('stable-hash')}, {LATENCY_FLOOR})",
+                        thresholds["latency_p99_ratio"],
+                    ),
+                    metric(
+                        "error-rate-increase",
+                        f"({error_rate('canary-hash')}) - ({error_rate('stable-hash')} or vector(0))",
+                        thresholds["error_rate_increase"],
+                    ),
+                ],
+            },
+        }
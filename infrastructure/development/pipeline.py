@@ -8,7 +8,7 @@ from aws_cdk import (
 
 from typing import Dict
 
-from staging.backend import Stage
+from backend import Stage
 
 
 class Pipeline(core.Stack):
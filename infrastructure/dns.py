@@ -0,0 +1,151 @@
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+
+NODE_LOCAL_DNS_IMAGE = "registry.k8s.io/dns/k8s-dns-node-cache:1.22.13"
+
+# link-local address the cache listens on, next to the cluster DNS service address
+NODE_LOCAL_DNS_IP = "169.254.20.10"
+
+# resolv.conf options of the API pods: the external hosts (`cluster0.xxx.mongodb.net`,
+# `api.opensea.io`...) have at least 2 dots, so they are looked up as is instead of
+# being tried with every search domain first, as with the default `ndots:5`
+POD_DNS_CONFIG = {"options": [{"name": "ndots", "value": "2"}]}
+
+
+class NodeLocalDnsCache(core.Construct):
+    """
+    NodeLocal DNSCache DaemonSet, a DNS cache on every node.
+
+    Runs in iptables mode: the cache binds the address of the cluster DNS
+    service on each node, so the pods keep their resolv.conf and their
+    lookups are answered by the cache of their node, which forwards the
+    misses to CoreDNS (cluster names) or to the VPC resolver (the others).
+    `cluster_dns_ip` is the ClusterIP of the `kube-dns` service.
+    """
+
+    def __init__(self, scope: core.Construct, id: str, cluster: eks.ICluster, cluster_dns_ip: str) -> None:
+        super().__init__(scope, id)
+
+        # the `__PILLAR__` values left are filled in by the cache when it starts
+        def zone(name: str, forward: str, cache: str = "cache 30", health: bool = False) -> str:
+            return "\n".join(
+                [
+                    f"{name}:53 {{",
+                    "    errors",
+                    f"    {cache}",
+                    "    reload",
+                    "    loop",
+                    f"    bind {NODE_LOCAL_DNS_IP} {cluster_dns_ip}",
+                    f"    forward . {forward}",
+                    "    prometheus :9253",
+                ]
+                + ([f"    health {NODE_LOCAL_DNS_IP}:8080"] if health else [])
+                + ["}", ""]
+            )
+
+        cluster_forward = "__PILLAR__CLUSTER__DNS__ {\n        force_tcp\n    }"
+        corefile = "".join(
+            [
+                zone("cluster.local", cluster_forward, cache="cache {\n        success 9984 30\n        denial 9984 5\n    }", health=True),
+                zone("in-addr.arpa", cluster_forward),
+                zone("ip6.arpa", cluster_forward),
+                zone(".", "__PILLAR__UPSTREAM__SERVERS__"),
+            ]
+        )
+
+        service_account = {
+            "apiVersion": "v1",
+            "kind": "ServiceAccount",
+            "metadata": {"name": "node-local-dns", "namespace": "kube-system"},
+        }
+
+        # CoreDNS, reached by the cache without going through the address it binds
+        upstream_service = {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": "kube-dns-upstream", "namespace": "kube-system", "labels": {"k8s-app": "kube-dns"}},
+            "spec": {
+                "ports": [
+                    {"name": "dns", "port": 53, "protocol": "UDP", "targetPort": 53},
+                    {"name": "dns-tcp", "port": 53, "protocol": "TCP", "targetPort": 53},
+                ],
+                "selector": {"k8s-app": "kube-dns"},
+            },
+        }
+
+        config_map = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": "node-local-dns", "namespace": "kube-system"},
+            "data": {"Corefile": corefile},
+        }
+
+        daemon_set = {
+            "apiVersion": "apps/v1",
+            "kind": "DaemonSet",
+            "metadata": {"name": "node-local-dns", "namespace": "kube-system", "labels": {"k8s-app": "node-local-dns"}},
+            "spec": {
+                "updateStrategy": {"rollingUpdate": {"maxUnavailable": "10%"}},
+                "selector": {"matchLabels": {"k8s-app": "node-local-dns"}},
+                "template": {
+                    "metadata": {
+                        "labels": {"k8s-app": "node-local-dns"},
+                        "annotations": {"prometheus.io/port": "9253", "prometheus.io/scrape": "true"},
+                    },
+                    "spec": {
+                        "priorityClassName": "system-node-critical",
+                        "serviceAccountName": "node-local-dns",
+                        "hostNetwork": True,
+                        "dnsPolicy": "Default",
+                        "tolerations": [{"key": "CriticalAddonsOnly", "operator": "Exists"}, {"operator": "Exists"}],
+                        "containers": [
+                            {
+                                "name": "node-cache",
+                                "image": NODE_LOCAL_DNS_IMAGE,
+                                "resources": {"requests": {"cpu": "25m", "memory": "5Mi"}},
+                                "args": [
+                                    "-localip",
+                                    f"{NODE_LOCAL_DNS_IP},{cluster_dns_ip}",
+                                    "-conf",
+                                    "/etc/Corefile",
+                                    "-upstreamsvc",
+                                    "kube-dns-upstream",
+                                ],
+                                "securityContext": {"capabilities": {"add": ["NET_ADMIN"]}},
+                                "ports": [
+                                    {"containerPort": 53, "name": "dns", "protocol": "UDP"},
+                                    {"containerPort": 53, "name": "dns-tcp", "protocol": "TCP"},
+                                    {"containerPort": 9253, "name": "metrics", "protocol": "TCP"},
+                                ],
+                                "livenessProbe": {
+                                    "httpGet": {"host": NODE_LOCAL_DNS_IP, "path": "/health", "port": 8080},
+                                    "initialDelaySeconds": 60,
+                                    "timeoutSeconds": 5,
+                                },
+                                "volumeMounts": [
+                                    {"mountPath": "/run/xtables.lock", "name": "xtables-lock", "readOnly": False},
+                                    {"name": "config-volume", "mountPath": "/etc/coredns"},
+                                ],
+                            }
+                        ],
+                        "volumes": [
+                            {"name": "xtables-lock", "hostPath": {"path": "/run/xtables.lock", "type": "FileOrCreate"}},
+                            {
+                                "name": "config-volume",
+                                "configMap": {
+                                    "name": "node-local-dns",
+                                    "items": [{"key": "Corefile", "path": "Corefile.base"}],
+                                },
+                            },
+                        ],
+                    },
+                },
+            },
+        }
+
+        eks.KubernetesManifest(
+            self,
+            "NodeLocalDns",
+            cluster=cluster,
+            manifest=[service_account, upstream_service, config_map, daemon_set],
+        )
@@ -0,0 +1,206 @@
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_logs as logs
+
+FLUENT_BIT_IMAGE = "public.ecr.aws/aws-observability/aws-for-fluent-bit:2.28.4"
+FLUENT_BIT_NAMESPACE = "amazon-cloudwatch"
+
+
+class LogShipping(core.Construct):
+    """
+    Fluent Bit DaemonSet shipping the API container output to CloudWatch Logs.
+
+    The API writes its logs to stdout as JSON lines, Fluent Bit tails the
+    container log files on every node, enriches them with the kubernetes
+    metadata and pushes them in batches to the log group created here.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        app_name: str,
+        log_group_name: str,
+        retention: logs.RetentionDays = logs.RetentionDays.ONE_MONTH,
+    ) -> None:
+        super().__init__(scope, id)
+
+        region = core.Stack.of(self).region
+
+        self.log_group = logs.LogGroup(
+            self,
+            "LogGroup",
+            log_group_name=log_group_name,
+            retention=retention,
+            removal_policy=core.RemovalPolicy.RETAIN,
+        )
+
+        self.namespace = namespace = eks.KubernetesManifest(
+            self,
+            "Namespace",
+            cluster=cluster,
+            manifest=[{"apiVersion": "v1", "kind": "Namespace", "metadata": {"name": FLUENT_BIT_NAMESPACE}}],
+        )
+
+        service_account = eks.ServiceAccount(
+            self,
+            "ServiceAccount",
+            cluster=cluster,
+            name="fluent-bit",
+            namespace=FLUENT_BIT_NAMESPACE,
+        )
+        service_account.node.add_dependency(namespace)
+        service_account.add_to_principal_policy(
+            iam.PolicyStatement(
+                actions=["logs:CreateLogStream", "logs:DescribeLogStreams", "logs:PutLogEvents"],
+                resources=[self.log_group.log_group_arn],
+            )
+        )
+
+        cluster_role = {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRole",
+            "metadata": {"name": "fluent-bit-role"},
+            "rules": [
+                {"nonResourceURLs": ["/metrics"], "verbs": ["get"]},
+                {"apiGroups": [""], "resources": ["namespaces", "pods", "pods/logs"], "verbs": ["get", "list", "watch"]},
+            ],
+        }
+
+        cluster_role_binding = {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRoleBinding",
+            "metadata": {"name": "fluent-bit-role-binding"},
+            "roleRef": {"apiGroup": "rbac.authorization.k8s.io", "kind": "ClusterRole", "name": "fluent-bit-role"},
+            "subjects": [
+                {"kind": "ServiceAccount", "name": service_account.service_account_name, "namespace": FLUENT_BIT_NAMESPACE}
+            ],
+        }
+
+        # only the application containers are tailed, the JSON lines written
+        # by the API are merged into the record by the kubernetes filter
+        config_map = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": "fluent-bit-config", "namespace": FLUENT_BIT_NAMESPACE},
+            "data": {
+                "fluent-bit.conf": "\n".join(
+                    [
+                        "[SERVICE]",
+                        "    Flush                     5",
+                        "    Log_Level                 info",
+                        "    Daemon                    off",
+                        "    Parsers_File              parsers.conf",
+                        "    HTTP_Server               On",
+                        "    HTTP_Listen               0.0.0.0",
+                        "    HTTP_Port                 2020",
+                        "    storage.path              /var/fluent-bit/state/flb-storage/",
+                        "    storage.sync              normal",
+                        "    storage.backlog.mem_limit 5M",
+                        "",
+                        "[INPUT]",
+                        "    Name                tail",
+                        "    Tag                 application.*",
+                        f"    Path                /var/log/containers/{app_name}-*_default_*.log",
+                        "    multiline.parser    docker, cri",
+                        "    DB                  /var/fluent-bit/state/flb_container.db",
+                        "    Mem_Buf_Limit       50MB",
+                        "    Skip_Long_Lines     On",
+                        "    Refresh_Interval    10",
+                        "    Rotate_Wait         30",
+                        "    storage.type        filesystem",
+                        "",
+                        "[FILTER]",
+                        "    Name                kubernetes",
+                        "    Match               application.*",
+                        "    Kube_URL            https://kubernetes.default.svc:443",
+                        "    Kube_Tag_Prefix     application.var.log.containers.",
+                        "    Merge_Log           On",
+                        "    Keep_Log            Off",
+                        "    K8S-Logging.Parser  On",
+                        "    K8S-Logging.Exclude On",
+                        "    Labels              Off",
+                        "    Annotations         Off",
+                        "",
+                        "[OUTPUT]",
+                        "    Name                cloudwatch_logs",
+                        "    Match               application.*",
+                        f"    region              {region}",
+                        f"    log_group_name      {log_group_name}",
+                        "    log_stream_prefix   ${HOST_NAME}-",
+                        "    auto_create_group   false",
+                        "    extra_user_agent    container-insights",
+                        "",
+                    ]
+                ),
+                "parsers.conf": "\n".join(
+                    [
+                        "[PARSER]",
+                        "    Name        docker",
+                        "    Format      json",
+                        "    Time_Key    time",
+                        "    Time_Format %Y-%m-%dT%H:%M:%S.%LZ",
+                        "",
+                    ]
+                ),
+            },
+        }
+
+        daemon_set = {
+            "apiVersion": "apps/v1",
+            "kind": "DaemonSet",
+            "metadata": {"name": "fluent-bit", "namespace": FLUENT_BIT_NAMESPACE},
+            "spec": {
+                "selector": {"matchLabels": {"k8s-app": "fluent-bit"}},
+                "updateStrategy": {"type": "RollingUpdate"},
+                "template": {
+                    "metadata": {"labels": {"k8s-app": "fluent-bit"}},
+                    "spec": {
+                        "serviceAccountName": service_account.service_account_name,
+                        "terminationGracePeriodSeconds": 10,
+                        "containers": [
+                            {
+                                "name": "fluent-bit",
+                                "image": FLUENT_BIT_IMAGE,
+                                "imagePullPolicy": "Always",
+                                "env": [
+                                    {"name": "AWS_REGION", "value": region},
+                                    {"name": "HOST_NAME", "valueFrom": {"fieldRef": {"fieldPath": "spec.nodeName"}}},
+                                ],
+                                "resources": {
+                                    "limits": {"memory": "200Mi"},
+                                    "requests": {"cpu": "50m", "memory": "50Mi"},
+                                },
+                                "volumeMounts": [
+                                    {"name": "fluentbitstate", "mountPath": "/var/fluent-bit/state"},
+                                    {"name": "varlog", "mountPath": "/var/log", "readOnly": True},
+                                    {"name": "varlibdockercontainers", "mountPath": "/var/lib/docker/containers", "readOnly": True},
+                                    {"name": "fluent-bit-config", "mountPath": "/fluent-bit/etc/"},
+                                ],
+                            }
+                        ],
+                        "volumes": [
+                            {"name": "fluentbitstate", "hostPath": {"path": "/var/fluent-bit/state"}},
+                            {"name": "varlog", "hostPath": {"path": "/var/log"}},
+                            {"name": "varlibdockercontainers", "hostPath": {"path": "/var/lib/docker/containers"}},
+                            {"name": "fluent-bit-config", "configMap": {"name": "fluent-bit-config"}},
+                        ],
+                        "tolerations": [
+                            {"key": "node-role.kubernetes.io/master", "operator": "Exists", "effect": "NoSchedule"},
+                            {"operator": "Exists", "effect": "NoExecute"},
+                            {"operator": "Exists", "effect": "NoSchedule"},
+                        ],
+                    },
+                },
+            },
+        }
+
+        manifest = eks.KubernetesManifest(
+            self,
+            "FluentBit",
+            cluster=cluster,
+            manifest=[cluster_role, cluster_role_binding, config_map, daemon_set],
+        )
+        manifest.node.add_dependency(service_account)
@@ -0,0 +1,60 @@
+import copy
+import hashlib
+import json
+from typing import Dict
+
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+from aws_cdk import aws_lambda as lambda_
+
+# memory of the kubectl handler (1GiB by default), its CPU share grows with it so kubectl
+# and the aws cli of each apply start faster
+KUBECTL_MEMORY = core.Size.gibibytes(4)
+
+# hash of the content of the object, as synthesized, see `apply_manifest`
+CONTENT_HASH_ANNOTATION = "depo.io/content-hash"
+
+
+def content_hash(scope: core.Construct, manifest: Dict) -> str:
+    """Hash of the manifest with its tokens resolved, stable from a synth to the next."""
+    resolved = core.Stack.of(scope).resolve(manifest)
+    return hashlib.sha256(json.dumps(resolved, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def apply_manifest(scope: core.Construct, id: str, cluster: eks.ICluster, *manifests: Dict) -> eks.KubernetesManifest:
+    """
+    Applies `manifests` with the kubectl provider, each object annotated with
+    the hash of its content.
+
+    CloudFormation only calls the provider for the manifests whose content
+    changed, so the hash tells which objects a deploy applies (`cdk diff`)
+    and whether an object of the cluster is the one of a version (`kubectl get
+    -o yaml`). The objects are pruned: the ones removed from a manifest are
+    deleted. They are applied without client-side validation, which downloads
+    the OpenAPI schema of the cluster on every apply, the API server still
+    validates them.
+
+    `cluster.add_manifest(id, ...)` is `apply_manifest(cluster, f"manifest-{id}", cluster, ...)`,
+    the resources of the manifests added that way are kept.
+    """
+    annotated = []
+    for manifest in manifests:
+        manifest = copy.deepcopy(manifest)
+        metadata = manifest.setdefault("metadata", {})
+        metadata["annotations"] = {
+            **metadata.get("annotations", {}),
+            CONTENT_HASH_ANNOTATION: content_hash(scope, manifest),
+        }
+        annotated.append(manifest)
+    return eks.KubernetesManifest(scope, id, cluster=cluster, manifest=annotated, prune=True, skip_validation=True)
+
+
+def kubectl_handler(scope: core.Construct, cluster: eks.ICluster) -> lambda_.IFunction:
+    """
+    Function applying the manifests of the imported `cluster` in the stack of
+    `scope`, created by CDK with the first manifest; its duration is the time
+    taken by each manifest application.
+    """
+    stack = core.Stack.of(scope)
+    provider = stack.node.find_child(f"{core.Names.node_unique_id(cluster.node)}-KubectlProvider")
+    return provider.node.find_child("Handler")
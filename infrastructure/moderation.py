@@ -0,0 +1,44 @@
+from aws_cdk import core
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_sqs as sqs
+
+
+class ModerationQueue(core.Construct):
+    """
+    Upload event queue of the region, fed by the API pods with the uploaded
+    media waiting for moderation and consumed in batches by the moderation
+    worker. A message failing `max_receive_count` times moves to the dead
+    letter queue, which keeps it for inspection.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        max_receive_count: int = 5,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.dead_letter_queue = sqs.Queue(
+            self,
+            "DeadLetterQueue",
+            encryption=sqs.QueueEncryption.KMS_MANAGED,
+            retention_period=core.Duration.days(14),
+        )
+
+        self.queue = sqs.Queue(
+            self,
+            "Queue",
+            encryption=sqs.QueueEncryption.KMS_MANAGED,
+            # covers the download and moderation of a whole batch
+            visibility_timeout=core.Duration.minutes(2),
+            retention_period=core.Duration.days(4),
+            dead_letter_queue=sqs.DeadLetterQueue(queue=self.dead_letter_queue, max_receive_count=max_receive_count),
+        )
+
+    def grant_moderate(self, grantee: iam.IGrantable) -> None:
+        """Allows the worker to consume the queue and to call Rekognition."""
+        self.queue.grant_consume_messages(grantee)
+        grantee.grant_principal.add_to_principal_policy(
+            iam.PolicyStatement(actions=["rekognition:DetectModerationLabels"], resources=["*"])
+        )
@@ -0,0 +1,523 @@
+from typing import Dict, List, Optional
+
+from aws_cdk import core
+from aws_cdk import aws_cloudwatch as cw
+from aws_cdk import aws_cloudwatch_actions as cw_actions
+from aws_cdk import aws_codebuild as codebuild
+from aws_cdk import aws_eks as eks
+from aws_cdk import aws_iam as iam
+from aws_cdk import aws_lambda as lambda_
+from aws_cdk import aws_sns as sns
+from aws_cdk import aws_sns_subscriptions as subscriptions
+from aws_cdk import custom_resources as cr
+
+CLOUDWATCH_AGENT_IMAGE = "public.ecr.aws/cloudwatch-agent/cloudwatch-agent:1.247355.0b252062"
+CLOUDWATCH_AGENT_NAMESPACE = "amazon-cloudwatch"
+
+ALB_NAMESPACE = "AWS/ApplicationELB"
+CONTAINER_INSIGHTS_NAMESPACE = "ContainerInsights"
+
+
+class ContainerInsights(core.Construct):
+    """
+    CloudWatch agent DaemonSet publishing the Container Insights metrics
+    (pod CPU / memory, restarts...) of the cluster.
+
+    The agent runs in the namespace created for Fluent Bit by `LogShipping`,
+    the manifest passed as `namespace` is only used to order the deployment.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        namespace: Optional[core.Construct] = None,
+    ) -> None:
+        super().__init__(scope, id)
+
+        service_account = eks.ServiceAccount(
+            self,
+            "ServiceAccount",
+            cluster=cluster,
+            name="cloudwatch-agent",
+            namespace=CLOUDWATCH_AGENT_NAMESPACE,
+        )
+        if namespace is not None:
+            service_account.node.add_dependency(namespace)
+        service_account.role.add_managed_policy(
+            iam.ManagedPolicy.from_aws_managed_policy_name("CloudWatchAgentServerPolicy")
+        )
+
+        cluster_role = {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRole",
+            "metadata": {"name": "cloudwatch-agent-role"},
+            "rules": [
+                {"apiGroups": [""], "resources": ["pods", "nodes", "endpoints"], "verbs": ["list", "watch"]},
+                {"apiGroups": ["apps"], "resources": ["replicasets"], "verbs": ["list", "watch"]},
+                {"apiGroups": ["batch"], "resources": ["jobs"], "verbs": ["list", "watch"]},
+                {"apiGroups": [""], "resources": ["nodes/proxy"], "verbs": ["get"]},
+                {"apiGroups": [""], "resources": ["nodes/stats", "configmaps", "events"], "verbs": ["create"]},
+                {
+                    "apiGroups": [""],
+                    "resources": ["configmaps"],
+                    "resourceNames": ["cwagent-clusterleader"],
+                    "verbs": ["get", "update"],
+                },
+            ],
+        }
+
+        cluster_role_binding = {
+            "apiVersion": "rbac.authorization.k8s.io/v1",
+            "kind": "ClusterRoleBinding",
+            "metadata": {"name": "cloudwatch-agent-role-binding"},
+            "roleRef": {"apiGroup": "rbac.authorization.k8s.io", "kind": "ClusterRole", "name": "cloudwatch-agent-role"},
+            "subjects": [
+                {
+                    "kind": "ServiceAccount",
+                    "name": service_account.service_account_name,
+                    "namespace": CLOUDWATCH_AGENT_NAMESPACE,
+                }
+            ],
+        }
+
+        config_map = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": "cwagentconfig", "namespace": CLOUDWATCH_AGENT_NAMESPACE},
+            "data": {
+                "cwagentconfig.json": core.Stack.of(self).to_json_string(
+                    {
+                        "logs": {
+                            "metrics_collected": {
+                                "kubernetes": {
+                                    "cluster_name": cluster.cluster_name,
+                                    "metrics_collection_interval": 60,
+                                }
+                            },
+                            "force_flush_interval": 5,
+                        }
+                    }
+                ),
+            },
+        }
+
+        host_path_mounts = [
+            ("rootfs", "/rootfs", "/"),
+            ("dockersock", "/var/run/docker.sock", "/var/run/docker.sock"),
+            ("varlibdocker", "/var/lib/docker", "/var/lib/docker"),
+            ("containerdsock", "/run/containerd/containerd.sock", "/run/containerd/containerd.sock"),
+            ("sys", "/sys", "/sys"),
+            ("devdisk", "/dev/disk", "/dev/disk/"),
+        ]
+
+        daemon_set = {
+            "apiVersion": "apps/v1",
+            "kind": "DaemonSet",
+            "metadata": {"name": "cloudwatch-agent", "namespace": CLOUDWATCH_AGENT_NAMESPACE},
+            "spec": {
+                "selector": {"matchLabels": {"name": "cloudwatch-agent"}},
+                "template": {
+                    "metadata": {"labels": {"name": "cloudwatch-agent"}},
+                    "spec": {
+                        "serviceAccountName": service_account.service_account_name,
+                        "terminationGracePeriodSeconds": 60,
+                        "containers": [
+                            {
+                                "name": "cloudwatch-agent",
+                                "image": CLOUDWATCH_AGENT_IMAGE,
+                                "resources": {
+                                    "limits": {"cpu": "200m", "memory": "200Mi"},
+                                    "requests": {"cpu": "50m", "memory": "100Mi"},
+                                },
+                                "env": [
+                                    {"name": "HOST_IP", "valueFrom": {"fieldRef": {"fieldPath": "status.hostIP"}}},
+                                    {"name": "HOST_NAME", "valueFrom": {"fieldRef": {"fieldPath": "spec.nodeName"}}},
+                                    {
+                                        "name": "K8S_NAMESPACE",
+                                        "valueFrom": {"fieldRef": {"fieldPath": "metadata.namespace"}},
+                                    },
+                                    {"name": "CI_VERSION", "value": "k8s/1.3.10"},
+                                ],
+                                "volumeMounts": [{"name": "cwagentconfig", "mountPath": "/etc/cwagentconfig"}]
+                                + [
+                                    {"name": name, "mountPath": mount_path, "readOnly": True}
+                                    for name, mount_path, _ in host_path_mounts
+                                ],
+                            }
+                        ],
+                        "volumes": [{"name": "cwagentconfig", "configMap": {"name": "cwagentconfig"}}]
+                        + [{"name": name, "hostPath": {"path": path}} for name, _, path in host_path_mounts],
+                    },
+                },
+            },
+        }
+
+        manifest = eks.KubernetesManifest(
+            self,
+            "CloudWatchAgent",
+            cluster=cluster,
+            manifest=[cluster_role, cluster_role_binding, config_map, daemon_set],
+        )
+        manifest.node.add_dependency(service_account)
+
+
+class Monitoring(core.Construct):
+    """
+    Regional CloudWatch dashboard and latency SLO alarms of the API.
+
+    The ALB is created by the ingress controller after the ingress manifest
+    is applied, so it is looked up at deploy time, by its name, once the
+    ingress has an address (see `load_balancer_full_name`). The thresholds are
+    given by each environment, alarms are sent to an SNS topic.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        app_name: str,
+        dashboard_name: str,
+        thresholds: Dict[str, float],
+        alarm_emails: List[str],
+        load_balancer_name: str,
+        ingress: core.Construct,
+        kubectl_handler: Optional[lambda_.IFunction] = None,
+    ) -> None:
+        super().__init__(scope, id)
+
+        region = core.Stack.of(self).region
+
+        load_balancer_full_name = self.load_balancer_full_name(
+            cluster, f"{app_name}-ingress", load_balancer_name, ingress
+        )
+
+        latency = {
+            stat: alb_metric("TargetResponseTime", load_balancer_full_name, stat, label=f"{stat} latency")
+            for stat in ["p50", "p90", "p99"]
+        }
+        requests = alb_metric("RequestCount", load_balancer_full_name, "Sum", label="requests")
+        error_rate = cw.MathExpression(
+            expression="100 * (FILL(target5xx, 0) + FILL(elb5xx, 0)) / FILL(requests, 1)",
+            using_metrics={
+                "target5xx": alb_metric("HTTPCode_Target_5XX_Count", load_balancer_full_name, "Sum"),
+                "elb5xx": alb_metric("HTTPCode_ELB_5XX_Count", load_balancer_full_name, "Sum"),
+                "requests": requests,
+            },
+            label="5xx rate (%)",
+            period=core.Duration.minutes(1),
+        )
+        healthy_hosts = cw.MathExpression(
+            expression=(
+                "SEARCH('{AWS/ApplicationELB,LoadBalancer,TargetGroup} MetricName=\"HealthyHostCount\" "
+                f"LoadBalancer=\"{load_balancer_full_name}\"', 'Minimum', 60)"
+            ),
+            using_metrics={},
+            label="healthy hosts",
+        )
+        pod_cpu = pod_metric("pod_cpu_utilization", cluster.cluster_name, app_name)
+        pod_memory = pod_metric("pod_memory_utilization", cluster.cluster_name, app_name)
+
+        self.dashboard = cw.Dashboard(self, "Dashboard", dashboard_name=dashboard_name)
+        self.dashboard.add_widgets(
+            cw.GraphWidget(
+                title=f"Target response time ({region})",
+                left=list(latency.values()),
+                left_annotations=[
+                    cw.HorizontalAnnotation(value=thresholds["latency_p99"], label="p99 SLO"),
+                    cw.HorizontalAnnotation(value=thresholds["latency_p50"], label="p50 SLO"),
+                ],
+                width=12,
+            ),
+            cw.GraphWidget(
+                title="5xx rate",
+                left=[error_rate],
+                left_annotations=[cw.HorizontalAnnotation(value=thresholds["error_rate"], label="SLO")],
+                width=12,
+            ),
+        )
+        self.dashboard.add_widgets(
+            cw.GraphWidget(title="Requests", left=[requests], width=8),
+            cw.GraphWidget(title="Healthy hosts", left=[healthy_hosts], width=8),
+            cw.GraphWidget(title="Pod CPU / memory (%)", left=[pod_cpu], right=[pod_memory], width=8),
+        )
+        if kubectl_handler is not None:
+            # time taken by each manifest application of the deploys, one invocation per changed manifest
+            period = core.Duration.minutes(5)
+            self.dashboard.add_widgets(
+                cw.GraphWidget(
+                    title="Manifest application (s)",
+                    left=[
+                        cw.MathExpression(
+                            expression=f"{stat} / 1000",
+                            using_metrics={stat: kubectl_handler.metric_duration(statistic=statistic, period=period)},
+                            label=label,
+                            period=period,
+                        )
+                        for stat, statistic, label in [("p50", "p50", "p50"), ("longest", "Maximum", "max")]
+                    ],
+                    right=[kubectl_handler.metric_invocations(period=period, label="manifests applied")],
+                    width=12,
+                ),
+                cw.GraphWidget(
+                    title="Manifest application errors",
+                    left=[kubectl_handler.metric_errors(period=period, label="errors")],
+                    width=12,
+                ),
+            )
+
+        topic = sns.Topic(self, "AlarmTopic", display_name=f"{dashboard_name} alarms")
+        for email in alarm_emails:
+            topic.add_subscription(subscriptions.EmailSubscription(email))
+
+        # three consecutive breaching minutes before paging, so a single slow
+        # deploy or cold pod doesn't fire the alarm
+        alarms = [
+            latency["p99"].create_alarm(
+                self,
+                "LatencyP99Alarm",
+                alarm_description=f"p99 target response time above {thresholds['latency_p99']}s",
+                threshold=thresholds["latency_p99"],
+                evaluation_periods=3,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            ),
+            latency["p50"].create_alarm(
+                self,
+                "LatencyP50Alarm",
+                alarm_description=f"p50 target response time above {thresholds['latency_p50']}s",
+                threshold=thresholds["latency_p50"],
+                evaluation_periods=3,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            ),
+            error_rate.create_alarm(
+                self,
+                "ErrorRateAlarm",
+                alarm_description=f"5xx rate above {thresholds['error_rate']}%",
+                threshold=thresholds["error_rate"],
+                evaluation_periods=3,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            ),
+        ]
+        for alarm in alarms:
+            alarm.add_alarm_action(cw_actions.SnsAction(topic))
+            alarm.add_ok_action(cw_actions.SnsAction(topic))
+
+    def load_balancer_full_name(
+        self, cluster: eks.ICluster, ingress_name: str, load_balancer_name: str, ingress: core.Construct
+    ) -> str:
+        """
+        `app/<name>/<id>` part of the ARN of the ALB of the ingress, which keys
+        its metrics. Resolved by the deploy: waits for the controller to
+        publish the address of the ingress, then describes the ALB by the name
+        set on the ingress, so the first deploy of a region finds the ALB it
+        just created, and a renamed ALB is described again.
+        """
+        address = eks.KubernetesObjectValue(
+            self,
+            "LoadBalancerAddress",
+            cluster=cluster,
+            object_type="ingress",
+            object_name=ingress_name,
+            json_path=".status.loadBalancer.ingress[0].hostname",
+            timeout=core.Duration.minutes(10),
+        )
+        address.node.add_dependency(ingress)
+        lookup = cr.AwsCustomResource(
+            self,
+            "LoadBalancerLookup",
+            on_update=cr.AwsSdkCall(
+                service="ELBv2",
+                action="describeLoadBalancers",
+                parameters={"Names": [load_balancer_name]},
+                physical_resource_id=cr.PhysicalResourceId.from_response("LoadBalancers.0.LoadBalancerArn"),
+                output_paths=["LoadBalancers.0.LoadBalancerArn"],
+            ),
+            policy=cr.AwsCustomResourcePolicy.from_sdk_calls(resources=cr.AwsCustomResourcePolicy.ANY_RESOURCE),
+        )
+        lookup.node.add_dependency(address)
+        arn = lookup.get_response_field("LoadBalancers.0.LoadBalancerArn")
+        return core.Fn.select(1, core.Fn.split(":loadbalancer/", arn))
+
+
+class GlobalDashboard(core.Construct):
+    """
+    Dashboard comparing the API of every production region side by side.
+
+    The ALB of the other regions are not known by this stack, their metrics
+    are found with cross-region SEARCH expressions on the ALB name.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        app_name: str,
+        load_balancer_name: str,
+        dashboard_name: str,
+        regions: List[str],
+    ) -> None:
+        super().__init__(scope, id)
+
+        def search(schema: str, metric_name: str, filters: str, stat: str, period: int = 60):
+            return [
+                cw.MathExpression(
+                    expression=f"SEARCH('{{{schema}}} MetricName=\"{metric_name}\" {filters}', '{stat}', {period})",
+                    using_metrics={},
+                    label=region,
+                    search_region=region,
+                )
+                for region in regions
+            ]
+
+        alb = f"{ALB_NAMESPACE},LoadBalancer"
+        alb_filter = load_balancer_name
+        pods = f"{CONTAINER_INSIGHTS_NAMESPACE},ClusterName,Namespace,Service"
+        pods_filter = f"Namespace=\"default\" Service=\"{app_name}-service\""
+
+        dashboard = cw.Dashboard(self, "Dashboard", dashboard_name=dashboard_name)
+        dashboard.add_widgets(
+            cw.GraphWidget(title="p50 latency", left=search(alb, "TargetResponseTime", alb_filter, "p50"), width=12),
+            cw.GraphWidget(title="p99 latency", left=search(alb, "TargetResponseTime", alb_filter, "p99"), width=12),
+        )
+        dashboard.add_widgets(
+            cw.GraphWidget(
+                title="Target 5xx", left=search(alb, "HTTPCode_Target_5XX_Count", alb_filter, "Sum"), width=12
+            ),
+            cw.GraphWidget(title="Requests", left=search(alb, "RequestCount", alb_filter, "Sum"), width=12),
+        )
+        dashboard.add_widgets(
+            cw.GraphWidget(
+                title="Healthy hosts",
+                left=search(f"{alb},TargetGroup", "HealthyHostCount", alb_filter, "Minimum"),
+                width=8,
+            ),
+            cw.GraphWidget(
+                title="Pod CPU (%)",
+                left=search(pods, "pod_cpu_utilization", pods_filter, "Average", 300),
+                width=8,
+            ),
+            cw.GraphWidget(
+                title="Pod memory (%)",
+                left=search(pods, "pod_memory_utilization", pods_filter, "Average", 300),
+                width=8,
+            ),
+        )
+
+
+def alb_metric(metric_name: str, load_balancer_full_name: str, statistic: str, label: Optional[str] = None):
+    return cw.Metric(
+        namespace=ALB_NAMESPACE,
+        metric_name=metric_name,
+        dimensions_map={"LoadBalancer": load_balancer_full_name},
+        statistic=statistic,
+        label=label,
+        period=core.Duration.minutes(1),
+    )
+
+
+def pod_metric(metric_name: str, cluster_name: str, app_name: str):
+    return cw.Metric(
+        namespace=CONTAINER_INSIGHTS_NAMESPACE,
+        metric_name=metric_name,
+        dimensions_map={"ClusterName": cluster_name, "Namespace": "default", "Service": f"{app_name}-service"},
+        statistic="Average",
+        label=metric_name,
+        period=core.Duration.minutes(5),
+    )
+
+
+class BuildMonitoring(core.Construct):
+    """
+    Dashboard and build-time alarms of the build project of a region.
+
+    The durations of the build steps are the `StepDuration` metric published
+    by the builds in `namespace`, the durations of the phases are the ones of
+    CodeBuild. A step or the whole build taking longer than its budget
+    (seconds) fires an alarm, sent to an SNS topic.
+    """
+
+    PHASES = ["Provisioning", "DownloadSource", "Install", "PreBuild", "Build", "PostBuild", "UploadArtifacts"]
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        project: codebuild.IProject,
+        namespace: str,
+        step_budgets: Dict[str, float],
+        duration_budget: float,
+        dashboard_name: str,
+        alarm_emails: List[str],
+    ) -> None:
+        super().__init__(scope, id)
+
+        # builds are a few per day, each one is a data point of its own
+        period = core.Duration.hours(1)
+        steps = {
+            step: cw.Metric(
+                namespace=namespace,
+                metric_name="StepDuration",
+                dimensions_map={"ProjectName": project.project_name, "Step": step},
+                statistic="Maximum",
+                period=period,
+                label=step,
+            )
+            for step in step_budgets
+        }
+        phases = [
+            project.metric(f"{phase}Duration", statistic="Maximum", period=period, label=phase)
+            for phase in self.PHASES
+        ]
+        duration = project.metric_duration(statistic="Maximum", period=period, label="build")
+
+        dashboard = cw.Dashboard(self, "Dashboard", dashboard_name=dashboard_name)
+        dashboard.add_widgets(
+            cw.GraphWidget(title="Build steps (s)", left=list(steps.values()), width=12),
+            cw.GraphWidget(title="Build phases (s)", left=phases, stacked=True, width=12),
+        )
+        dashboard.add_widgets(
+            cw.GraphWidget(
+                title="Build duration (s)",
+                left=[duration],
+                left_annotations=[cw.HorizontalAnnotation(value=duration_budget, label="budget")],
+                width=12,
+            ),
+            cw.GraphWidget(
+                title="Builds",
+                left=[
+                    project.metric_succeeded_builds(period=period, label="succeeded"),
+                    project.metric_failed_builds(period=period, label="failed"),
+                ],
+                width=12,
+            ),
+        )
+
+        topic = sns.Topic(self, "AlarmTopic", display_name=f"{dashboard_name} alarms")
+        for email in alarm_emails:
+            topic.add_subscription(subscriptions.EmailSubscription(email))
+
+        alarms = [
+            metric.create_alarm(
+                self,
+                f"{''.join(part.title() for part in step.split('-'))}Alarm",
+                alarm_description=f"build step {step} took more than {step_budgets[step]}s",
+                threshold=step_budgets[step],
+                evaluation_periods=1,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            )
+            for step, metric in steps.items()
+        ]
+        alarms.append(
+            duration.create_alarm(
+                self,
+                "DurationAlarm",
+                alarm_description=f"build took more than {duration_budget}s",
+                threshold=duration_budget,
+                evaluation_periods=1,
+                treat_missing_data=cw.TreatMissingData.NOT_BREACHING,
+            )
+        )
+        for alarm in alarms:
+            alarm.add_alarm_action(cw_actions.SnsAction(topic))
@@ -8,7 +8,7 @@ from aws_cdk import (
 
 from typing import Dict
 
-from production.backend import Stage
+from backend import Stage
 
 
 class Pipeline(core.Stack):
@@ -0,0 +1,32 @@
+from aws_cdk import core
+from aws_cdk import aws_s3 as s3
+
+
+class ProfileStore(core.Construct):
+    """
+    Bucket receiving the CPU profiles and heap snapshots captured on
+    demand by the API pods (`POST /ws/v2/profile/:kind`).
+
+    Captures are only needed while investigating, they expire after
+    `retention` days.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        retention: core.Duration = core.Duration.days(14),
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.bucket = s3.Bucket(
+            self,
+            "Bucket",
+            encryption=s3.BucketEncryption.S3_MANAGED,
+            block_public_access=s3.BlockPublicAccess.BLOCK_ALL,
+            enforce_ssl=True,
+            lifecycle_rules=[
+                s3.LifecycleRule(expiration=retention, abort_incomplete_multipart_upload_after=core.Duration.days(1))
+            ],
+            removal_policy=core.RemovalPolicy.RETAIN,
+        )
@@ -0,0 +1,234 @@
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+# cpu architectures the image is built for, see IMAGE_PLATFORMS in base.py
+ARCHITECTURES = ("amd64", "arm64")
+
+_NAME = re.compile(r"^[a-z0-9]([a-z0-9-]*[a-z0-9])?$")
+_LOAD_BALANCER_ATTRIBUTE = re.compile(r"^[a-z0-9_.]+$")
+
+
+@dataclass(frozen=True)
+class Environment:
+    """
+    Settings shared by the regions of an environment: the domain, the names
+    of the resources, the cluster parameters and the objectives of the API.
+    """
+
+    # `ENV` of the pods
+    name: str
+    domain: str
+    # suffix of the resource names and of the SSM parameters of the cluster
+    name_suffix: str
+    ssm_suffix: str
+    # latency (seconds) and 5xx rate (%) objectives of the API
+    slo_thresholds: Dict[str, float]
+    # share of the root requests traced
+    traces_sample_ratio: str
+    alarm_emails: List[str]
+    # API released as canaries, see canary.py
+    canary_releases: bool = False
+    # WAF rate limits on the load balancer, see waf.py
+    edge_rate_limits: bool = False
+    # token exempting the load test of the pipeline from the rate limit
+    load_test: bool = False
+
+    def __post_init__(self) -> None:
+        if set(self.slo_thresholds) != {"latency_p50", "latency_p99", "error_rate"}:
+            raise ValueError(f"{self.name}: slo_thresholds must set latency_p50, latency_p99 and error_rate")
+        if not 0 < float(self.traces_sample_ratio) <= 1:
+            raise ValueError(f"{self.name}: traces_sample_ratio must be in ]0, 1]")
+        if not self.alarm_emails:
+            raise ValueError(f"{self.name}: alarm_emails can't be empty")
+
+
+@dataclass(frozen=True)
+class Capacity:
+    """
+    Size of the backend of a region: the bounds of the API autoscaler and their
+    schedules (cron in UTC, see scaling.py), the workers and resources of the
+    API pods, the moderation workers, the websocket pods, the nodes the pods
+    run on and the attributes of the load balancer.
+    """
+
+    min_replicas: int
+    max_replicas: int
+    scaling_schedules: List[Dict] = field(default_factory=list)
+    # node processes per API pod (cluster workers sharing the port), each one gets a core
+    workers_per_pod: int = 2
+    worker_cpu_millicores: int = 1000
+    worker_memory_mib: int = 512
+    moderation_replicas: int = 1
+    # bounds of the autoscaler of the websocket pods, see websocket.py
+    websocket_min_replicas: int = 1
+    websocket_max_replicas: int = 3
+    # preferred cpu architecture of the nodes, a region moves to Graviton by switching
+    # its backend node group, then its entry
+    node_architecture: str = "amd64"
+    # labels of the nodes the backend pods are restricted to, see `check_workloads`
+    node_selector: Dict[str, str] = field(default_factory=dict)
+    # `alb.ingress.kubernetes.io/load-balancer-attributes`, e.g. {"idle_timeout.timeout_seconds": "60"}
+    load_balancer_attributes: Dict[str, str] = field(default_factory=dict)
+
+    def __post_init__(self) -> None:
+        if not 1 <= self.min_replicas <= self.max_replicas:
+            raise ValueError(f"replicas must be 1 <= min ({self.min_replicas}) <= max ({self.max_replicas})")
+        if self.workers_per_pod < 1 or self.worker_cpu_millicores < 1 or self.worker_memory_mib < 1:
+            raise ValueError("workers_per_pod, worker_cpu_millicores and worker_memory_mib must be positive")
+        if not 1 <= self.websocket_min_replicas <= self.websocket_max_replicas:
+            raise ValueError(
+                f"websocket replicas must be 1 <= min ({self.websocket_min_replicas}) <= max ({self.websocket_max_replicas})"
+            )
+        if self.moderation_replicas < 0:
+            raise ValueError("moderation_replicas can't be negative")
+        if self.node_architecture not in ARCHITECTURES:
+            raise ValueError(f"node_architecture must be one of {ARCHITECTURES}, not {self.node_architecture}")
+        for key, value in self.load_balancer_attributes.items():
+            if not _LOAD_BALANCER_ATTRIBUTE.match(key) or not value or "," in value or "=" in value:
+                raise ValueError(f"invalid load balancer attribute {key}={value}")
+
+        names = [schedule.get("name") for schedule in self.scaling_schedules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"scaling schedule names must be unique: {names}")
+        for schedule in self.scaling_schedules:
+            if not _NAME.match(schedule.get("name") or ""):
+                raise ValueError(f"scaling schedule name must be a lowercase DNS label: {schedule}")
+            if len(schedule.get("schedule", "").split()) != 5:
+                raise ValueError(f"scaling schedule must be a 5 fields cron expression: {schedule}")
+            if any(schedule.get(bound, 1) < 1 for bound in ("min_replicas", "max_replicas")):
+                raise ValueError(f"scaling schedule replicas must be positive: {schedule}")
+
+    @property
+    def pod_node_selector(self) -> Dict[str, Dict[str, str]]:
+        """`nodeSelector` of the pod specs, left out when the pods run on any node"""
+        return {"nodeSelector": dict(self.node_selector)} if self.node_selector else {}
+
+
+@dataclass(frozen=True)
+class Region:
+    """A backend deployment: its base stack, pipeline and backend stack."""
+
+    # suffix of the stack names, e.g. `depo-backend-base-virginia`
+    name: str
+    region: str
+    environment: Environment
+    capacity: Capacity
+    # pipeline deploying it, the branch it follows
+    pipeline: str
+    # DNS cache on every node, in front of CoreDNS; the address is the ClusterIP of the kube-dns service
+    node_local_dns: bool = False
+    cluster_dns_ip: str = "10.100.0.10"
+    # holds the dashboard comparing every region of its environment
+    global_dashboard: bool = False
+
+    def __post_init__(self) -> None:
+        if not _NAME.match(self.name):
+            raise ValueError(f"region name must be a lowercase DNS label: {self.name}")
+        if not re.match(r"^[a-z]{2}(-[a-z]+)+-\d$", self.region):
+            raise ValueError(f"{self.name}: invalid AWS region {self.region}")
+        if self.pipeline not in ("production", "staging", "development"):
+            raise ValueError(f"{self.name}: unknown pipeline {self.pipeline}")
+
+    @property
+    def stack_suffix(self) -> str:
+        return f"{self.name}{self.environment.name_suffix}"
+
+
+PRODUCTION = Environment(
+    name="production",
+    domain="api.arc.market",
+    name_suffix="",
+    ssm_suffix="",
+    slo_thresholds={"latency_p50": 0.5, "latency_p99": 2.0, "error_rate": 1.0},
+    traces_sample_ratio="0.05",
+    alarm_emails=["henry@depo.io", "mujoko@depo.io"],
+    canary_releases=True,
+    edge_rate_limits=True,
+)
+
+STAGING = Environment(
+    name="staging",
+    domain="staging.api.arc.market",
+    name_suffix="-staging",
+    ssm_suffix="/staging",
+    slo_thresholds={"latency_p50": 1.5, "latency_p99": 5.0, "error_rate": 5.0},
+    traces_sample_ratio="0.5",
+    alarm_emails=["henry@depo.io"],
+    load_test=True,
+)
+
+# the websocket connections stay open between the Socket.io pings (25s), the long-polling
+# requests up to 45s; the pods keep their connections open longer (keepAliveTimeout)
+LOAD_BALANCER_ATTRIBUTES = {"idle_timeout.timeout_seconds": "300"}
+
+# raise the minimum ahead of the planned drops with scaling.planned_event, e.g.
+# *planned_event("genesis-drop", "2022-11-24 17:00", hours=3, min_replicas=12),
+PRODUCTION_CAPACITY = Capacity(
+    min_replicas=6,
+    max_replicas=18,
+    moderation_replicas=2,
+    websocket_min_replicas=2,
+    websocket_max_replicas=10,
+    node_selector={"depo.io/nodegroup-role": "backend"},
+    load_balancer_attributes=LOAD_BALANCER_ATTRIBUTES,
+)
+
+# scaled down at night and on weekends, re-applied every 30 minutes so a deploy doesn't scale it back up;
+# 2 replicas are left for the load test of the pipeline
+STAGING_CAPACITY = Capacity(
+    min_replicas=2,
+    max_replicas=5,
+    load_balancer_attributes=LOAD_BALANCER_ATTRIBUTES,
+    scaling_schedules=[
+        {"name": "night", "schedule": "*/30 0-6,20-23 * * *", "min_replicas": 2, "max_replicas": 2},
+        {"name": "weekend", "schedule": "*/30 * * * 0,6", "min_replicas": 2, "max_replicas": 2},
+        {"name": "workday", "schedule": "0 7 * * 1-5"},
+    ],
+)
+
+# every backend, sized per region; `dataclasses.replace(PRODUCTION_CAPACITY, ...)` sizes a region to its own traffic
+REGIONS = [
+    Region("virginia", "us-east-1", PRODUCTION, PRODUCTION_CAPACITY, pipeline="production", global_dashboard=True),
+    Region("seoul", "ap-northeast-2", PRODUCTION, PRODUCTION_CAPACITY, pipeline="production"),
+    Region("frankfurt", "eu-central-1", PRODUCTION, PRODUCTION_CAPACITY, pipeline="production"),
+    Region("sydney", "ap-southeast-2", PRODUCTION, PRODUCTION_CAPACITY, pipeline="production"),
+    Region("ireland", "eu-west-1", PRODUCTION, PRODUCTION_CAPACITY, pipeline="production"),
+    Region("ohio", "us-east-2", STAGING, STAGING_CAPACITY, pipeline="staging"),
+    # the development branch deploys the staging backend
+    Region("london", "eu-west-2", STAGING, STAGING_CAPACITY, pipeline="development"),
+]
+
+
+def _validate(regions: List[Region]) -> None:
+    names = [region.name for region in regions]
+    if len(set(names)) != len(names):
+        raise ValueError(f"region names must be unique: {names}")
+    for environment in {region.environment.name for region in regions}:
+        members = [region for region in regions if region.environment.name == environment]
+        aws_regions = [region.region for region in members]
+        if len(set(aws_regions)) != len(aws_regions):
+            raise ValueError(f"{environment}: an AWS region can only hold one backend: {aws_regions}")
+        if sum(region.global_dashboard for region in members) > 1:
+            raise ValueError(f"{environment}: only one region can hold the global dashboard")
+
+
+_validate(REGIONS)
+
+
+def check_workloads(capacity: Capacity, workloads: List[Dict]) -> None:
+    """
+    Raises when the pods of a workload manifest (Deployment or CronJob) don't
+    select the nodes of `capacity`, so no backend pod is placed apart from
+    the table. The daemon sets run on every node and aren't checked.
+    """
+    for workload in workloads:
+        spec = workload["spec"]
+        if workload["kind"] == "CronJob":
+            spec = spec["jobTemplate"]["spec"]
+        selector = spec["template"]["spec"].get("nodeSelector", {})
+        if selector != capacity.node_selector:
+            raise ValueError(
+                f"{workload['kind']} {workload['metadata']['name']}: nodeSelector {selector} "
+                f"isn't the node_selector of the capacity {capacity.node_selector}"
+            )
@@ -0,0 +1,166 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+
+KUBECTL_IMAGE = "public.ecr.aws/bitnami/kubectl:1.24.7"
+METRICS_SERVER_CHART_VERSION = "3.8.3"
+
+# average CPU utilization (% of the requests) kept by the autoscaler between its bounds
+TARGET_CPU_UTILIZATION = 70
+
+
+def planned_event(name: str, start: str, hours: int, min_replicas: int, lead_minutes: int = 30) -> List[Dict]:
+    """
+    Schedules raising the minimum replicas ahead of a planned event (an NFT drop...), and
+    restoring the baseline after it. `start` is in UTC, e.g. "2022-11-24 17:00"; the cron
+    expressions have no year, the past events should be removed from the tables.
+    """
+    begin = datetime.strptime(start, "%Y-%m-%d %H:%M") - timedelta(minutes=lead_minutes)
+    end = begin + timedelta(minutes=lead_minutes, hours=hours)
+    return [
+        {"name": f"{name}-up", "schedule": _cron(begin), "min_replicas": min_replicas},
+        {"name": f"{name}-down", "schedule": _cron(end)},
+    ]
+
+
+def _cron(at: datetime) -> str:
+    return f"{at.minute} {at.hour} {at.day} {at.month} *"
+
+
+class ScheduledScaling(core.Construct):
+    """
+    Autoscaler of the API pods with scaling bounds changed on a schedule.
+
+    A HorizontalPodAutoscaler keeps the CPU utilization of the pods around
+    `TARGET_CPU_UTILIZATION` between `min_replicas` and `max_replicas`. Each
+    schedule is a CronJob patching these bounds, e.g. raising the minimum
+    ahead of a drop or scaling down at night. The bounds left out of a
+    schedule are set back to the baseline. The cron expressions are in UTC.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        name: str,
+        target: Dict,
+        min_replicas: int,
+        max_replicas: int,
+        schedules: Optional[List[Dict]] = None,
+        install_metrics_server: bool = True,
+        node_selector: Optional[Dict[str, str]] = None,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.name = name
+        self.node_selector = node_selector
+
+        # resource metrics of the pods read by the autoscaler
+        metrics_server = None
+        if install_metrics_server:
+            metrics_server = eks.HelmChart(
+                self,
+                "MetricsServer",
+                cluster=cluster,
+                chart="metrics-server",
+                repository="https://kubernetes-sigs.github.io/metrics-server/",
+                version=METRICS_SERVER_CHART_VERSION,
+                release="metrics-server",
+                namespace="kube-system",
+            )
+
+        autoscaler = {
+            "apiVersion": "autoscaling/v1",
+            "kind": "HorizontalPodAutoscaler",
+            "metadata": {"name": name},
+            "spec": {
+                "scaleTargetRef": {
+                    "apiVersion": target["apiVersion"],
+                    "kind": target["kind"],
+                    "name": target["metadata"]["name"],
+                },
+                "minReplicas": min_replicas,
+                "maxReplicas": max_replicas,
+                "targetCPUUtilizationPercentage": TARGET_CPU_UTILIZATION,
+            },
+        }
+
+        # the pods of the cron jobs, see `regions.check_workloads`
+        self.workloads = [self._cron_job(schedule, min_replicas, max_replicas) for schedule in schedules or []]
+        manifests = [autoscaler]
+        if schedules:
+            manifests += self._scheduler_rbac()
+            manifests += self.workloads
+
+        self.manifest = eks.KubernetesManifest(self, "Autoscaler", cluster=cluster, manifest=manifests)
+        if metrics_server is not None:
+            self.manifest.node.add_dependency(metrics_server)
+
+    def _scheduler_rbac(self) -> List[Dict]:
+        return [
+            {"apiVersion": "v1", "kind": "ServiceAccount", "metadata": {"name": f"{self.name}-scheduler"}},
+            {
+                "apiVersion": "rbac.authorization.k8s.io/v1",
+                "kind": "Role",
+                "metadata": {"name": f"{self.name}-scheduler"},
+                "rules": [
+                    {
+                        "apiGroups": ["autoscaling"],
+                        "resources": ["horizontalpodautoscalers"],
+                        "resourceNames": [self.name],
+                        "verbs": ["get", "patch"],
+                    }
+                ],
+            },
+            {
+                "apiVersion": "rbac.authorization.k8s.io/v1",
+                "kind": "RoleBinding",
+                "metadata": {"name": f"{self.name}-scheduler"},
+                "roleRef": {"apiGroup": "rbac.authorization.k8s.io", "kind": "Role", "name": f"{self.name}-scheduler"},
+                "subjects": [{"kind": "ServiceAccount", "name": f"{self.name}-scheduler"}],
+            },
+        ]
+
+    def _cron_job(self, schedule: Dict, min_replicas: int, max_replicas: int) -> Dict:
+        low = schedule.get("min_replicas", min_replicas)
+        # the maximum can't be under the minimum
+        high = max(schedule.get("max_replicas", max_replicas), low)
+        patch = json.dumps({"spec": {"minReplicas": low, "maxReplicas": high}})
+        return {
+            "apiVersion": "batch/v1",
+            "kind": "CronJob",
+            "metadata": {"name": f"{self.name}-{schedule['name']}"},
+            "spec": {
+                "schedule": schedule["schedule"],
+                "concurrencyPolicy": "Replace",
+                "successfulJobsHistoryLimit": 1,
+                "failedJobsHistoryLimit": 3,
+                "jobTemplate": {
+                    "spec": {
+                        "backoffLimit": 3,
+                        "template": {
+                            "spec": {
+                                **({"nodeSelector": self.node_selector} if self.node_selector else {}),
+                                "serviceAccountName": f"{self.name}-scheduler",
+                                "restartPolicy": "OnFailure",
+                                "containers": [
+                                    {
+                                        "name": "patch-bounds",
+                                        "image": KUBECTL_IMAGE,
+                                        "args": ["patch", "hpa", self.name, "--type", "merge", "-p", patch],
+                                        "resources": {
+                                            "limits": {"cpu": "100m", "memory": "64Mi"},
+                                            "requests": {"cpu": "10m", "memory": "32Mi"},
+                                        },
+                                    }
+                                ],
+                            }
+                        },
+                    }
+                },
+            },
+        }
@@ -1,6 +1,7 @@
 from aws_cdk import (
     core,
     pipelines,
+    aws_codebuild as codebuild,
     aws_secretsmanager as sm,
     aws_codepipeline as codepipeline,
     aws_codepipeline_actions as actions,
@@ -8,7 +9,13 @@ from aws_cdk import (
 
 from typing import Dict
 
-from staging.backend import Stage
+from backend import Stage
+
+# load test of the deployed stage, see app/bench/load
+LOAD_TEST_URL = "https://staging.api.arc.market"
+K6_VERSION = "0.40.0"
+# secret holding the jwt secret of staging and the token exempting the load test from the rate limit
+LOAD_TEST_SECRET = "load-test-staging"
 
 
 class Pipeline(core.Stack):
@@ -93,7 +100,40 @@ class Pipeline(core.Stack):
             cloud_assembly_artifact=build_output,
             code_pipeline=pipeline,
         )
-        cdk_pipeline.add_application_stage(Stage(self, self.give_name("stage"), props, **kwargs))
+        stage = cdk_pipeline.add_application_stage(Stage(self, self.give_name("stage"), props, **kwargs))
+        # fails the pipeline, so the staging branch isn't promoted, when the p95 latency of a route
+        # or the throughput is beyond the budgets of app/bench/load/budgets.json
+        stage.add_actions(
+            pipelines.ShellScriptAction(
+                action_name="LoadTest",
+                additional_artifacts=[source_output],
+                run_order=stage.next_sequential_run_order(),
+                environment=codebuild.BuildEnvironment(
+                    build_image=codebuild.LinuxBuildImage.STANDARD_5_0,
+                    compute_type=codebuild.ComputeType.MEDIUM,
+                ),
+                environment_variables={
+                    "BASE_URL": codebuild.BuildEnvironmentVariable(value=LOAD_TEST_URL),
+                    "JWT_SECRET": codebuild.BuildEnvironmentVariable(
+                        type=codebuild.BuildEnvironmentVariableType.SECRETS_MANAGER,
+                        value=f"{LOAD_TEST_SECRET}:jwt_secret",
+                    ),
+                    "LOAD_TEST_TOKEN": codebuild.BuildEnvironmentVariable(
+                        type=codebuild.BuildEnvironmentVariableType.SECRETS_MANAGER,
+                        value=f"{LOAD_TEST_SECRET}:load_test_token",
+                    ),
+                },
+                commands=[
+                    f"curl -sSL https://github.com/grafana/k6/releases/download/v{K6_VERSION}/k6-v{K6_VERSION}-linux-amd64.tar.gz"
+                    " | tar -xz --strip-components=1 -C /usr/local/bin",
+                    # the manifests are applied, wait for the rollout of the new pods
+                    "for i in $(seq 30); do curl -sf $BASE_URL/ws/v2/nft/collection/top > /dev/null && break; sleep 10; done",
+                    "sleep 120",
+                    # the staging database is seeded once (README), BUY_NOW isn't tested until then
+                    "k6 run app/bench/load/api.js",
+                ],
+            )
+        )
 
     def give_name(self, name: str) -> str:
         return f"{self.namespace}-{name}-staging"
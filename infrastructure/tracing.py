@@ -0,0 +1,125 @@
+from typing import Optional
+
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+from aws_cdk import aws_iam as iam
+
+OTEL_COLLECTOR_IMAGE = "public.ecr.aws/aws-observability/aws-otel-collector:v0.20.0"
+OTEL_COLLECTOR_NAMESPACE = "amazon-cloudwatch"
+OTLP_GRPC_PORT = 4317
+
+
+class TraceCollector(core.Construct):
+    """
+    AWS Distro for OpenTelemetry collector running on every node.
+
+    The API pods send their spans with OTLP to the collector of their node
+    (`http://$(HOST_IP):4317`), which batches them and exports them to X-Ray.
+    The collector runs in the namespace created for Fluent Bit by
+    `LogShipping`, the manifest passed as `namespace` orders the deployment.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        namespace: Optional[core.Construct] = None,
+    ) -> None:
+        super().__init__(scope, id)
+
+        region = core.Stack.of(self).region
+
+        service_account = eks.ServiceAccount(
+            self,
+            "ServiceAccount",
+            cluster=cluster,
+            name="aws-otel-collector",
+            namespace=OTEL_COLLECTOR_NAMESPACE,
+        )
+        if namespace is not None:
+            service_account.node.add_dependency(namespace)
+        service_account.role.add_managed_policy(
+            iam.ManagedPolicy.from_aws_managed_policy_name("AWSXRayDaemonWriteAccess")
+        )
+
+        config_map = {
+            "apiVersion": "v1",
+            "kind": "ConfigMap",
+            "metadata": {"name": "aws-otel-collector-config", "namespace": OTEL_COLLECTOR_NAMESPACE},
+            "data": {
+                "collector.yaml": "\n".join(
+                    [
+                        "receivers:",
+                        "  otlp:",
+                        "    protocols:",
+                        "      grpc:",
+                        f"        endpoint: 0.0.0.0:{OTLP_GRPC_PORT}",
+                        "processors:",
+                        "  memory_limiter:",
+                        "    check_interval: 1s",
+                        "    limit_mib: 150",
+                        "  batch/traces:",
+                        "    timeout: 1s",
+                        "    send_batch_size: 50",
+                        "exporters:",
+                        "  awsxray:",
+                        f"    region: {region}",
+                        "service:",
+                        "  pipelines:",
+                        "    traces:",
+                        "      receivers: [otlp]",
+                        "      processors: [memory_limiter, batch/traces]",
+                        "      exporters: [awsxray]",
+                        "",
+                    ]
+                ),
+            },
+        }
+
+        daemon_set = {
+            "apiVersion": "apps/v1",
+            "kind": "DaemonSet",
+            "metadata": {"name": "aws-otel-collector", "namespace": OTEL_COLLECTOR_NAMESPACE},
+            "spec": {
+                "selector": {"matchLabels": {"name": "aws-otel-collector"}},
+                "updateStrategy": {"type": "RollingUpdate"},
+                "template": {
+                    "metadata": {"labels": {"name": "aws-otel-collector"}},
+                    "spec": {
+                        "serviceAccountName": service_account.service_account_name,
+                        "containers": [
+                            {
+                                "name": "aws-otel-collector",
+                                "image": OTEL_COLLECTOR_IMAGE,
+                                "command": ["/awscollector", "--config=/conf/collector.yaml"],
+                                "env": [{"name": "AWS_REGION", "value": region}],
+                                # reachable from the pods of the node through the host IP
+                                "ports": [
+                                    {
+                                        "name": "otlp-grpc",
+                                        "containerPort": OTLP_GRPC_PORT,
+                                        "hostPort": OTLP_GRPC_PORT,
+                                        "protocol": "TCP",
+                                    }
+                                ],
+                                "resources": {
+                                    "limits": {"cpu": "200m", "memory": "200Mi"},
+                                    "requests": {"cpu": "50m", "memory": "100Mi"},
+                                },
+                                "volumeMounts": [{"name": "collector-config", "mountPath": "/conf"}],
+                            }
+                        ],
+                        "volumes": [{"name": "collector-config", "configMap": {"name": "aws-otel-collector-config"}}],
+                    },
+                },
+            },
+        }
+
+        manifest = eks.KubernetesManifest(
+            self,
+            "Collector",
+            cluster=cluster,
+            manifest=[config_map, daemon_set],
+        )
+        manifest.node.add_dependency(service_account)
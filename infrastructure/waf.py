@@ -0,0 +1,115 @@
+from typing import Dict, List, Optional
+
+from aws_cdk import core
+from aws_cdk import aws_wafv2 as wafv2
+
+# requests per 5 minutes and client ip, by path prefix of the expensive routes
+PATH_RATE_LIMITS = {
+    "/ws/v2/mktOverview": 300,
+    "/ws/v2/marketDetails": 300,
+    "/ws/v2/nft/search": 300,
+    "/ws/v2/nft/collection/suggest": 600,
+}
+
+# requests per 5 minutes and client ip, over every path
+GLOBAL_RATE_LIMIT = 3000
+
+# bot control rules only counted: the token metadata is crawled by the
+# marketplaces and indexers with http libraries
+COUNTED_BOT_RULES = ["CategoryHttpLibrary", "SignalNonBrowserUserAgent"]
+
+
+class EdgeRateLimits(core.Construct):
+    """
+    WAFv2 web ACL of the ingress load balancer, attached by the
+    `alb.ingress.kubernetes.io/wafv2-acl-arn` annotation.
+
+    Drops the bursts of a client ip beyond the per-path and global rate
+    limits, the requests from ips with a bad reputation and the unverified
+    bots before they reach the pods. Every rule emits a CloudWatch metric
+    and keeps sampled requests.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        name: str,
+        path_rate_limits: Optional[Dict[str, int]] = None,
+        global_rate_limit: int = GLOBAL_RATE_LIMIT,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.name = name
+        path_rate_limits = PATH_RATE_LIMITS if path_rate_limits is None else path_rate_limits
+
+        rules: List[Dict] = [
+            self._managed_rule("IpReputation", "AWSManagedRulesAmazonIpReputationList"),
+            self._managed_rule("BotControl", "AWSManagedRulesBotControlRuleSet", counted_rules=COUNTED_BOT_RULES),
+        ]
+        for path, limit in path_rate_limits.items():
+            rules.append(self._rate_rule(f"Rate{path.strip('/').split('/')[-1].title()}", limit, path))
+        rules.append(self._rate_rule("RateGlobal", global_rate_limit))
+
+        self.web_acl = wafv2.CfnWebACL(
+            self,
+            "WebAcl",
+            name=name,
+            scope="REGIONAL",
+            default_action=wafv2.CfnWebACL.DefaultActionProperty(allow={}),
+            visibility_config=self._visibility(name),
+            # evaluated in the order of the list
+            rules=self._prioritized(rules),
+        )
+
+    @property
+    def web_acl_arn(self) -> str:
+        return self.web_acl.attr_arn
+
+    def _prioritized(self, rules: List[Dict]) -> List[wafv2.CfnWebACL.RuleProperty]:
+        return [wafv2.CfnWebACL.RuleProperty(priority=priority, **rule) for priority, rule in enumerate(rules)]
+
+    def _managed_rule(self, rule_name: str, group: str, counted_rules: Optional[List[str]] = None) -> Dict:
+        return dict(
+            name=rule_name,
+            statement=wafv2.CfnWebACL.StatementProperty(
+                managed_rule_group_statement=wafv2.CfnWebACL.ManagedRuleGroupStatementProperty(
+                    vendor_name="AWS",
+                    name=group,
+                    excluded_rules=[wafv2.CfnWebACL.ExcludedRuleProperty(name=rule) for rule in counted_rules or []],
+                )
+            ),
+            override_action=wafv2.CfnWebACL.OverrideActionProperty(none={}),
+            visibility_config=self._visibility(rule_name),
+        )
+
+    def _rate_rule(self, rule_name: str, limit: int, path: Optional[str] = None) -> Dict:
+        scope_down = None
+        if path:
+            scope_down = wafv2.CfnWebACL.StatementProperty(
+                byte_match_statement=wafv2.CfnWebACL.ByteMatchStatementProperty(
+                    field_to_match=wafv2.CfnWebACL.FieldToMatchProperty(uri_path={}),
+                    positional_constraint="STARTS_WITH",
+                    search_string=path,
+                    text_transformations=[wafv2.CfnWebACL.TextTransformationProperty(priority=0, type="NONE")],
+                )
+            )
+        return dict(
+            name=rule_name,
+            statement=wafv2.CfnWebACL.StatementProperty(
+                rate_based_statement=wafv2.CfnWebACL.RateBasedStatementProperty(
+                    aggregate_key_type="IP",
+                    limit=limit,
+                    scope_down_statement=scope_down,
+                )
+            ),
+            action=wafv2.CfnWebACL.RuleActionProperty(block={}),
+            visibility_config=self._visibility(rule_name),
+        )
+
+    def _visibility(self, metric_name: str) -> wafv2.CfnWebACL.VisibilityConfigProperty:
+        return wafv2.CfnWebACL.VisibilityConfigProperty(
+            cloud_watch_metrics_enabled=True,
+            metric_name=f"{self.name}-{metric_name}" if metric_name != self.name else metric_name,
+            sampled_requests_enabled=True,
+        )
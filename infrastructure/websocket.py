@@ -0,0 +1,173 @@
+from typing import Dict
+
+from aws_cdk import core
+from aws_cdk import aws_eks as eks
+
+from manifests import apply_manifest
+from scaling import ScheduledScaling
+
+REDIS_IMAGE = "public.ecr.aws/docker/library/redis:6.2-alpine"
+
+# `config.realtime` of the app
+WEBSOCKET_PORT = 3002
+SOCKET_IO_PATH = "/socket.io"
+
+# the polling requests and the websocket upgrade of a client must reach the same pod,
+# the pods close their connections on SIGTERM and the clients reconnect to the others
+TARGET_GROUP_ATTRIBUTES = {
+    "stickiness.enabled": "true",
+    "stickiness.type": "lb_cookie",
+    "stickiness.lb_cookie.duration_seconds": "86400",
+    "deregistration_delay.timeout_seconds": "30",
+}
+
+# variables of the API container read by the websocket server
+WEBSOCKET_ENV = {"ENV", "AWS_REGION", "LOGGING", "JWT_SECRET"}
+
+# pod settings shared with the API pods
+POD_SPEC_KEYS = ("nodeSelector", "serviceAccountName", "dnsConfig", "affinity")
+
+
+class WebsocketTier(core.Construct):
+    """
+    Socket.io server of the API (`socket-server.ts`) on its own pods.
+
+    The long-lived connections are served by a Deployment scaled apart from
+    the REST pods, behind the `/socket.io` path of the ingress (see
+    `ingress_path`), with sticky sessions. The pods share their rooms through
+    the pub/sub of an in-cluster Redis (`redis_url`), which the REST processes
+    publish their events to; it holds no data, a restart only drops the
+    events published meanwhile.
+    """
+
+    def __init__(
+        self,
+        scope: core.Construct,
+        id: str,
+        cluster: eks.ICluster,
+        name: str,
+        api_pod_spec: Dict,
+        min_replicas: int,
+        max_replicas: int,
+    ) -> None:
+        super().__init__(scope, id)
+
+        self.redis_url = f"redis://{name}-redis:6379"
+        self.service_name = f"{name}-websocket"
+
+        redis_labels = {"app.kubernetes.io/name": f"{name}-redis"}
+        redis_deployment = {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": f"{name}-redis"},
+            "spec": {
+                "replicas": 1,
+                "selector": {"matchLabels": redis_labels},
+                "template": {
+                    "metadata": {"labels": redis_labels},
+                    "spec": {
+                        **{key: api_pod_spec[key] for key in ("nodeSelector",) if key in api_pod_spec},
+                        "containers": [
+                            {
+                                "name": "redis",
+                                "image": REDIS_IMAGE,
+                                # pub/sub only, nothing to persist
+                                "args": ["--save", "", "--appendonly", "no"],
+                                "ports": [{"containerPort": 6379}],
+                                "resources": {
+                                    "limits": {"cpu": "500m", "memory": "256Mi"},
+                                    "requests": {"cpu": "100m", "memory": "128Mi"},
+                                },
+                            }
+                        ]
+                    },
+                },
+            },
+        }
+        redis_service = {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {"name": f"{name}-redis"},
+            "spec": {"ports": [{"port": 6379, "targetPort": 6379}], "selector": redis_labels},
+        }
+        self.redis = eks.KubernetesManifest(self, "Redis", cluster=cluster, manifest=[redis_deployment, redis_service])
+
+        api_container = api_pod_spec["containers"][0]
+        labels = {"app.kubernetes.io/name": self.service_name}
+        deployment = {
+            "apiVersion": "apps/v1",
+            "kind": "Deployment",
+            "metadata": {"name": self.service_name},
+            "spec": {
+                "selector": {"matchLabels": labels},
+                "template": {
+                    "metadata": {"labels": labels},
+                    "spec": {
+                        **{key: api_pod_spec[key] for key in POD_SPEC_KEYS if key in api_pod_spec},
+                        "containers": [
+                            {
+                                "image": api_container["image"],
+                                "imagePullPolicy": "Always",
+                                "name": "websocket",
+                                "command": ["ts-node", "-r", "esm", "socket-server.ts"],
+                                "ports": [{"containerPort": WEBSOCKET_PORT}],
+                                "env": [var for var in api_container["env"] if var["name"] in WEBSOCKET_ENV]
+                                + [
+                                    {"name": "WEBSOCKET_PORT", "value": str(WEBSOCKET_PORT)},
+                                    {"name": "REDIS_URL", "value": self.redis_url},
+                                ],
+                                "readinessProbe": {"httpGet": {"path": "/", "port": WEBSOCKET_PORT}},
+                                "resources": {
+                                    "limits": {"memory": "1024Mi"},
+                                    "requests": {"cpu": "500m", "memory": "512Mi"},
+                                },
+                            }
+                        ],
+                    },
+                },
+            },
+        }
+        service = {
+            "apiVersion": "v1",
+            "kind": "Service",
+            "metadata": {
+                "name": self.service_name,
+                "annotations": {
+                    "alb.ingress.kubernetes.io/target-group-attributes": ",".join(
+                        f"{key}={value}" for key, value in TARGET_GROUP_ATTRIBUTES.items()
+                    ),
+                },
+            },
+            "spec": {
+                "ports": [{"port": 80, "targetPort": WEBSOCKET_PORT, "protocol": "TCP"}],
+                "type": "NodePort",
+                "selector": labels,
+            },
+        }
+        self.manifest = apply_manifest(self, "Websocket", cluster, deployment, service)
+        self.manifest.node.add_dependency(self.redis)
+
+        # scaled on the CPU of its pods, apart from the API; the metrics server is installed with the API autoscaler
+        scaling = ScheduledScaling(
+            self,
+            "Scaling",
+            cluster=cluster,
+            name=f"{self.service_name}-autoscaler",
+            target=deployment,
+            min_replicas=min_replicas,
+            max_replicas=max_replicas,
+            install_metrics_server=False,
+            node_selector=api_pod_spec.get("nodeSelector"),
+        )
+        scaling.node.add_dependency(self.manifest)
+
+        # the pods of the tier, see `regions.check_workloads`
+        self.workloads = [redis_deployment, deployment, *scaling.workloads]
+
+    @property
+    def ingress_path(self) -> Dict:
+        """Rule of the ingress forwarding the Socket.io requests to the websocket pods, before the API one."""
+        return {
+            "path": f"{SOCKET_IO_PATH}/*",
+            "backend": {"serviceName": self.service_name, "servicePort": 80},
+        }
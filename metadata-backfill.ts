@@ -0,0 +1,15 @@
+// Writes the static token metadata of every item to the user bucket
+import { config } from "./app/config/config";
+import { TokenMetadataController } from "./app/modules/controller/TokenMetadataController";
+
+config.mongodb
+  .createInstance()
+  .then(() => new TokenMetadataController().backfill())
+  .then((written) => {
+    console.log(`metadata-backfill::${written} token metadata written`);
+    process.exit(0);
+  })
+  .catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
@@ -0,0 +1,14 @@
+// Moderation worker, consumes the upload event queue of the region
+import { config } from "./app/config/config";
+import moderationWorker from "./app/modules/services/ModerationWorker";
+
+process.once("SIGTERM", () => moderationWorker.stop());
+
+config.mongodb
+  .createInstance()
+  .then(() => moderationWorker.start())
+  .then(() => process.exit(0))
+  .catch((err) => {
+    console.error(err);
+    process.exit(1);
+  });
@@ -1,3 +1,5 @@
+// Tracing patches the modules on require, it must be loaded first
+const tracing = require("./app/modules/services/Tracing").default;
 // Dependencies
 const fastify = require("fastify");
 const cookie = require("fastify-cookie");
@@ -5,6 +7,8 @@ const cors = require("fastify-cors");
 const { jwt } = require("./app/config/jwtconfig");
 const multiPart = require("@fastify/multipart");
 const Moralis = require("moralis/node");
+import * as cluster from "cluster";
+import { AggregatorRegistry } from "prom-client";
 
 // Middlewares
 import { ActionLogger } from "./app/modules/middleware/ActionLogger";
@@ -12,7 +16,9 @@ import { ErrorLogger } from "./app/modules/middleware/ErrorLogger";
 import { SessionChecker } from "./app/modules/middleware/SessionChecker";
 import { config } from "./app/config/config";
 import { router } from "./app/modules/routes";
-import { LogController } from "./app/modules/controller/LogController";
+import logShipper from "./app/modules/services/LogShipper";
+import metrics from "./app/modules/services/Metrics";
+import httpClient from "./app/modules/services/HttpClient";
 import { FastifyReply } from "fastify";
 import * as SwaggerPlugin from "fastify-swagger";
 import fastifyCron from 'fastify-cron'
@@ -20,7 +26,51 @@ import { rewardHelper } from "./app/modules/util/reward-handler";
 import * as helmet from '@fastify/helmet'
 import { walletHandler } from "./app/modules/util/wallet-handler";
 import { ActivityController } from "./app/modules/controller/ActivityController";
+import { CollectionStatsController } from "./app/modules/controller/CollectionStatsController";
+import { JobLeaseController } from "./app/modules/controller/JobLeaseController";
+import { NFTCollectionController } from "./app/modules/controller/NFTCollectionController";
+import { SearchIndexController } from "./app/modules/controller/SearchIndexController";
+import moderationWorker from "./app/modules/services/ModerationWorker";
+import { redisEmitter } from "./app/modules/services/Socket.io";
 process.setMaxListeners(15);
+// on SIGTERM the in-flight requests are served before exiting, within the grace period of the pods (30s)
+const SHUTDOWN_TIMEOUT = 25000;
+/**
+ * Jobs ticking in every pod: by the primary when the port is served by
+ * cluster workers (`WEB_CONCURRENCY` > 1), else by the server itself;
+ * each tick is run by the one process taking the lease of the job
+ */
+const cronJobs = [
+  {
+    name: "collection-stats",
+    cronTime: config.collectionStats.rebuildCron,
+    startWhenReady: true,
+    onTick: async () => {
+      try {
+        if (!(await new JobLeaseController().acquire("collection-stats", config.collectionStats.leaseSeconds))) return;
+        const count = await new CollectionStatsController().rebuildAll();
+        console.log(`collection-stats::rebuilt the stats of ${count} collections`);
+      } catch (error) {
+        console.log("collection-stats::rebuild failed", error);
+      }
+    },
+  },
+  {
+    name: "search-index",
+    cronTime: config.searchIndex.reindexCron,
+    startWhenReady: true,
+    onTick: async () => {
+      try {
+        if (!(await new JobLeaseController().acquire("search-index", config.searchIndex.leaseSeconds))) return;
+        const count = await new SearchIndexController().reindex();
+        console.log(`search-index::updated the search fields of ${count} documents`);
+      } catch (error) {
+        console.log("search-index::reindex failed", error);
+      }
+    },
+  },
+];
+const clustered = config.server.workers > 1;
 /**
  * Mounts the server
  *
@@ -44,8 +94,10 @@ async function mount() {
     origin: "*",
   });
   await app.register(require('@fastify/rate-limit'), {
-    max: 200,
-    timeWindow: '1 minute'
+    // per process, the workers share the budget of the pod
+    max: Math.ceil(config.rateLimit.max / config.server.workers),
+    timeWindow: '1 minute',
+    allowList: (req) => !!config.rateLimit.bypassToken && req.headers["x-load-test"] === config.rateLimit.bypassToken,
   })
   await jwt(app);
   await app.register(cookie, {
@@ -67,6 +119,14 @@ async function mount() {
   app.addHook("onRequest", async (req, res) => {
     await SessionChecker(req, res, app);
   });
+  /** Request latency and outbound call metrics */
+  httpClient.instrumentCcxt(require("ccxt"));
+  metrics.instrumentAwsSdk(require("aws-sdk"));
+  // keep-alive connections to S3 / Rekognition
+  require("aws-sdk").config.update({ httpOptions: { agent: httpClient.httpsAgent } });
+  app.addHook("onResponse", async (req, res: FastifyReply) => {
+    metrics.observeRequest(req, res);
+  });
   if (config.logging) {
     if (["any", "action-only"].includes(config.logLevel)) app.addHook("onRequest", ActionLogger);
     if (["any", "error-only"].includes(config.logLevel)) app.addHook("onError", ErrorLogger);
@@ -84,11 +144,17 @@ async function mount() {
           date: new Date().getTime(),
         });
       }
-      await LogController.dispatch();
+      logShipper.schedule();
     });
+    logShipper.start();
+    app.addHook("onClose", async () => logShipper.stop());
   }
+  /** Flushes the pending spans */
+  app.addHook("onClose", async () => tracing?.shutdown());
   /** Register routes */
   await router(app);
+  /** Periodic jobs */
+  if (!clustered) await app.register(fastifyCron, { jobs: cronJobs });
   return app;
 }
 const serverUrl = config.moralis.server_url;
@@ -101,7 +167,7 @@ console.log(masterKey);
 const initMoralis= async () =>{
 
   try {
-    await Moralis.start({ serverUrl, appId, masterKey });
+    await httpClient.call("moralis", "start", () => Moralis.start({ serverUrl, appId, masterKey }));
   let qryBuyNow=new Moralis.Query('BuyNow');
   let subBuyNow = await qryBuyNow.subscribe();
 
@@ -157,26 +223,111 @@ const initMoralis= async () =>{
   }
   
 }
-config.mongodb
-  .createInstance()
-  .then(() => {
-    /** Server start */
-    mount().then((app) => {
-      
-      
-      app.listen(config.server.port ?? 3001, "0.0.0.0", (error, addr) => {
-        if (error) {
-          if (config.logging) {
-            console.error(error);
+/**
+ * Background work of the pod, see `cronJobs`
+ */
+const startBackground = () => {
+  initMoralis();
+  new CollectionStatsController().ensureBuilt().catch((err) => console.log(err));
+  new NFTCollectionController().ensurePageIndexes().catch((err) => console.log(err));
+  const searchIndex = new SearchIndexController();
+  searchIndex.ensureIndexes().then(() => searchIndex.ensureBuilt()).catch((err) => console.log(err));
+};
+/**
+ * Publishes the Socket.io events of the process to the rooms of the websocket pods
+ */
+const connectRealtime = async () => {
+  if (!config.realtime.redisUrl) return;
+  try {
+    config.io = await redisEmitter();
+  } catch (err) {
+    console.log("socket.io::couldn't connect to redis, the events aren't pushed", err);
+  }
+};
+/**
+ * Mounts the primary of the cluster: the periodic jobs and the metrics of all the workers
+ *
+ * @returns {FastifyInstance} app
+ */
+async function mountPrimary() {
+  const app = fastify();
+  const aggregator = new AggregatorRegistry();
+  app.get("/metrics", async (req, res: FastifyReply) => {
+    const body = await aggregator.clusterMetrics();
+    res.header("content-type", aggregator.contentType).send(body);
+  });
+  await app.register(fastifyCron, { jobs: cronJobs });
+  app.addHook("onClose", async () => tracing?.shutdown());
+  return app;
+}
+/**
+ * Closes the app on SIGTERM and exits, once its requests are served or after `SHUTDOWN_TIMEOUT`
+ */
+const closeOnSigterm = (app) => {
+  process.once("SIGTERM", () => {
+    // the idle keep-alive connections aren't closed by the server
+    setTimeout(() => process.exit(0), SHUTDOWN_TIMEOUT).unref();
+    app.close().finally(() => process.exit(0));
+  });
+};
+/**
+ * Forks the workers serving the port and replaces the ones exiting, until SIGTERM;
+ * the primary app is closed once the workers have exited
+ */
+const forkWorkers = (app) => {
+  let stopping = false;
+  for (let i = 0; i < config.server.workers; i++) cluster.fork();
+  cluster.on("exit", (worker, code, signal) => {
+    if (stopping) {
+      if (!Object.keys(cluster.workers).length) app.close().finally(() => process.exit(0));
+      return;
+    }
+    console.log(`cluster::worker ${worker.process.pid} exited (${signal ?? code}), forking a new one`);
+    cluster.fork();
+  });
+  process.once("SIGTERM", () => {
+    stopping = true;
+    Object.values(cluster.workers).forEach((worker) => worker.process.kill("SIGTERM"));
+  });
+};
+if (clustered && !cluster.isWorker) {
+  /** Primary start */
+  config.mongodb
+    .createInstance()
+    .then(() => connectRealtime())
+    .then(() => mountPrimary())
+    .then(async (app) => {
+      await app.listen(config.server.metricsPort, "0.0.0.0");
+      forkWorkers(app);
+      startBackground();
+    })
+    .catch((err) => {
+      console.error(err);
+      process.exit(1);
+    });
+} else {
+  /** Server start, a cluster worker or the only process of the pod */
+  config.mongodb
+    .createInstance()
+    .then(() => connectRealtime())
+    .then(() => {
+      mount().then((app) => {
+        app.listen(config.server.port ?? 3001, "0.0.0.0", (error, addr) => {
+          if (error) {
+            if (config.logging) {
+              console.error(error);
+            }
+            process.exit(1);
           }
-          process.exit(1);
-        }
-        
-        initMoralis()
+          closeOnSigterm(app);
+          if (!clustered) startBackground();
+          // without an upload event queue, the uploads are moderated by the process which received them
+          if (!config.moderation.queueUrl) moderationWorker.start();
+        });
       });
+    })
+    .catch((err) => {
+      console.error(err);
+      process.exit(1);
     });
-  })
-  .catch((err) => {
-    console.error(err);
-    process.exit(1);
-  });
+}
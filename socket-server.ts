@@ -0,0 +1,35 @@
+// Websocket server, serves the Socket.io clients apart from the REST pods
+import { createServer } from "http";
+import { Server } from "socket.io";
+import { config } from "./app/config/config";
+import { redisAdapter, socketInit } from "./app/modules/services/Socket.io";
+
+// health check of the load balancer, the other requests are handled by Socket.io on its path
+const server = createServer((req, res) => {
+  res.writeHead(req.url === "/" ? 204 : 404).end();
+});
+// beyond the idle timeout of the load balancer, so it closes the idle connections first
+server.keepAliveTimeout = 500000;
+server.headersTimeout = 501000;
+
+const io = new Server(server, {
+  path: config.realtime.path,
+  cors: { origin: "*", credentials: true },
+});
+
+process.once("SIGTERM", () => {
+  // the clients reconnect to the other pods
+  io.close(() => process.exit(0));
+});
+
+(async () => {
+  if (config.realtime.redisUrl) {
+    io.adapter(await redisAdapter());
+  }
+  config.io = io;
+  io.on("connection", socketInit);
+  server.listen(config.realtime.port, "0.0.0.0");
+})().catch((err) => {
+  console.error(err);
+  process.exit(1);
+});